@@ -21,16 +21,18 @@ from ._utilities import check_type, check_return_int, check_type_None_default, c
     check_return_int_None_default, resolve_path, is_deletable
 from ._utilities.multiprocessing import start_with_timeout, process_wrapper, make_sigterm_raise_ReceivedSigterm
 from .info import ApriInfo, AposInfo
-from .blocks import Block
-from .multiprocessing import parallelize
+from .blocks import Block, SharedBlock
+from .multiprocessing import parallelize, WorkerPool, SharedArray
 from .registers import Register, PickleRegister, NumpyRegister
 from .regloader import search, load_ident, load
+from .server import serve, RegisterServer, RemoteRegister
 from .errors import DataNotFoundError, CompressionError, DecompressionError, RegisterError, RegisterOpenError
 
 __all__ = [
     "ApriInfo",
     "AposInfo",
     "Block",
+    "SharedBlock",
     "Register",
     "PickleRegister",
     "NumpyRegister",
@@ -42,7 +44,12 @@ __all__ = [
     "DecompressionError",
     "RegisterError",
     "stack",
-    "parallelize"
+    "parallelize",
+    "WorkerPool",
+    "SharedArray",
+    "serve",
+    "RegisterServer",
+    "RemoteRegister"
 ]
 
 @contextmanager
@@ -12,6 +12,8 @@ from pathlib import Path
 from .errors import CannotLoadError, DataNotFoundError
 from .debug import _file_datetime_format, _line_datetime_format, _line_datetime_len
 from .regloader import _load, _load_ident
+from .server import serve, _CACHE_SIZE_DEFAULT
+from .registers import _MIGRATE_BATCH_SIZE_DEFAULT
 
 def resolved_Path(str_):
 
@@ -222,6 +224,38 @@ parser_slurmify.add_argument('--ncpu', help = 'Number of CPUs (default: 1)', def
 parser_slurmify.add_argument('--email', help = 'Email this address when script starts/finishes (default: no emails)')
 parser_slurmify.add_argument('--job-name', help = 'Slurm job name (default: CorniferScript)', dest = 'job_name')
 _add_verbose_argument(parser_slurmify)
+###########################
+#          SERVE          #
+SOCKET_NAME_DEFAULT = 'cornifer.sock'
+parser_serve = subparsers.add_parser(
+    'serve', help = 'Serve registers read-only to `RemoteRegister`s on this machine, over a Unix socket.'
+)
+_add_save_dir_argument(parser_serve)
+_add_shorthand_ident_arguments(parser_serve)
+parser_serve.add_argument(
+    '-s', '--socket', help = f'Path of the Unix socket (default: {SOCKET_NAME_DEFAULT} in the registers\' parent '
+    'directory)', type = resolved_Path
+)
+parser_serve.add_argument(
+    '-c', '--cache-size', help = f'Bytes of shared memory for cached blocks (default: {_CACHE_SIZE_DEFAULT})',
+    dest = 'cache_size', default = _CACHE_SIZE_DEFAULT, type = int
+)
+parser_serve.add_argument(
+    '-n', '--num-threads', help = 'Number of requests to evaluate at a time (default: number of CPUs)',
+    dest = 'num_threads', type = int
+)
+###########################
+#         MIGRATE         #
+parser_migrate = subparsers.add_parser(
+    'migrate', help = 'Rewrite register databases in the binary key format. The registers must not be open.'
+)
+_add_save_dir_argument(parser_migrate)
+_add_shorthand_ident_arguments(parser_migrate)
+_add_verbose_argument(parser_migrate)
+parser_migrate.add_argument(
+    '-b', '--batch-size', help = f'Keys written per transaction (default: {_MIGRATE_BATCH_SIZE_DEFAULT})',
+    dest = 'batch_size', default = _MIGRATE_BATCH_SIZE_DEFAULT, type = int
+)
 
 #
 # parser_move = subparsers.add_parser('move', help = 'Move registers to another directory.')
@@ -472,5 +506,37 @@ elif args.command == 'slurmify':
 
     print(sbatch_capture.stdout)
 
+elif args.command == 'serve':
+
+    parser_command.parse_args() # no unknown args
+    regs, to_print = _load_regs(args.shorthands, args.idents, args.dir)
+
+    if args.socket is None:
+        args.socket = args.dir / SOCKET_NAME_DEFAULT
+
+    if len(to_print) > 0:
+        print(to_print)
+
+    for reg in regs:
+        print(f'Serving {reg}')
+
+    print(f'Listening on {args.socket}')
+    serve(args.socket, regs, args.cache_size, args.num_threads)
+
+elif args.command == 'migrate':
+
+    parser_command.parse_args() # no unknown args
+    regs, to_print = _load_regs(args.shorthands, args.idents, args.dir)
+
+    if len(to_print) > 0:
+        print(to_print)
+
+    for reg in regs:
+
+        if args.verbose:
+            print(f'Migrating {reg}')
+
+        reg.migrate_key_format(args.batch_size)
+
 else:
     raise NotImplementedError
@@ -22,12 +22,151 @@ import lmdb
 from .._utilities import check_type, check_return_int
 
 
+class GrowingWriter:
+    """A write transaction that survives `lmdb.MapFullError`. The transaction records its writes; when the map is
+    full, it aborts, calls `grow()` to enlarge the map, replays its writes into a fresh transaction, and carries on. If
+    `grow()` returns `False`, then the `MapFullError` is raised.
+
+    Cursors opened before the map grows must not be used afterwards. Writes through a cursor could not be replayed, so
+    the cursors of a `GrowingWriter` are read-only; use `GrowingWriter.putmulti` instead of `lmdb.Cursor.putmulti`.
+    """
+
+    def __init__(self, db, grow):
+
+        self.db = db
+        self.grow = grow
+        self.txn = None
+        self.ops = []
+
+    @contextmanager
+    def begin(self):
+
+        self.txn = self.db.begin(write = True)
+
+        try:
+            yield self
+
+        except BaseException:
+
+            self.txn.abort()
+            raise
+
+        else:
+            self._do(lambda: self.txn.commit(), None)
+
+    def _do(self, fn, op):
+
+        while True:
+
+            try:
+                ret = fn()
+
+            except lmdb.MapFullError:
+                self._regrow()
+
+            else:
+
+                if op is not None:
+                    self.ops.append(op)
+
+                return ret
+
+    def _regrow(self):
+
+        while True:
+
+            try:
+                self.txn.abort()
+
+            except lmdb.Error:
+                pass # already aborted by a failed commit
+
+            if not self.grow():
+                raise lmdb.MapFullError("mdb_put: MDB_MAP_FULL: Environment mapsize limit reached")
+
+            self.txn = self.db.begin(write = True)
+
+            try:
+
+                for method, args, kwargs in self.ops:
+
+                    if method == "putmulti":
+                        self.txn.cursor().putmulti(*args, **kwargs)
+
+                    else:
+                        getattr(self.txn, method)(*args, **kwargs)
+
+            except lmdb.MapFullError:
+                pass
+
+            else:
+                return
+
+    def put(self, *args, **kwargs):
+        return self._do(lambda: self.txn.put(*args, **kwargs), ("put", args, kwargs))
+
+    def delete(self, *args, **kwargs):
+        return self._do(lambda: self.txn.delete(*args, **kwargs), ("delete", args, kwargs))
+
+    def replace(self, *args, **kwargs):
+        return self._do(lambda: self.txn.replace(*args, **kwargs), ("replace", args, kwargs))
+
+    def pop(self, *args, **kwargs):
+        return self._do(lambda: self.txn.pop(*args, **kwargs), ("pop", args, kwargs))
+
+    def putmulti(self, items, *args, **kwargs):
+        """`lmdb.Cursor.putmulti` on a fresh cursor of this transaction.
+
+        :param items: (type `list`) Of `(key, value)` pairs.
+        :return: (type `tuple`) The number of pairs consumed and the number added.
+        """
+
+        items = list(items)
+        return self._do(
+            lambda: self.txn.cursor().putmulti(items, *args, **kwargs), ("putmulti", (items,) + args, kwargs)
+        )
+
+    def cursor(self):
+        return _ReadOnlyCursor(self.txn.cursor())
+
+    def __getattr__(self, name):
+        # reads (`get`, `id`, `stat`, ...) go straight to the current transaction
+        return getattr(self.txn, name)
+
+class _ReadOnlyCursor:
+    """A cursor of a `GrowingWriter`, which raises on writes because the writer could not replay them."""
+
+    _WRITES = ("put", "putmulti", "delete", "replace", "pop")
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+
+        if name in _ReadOnlyCursor._WRITES:
+            raise TypeError(
+                f"Cannot `{name}` through a cursor of a `GrowingWriter`, because the write would be lost if the map "
+                f"grows. Write through the `GrowingWriter` itself."
+            )
+
+        return getattr(self._cursor, name)
+
 class ReversibleWriter:
 
-    def __init__(self, db):
+    def __init__(self, db, grow = None):
 
 
         self.db = db
+        self.grow = grow
         self.txn = None
         self.committed = False
         self.undo = {}
@@ -35,7 +174,13 @@ class ReversibleWriter:
     @contextmanager
     def begin(self):
 
-        with self.db.begin(write = True) as rw_txn:
+        if self.grow is None:
+            cm = self.db.begin(write = True)
+
+        else:
+            cm = GrowingWriter(self.db, self.grow).begin()
+
+        with cm as rw_txn:
 
             self.txn = rw_txn
             yield self
@@ -1,12 +1,39 @@
 import multiprocessing
+import multiprocessing.connection
+import os
 import shutil
+import sys
 from datetime import timedelta
 import time
 from contextlib import contextmanager
+from multiprocessing import shared_memory, resource_tracker
 
 class ReceivedSigterm(RuntimeError):pass
 
-def start_with_timeout(procs, timeout, query_wait = 1.0):
+def resource_tracker_id():
+    """Identifies the resource tracker of this process, which the processes that it starts share."""
+    return os.fstat(resource_tracker.getfd()).st_ino
+
+def attach_shared_memory(name, creator_tracker_id = None):
+    """Attach to the shared memory segment `name`, which was created by another process. If `creator_tracker_id` is
+    passed (see `resource_tracker_id`), then the segment is left registered with a resource tracker shared with the
+    creator, which had registered it already."""
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track = False)
+
+    shm = shared_memory.SharedMemory(name)
+
+    if creator_tracker_id is None or creator_tracker_id != resource_tracker_id():
+        # the segment belongs to its creator; left registered, the resource tracker of this process would unlink it
+        # when this process exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    return shm
+
+def start_with_timeout(procs, timeout, query_wait = None):
+    """Start `procs` and wait for all of them to exit, waking only when a process exits. `query_wait` is ignored and
+    kept for backwards compatibility."""
 
     if timeout <= 0:
         raise ValueError
@@ -18,10 +45,12 @@ def start_with_timeout(procs, timeout, query_wait = 1.0):
 
     while time.time() - start <= timeout:
 
-        if all(not proc.is_alive() for proc in procs):
+        alive = [proc.sentinel for proc in procs if proc.is_alive()]
+
+        if len(alive) == 0:
             return True
 
-        time.sleep(query_wait)
+        multiprocessing.connection.wait(alive, max(0.0, timeout + start - time.time()))
 
     for p in procs:
         p.terminate()
@@ -13,14 +13,17 @@
     GNU General Public License for more details.
 """
 
+import os
 import warnings
 from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
 
 import numpy as np
 
 from .errors import BlockNotOpenError
 from .info import ApriInfo
 from ._utilities import check_has_method, justify_slice, is_int, check_type, check_return_int
+from ._utilities.multiprocessing import attach_shared_memory, resource_tracker_id
 
 class Block:
 
@@ -183,7 +186,19 @@ class Block:
         self._check_entered_raise("__setitem__")
 
         if isinstance(key, slice):
-            raise NotImplementedError("Support for slices coming soon.")
+
+            key = justify_slice(key, self.startn, self.startn + len(self) - 1)
+
+            if issubclass(self.segment_type, np.ndarray):
+                self._segment[key, ...] = value
+
+            elif check_has_method(self._segment, "__setitem__"):
+                self._segment[key] = value
+
+            else:
+                raise NotImplementedError
+
+            return
 
         key = check_return_int(key, "key")
 
@@ -277,6 +292,92 @@ class Block:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._num_entered -= 1
 
+class SharedBlock(Block):
+    """A `Block` whose segment is a NumPy array in shared memory. If a `SharedBlock` is added to a `Register` with
+    `add_ram_blk` before `parallelize` is called, then every process sees the same segment, without copying it: `target`
+    can read and write it through the `Register`, for example with `Register.get`, `Register.set`, or `blk[start :
+    stop] = values` on the `Block` returned by `Register.blk`. Writes to disjoint index ranges need no
+    synchronization. Usage :
+
+        with SharedBlock.zeros(10 ** 6, np.float64, apri) as blk:
+
+            with reg.open():
+                reg.add_ram_blk(blk)
+
+            parallelize(num_procs, target, (reg,))
+
+            with reg.open():
+                reg.flush_ram_blk(blk)
+
+    The creating process releases the shared memory when its outermost `with` block exits. Other processes, including
+    forked children, never release it.
+    """
+
+    def __init__(self, segment, apri, startn = 0):
+
+        check_type(segment, "segment", np.ndarray)
+        self._init_shared(
+            shared_memory.SharedMemory(create = True, size = max(1, segment.nbytes)), segment.shape, segment.dtype,
+            os.getpid(), resource_tracker_id(), apri, startn
+        )
+        self._segment[...] = segment
+
+    @classmethod
+    def zeros(cls, shape, dtype, apri, startn = 0):
+        """Allocate a `SharedBlock` of zeros, without allocating a private copy first."""
+
+        shape = (check_return_int(shape, "shape"),) if not isinstance(shape, tuple) else shape
+        dtype = np.dtype(dtype)
+        blk = cls.__new__(cls)
+        blk._init_shared(
+            shared_memory.SharedMemory(create = True, size = max(1, int(np.prod(shape)) * dtype.itemsize)), shape,
+            dtype, os.getpid(), resource_tracker_id(), apri, startn
+        )
+        return blk
+
+    def _init_shared(self, shm, shape, dtype, owner_pid, tracker_id, apri, startn):
+
+        self._shm = shm
+        self._owner_pid = owner_pid # a forked child inherits this, but is not the owner
+        self._tracker_id = tracker_id # see `resource_tracker_id`
+        super().__init__(np.ndarray(shape, dtype, shm.buf), apri, startn)
+
+    def __getstate__(self):
+        return {
+            "name" : self._shm.name,
+            "shape" : self._segment.shape,
+            "dtype" : self._segment.dtype,
+            "apri" : self._apri.to_json(),
+            "startn" : self._startn,
+            "tracker_id" : self._tracker_id
+        }
+
+    def __setstate__(self, state):
+        self._init_shared(
+            attach_shared_memory(state["name"], state["tracker_id"]), state["shape"], state["dtype"], None,
+            state["tracker_id"], ApriInfo.from_json(state["apri"]), state["startn"]
+        )
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+        if self._owner_pid == os.getpid() and self._num_entered == 0:
+            self._unlink()
+
+    def _unlink(self):
+
+        self._segment = None
+        self._owner_pid = None
+
+        try:
+            self._shm.close()
+
+        except BufferError: # the segment is still referenced elsewhere; it is unmapped when that reference is deleted
+            pass
+
+        self._shm.unlink()
+
 class ReleaseBlock(Block, ABC):
 
     @abstractmethod
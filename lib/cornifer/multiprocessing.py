@@ -1,29 +1,628 @@
 import asyncio
 import inspect
 import multiprocessing
+import multiprocessing.connection
+import os
 import time
+from multiprocessing import shared_memory
+import traceback
 import warnings
-from contextlib import ExitStack
+from collections import deque
+from contextlib import ExitStack, contextmanager
 
-from ._utilities.multiprocessing import make_sigterm_raise_ReceivedSigterm, process_wrapper, ReceivedSigterm
+import lmdb
+import numpy as np
+
+from ._utilities.multiprocessing import make_sigterm_raise_ReceivedSigterm, process_wrapper, ReceivedSigterm, \
+    attach_shared_memory, resource_tracker_id
 from ._utilities import check_return_int, check_type, check_return_Path_None_default, check_return_int_None_default, \
     resolve_path
 from .debug import log
-from .registers import Register
-from .errors import RegisterOpenError
+from .registers import Register, _COMMIT_BATCH_SIZE_DEFAULT
+from .errors import RegisterOpenError, RegisterError
+
+_START_METHODS = ("spawn", "fork", "forkserver")
+_READER_CHECK_PERIOD = 30 # seconds
+_FORKSERVER_PRELOAD = ["cornifer", "numpy"]
+_inherited_dbs = [] # see `_forget_inherited_dbs`
+
+class SharedArray:
+    """A read-only NumPy array in shared memory, for passing a large input to `parallelize` or `WorkerPool` without
+    pickling a copy for every process. Usage :
+
+        with SharedArray(arr) as shared:
+            parallelize(num_procs, target, (shared, reg))
+
+    Inside each process, `target` receives the `SharedArray` as a read-only `numpy.ndarray` view of the shared memory.
+    The shared memory is released when the `with` block exits in the creating process; other processes, including
+    forked children, never release it.
+    """
+
+    def __init__(self, array):
+
+        check_type(array, "array", np.ndarray)
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self._shm = shared_memory.SharedMemory(create = True, size = max(1, array.nbytes))
+        self.name = self._shm.name
+        self._owner_pid = os.getpid() # a forked child inherits this, but is not the owner
+        self._tracker_id = resource_tracker_id()
+        np.ndarray(self.shape, self.dtype, self._shm.buf)[...] = array
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unlink()
+
+    def unlink(self):
+
+        if self._owner_pid == os.getpid() and self._shm is not None:
+
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __getstate__(self):
+        return {"name" : self.name, "shape" : self.shape, "dtype" : self.dtype, "_tracker_id" : self._tracker_id}
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        self._shm = None
+        self._owner_pid = None
+
+    @contextmanager
+    def attach(self):
+
+        if self._shm is not None: # created by or inherited from this process
+            shm = self._shm
+
+        else:
+            shm = attach_shared_memory(self.name, self._tracker_id)
+
+        array = np.ndarray(self.shape, self.dtype, shm.buf)
+        array.flags.writeable = False
+
+        try:
+            yield array
+
+        finally:
+
+            del array
+
+            if shm is not self._shm:
+
+                try:
+                    shm.close()
+
+                except BufferError: # `target` kept a view of the array
+                    pass
+
+def _attach_shared_args(args, stack):
+    return tuple(stack.enter_context(arg.attach()) if isinstance(arg, SharedArray) else arg for arg in args)
+
+def _forget_inherited_dbs():
+    """A forked process inherits the LMDB environments of the registers that its parent has open. These must never
+    be used in the child, and they must not be closed either, since closing an environment clears the reader slots of
+    the parent. We therefore keep a reference to them until the child exits and mark their registers as closed."""
+
+    for reg in Register._instances.values():
+
+        if reg._db is not None:
+
+            _inherited_dbs.append(reg._db)
+            reg._db = None
+            reg._opened = False
+
+def _get_mp_ctx(start_method):
+
+    check_type(start_method, "start_method", str)
+
+    if start_method not in _START_METHODS:
+        raise ValueError(f"`start_method` must be one of {_START_METHODS}.")
+
+    mp_ctx = multiprocessing.get_context(start_method)
+
+    if start_method == "forkserver":
+        mp_ctx.set_forkserver_preload(_FORKSERVER_PRELOAD)
+
+    return mp_ctx
+
+def _serve_commits(reg, authkey, conn, num_alive_procs, hard_reset_conditions):
+
+    _forget_inherited_dbs()
+
+    with make_sigterm_raise_ReceivedSigterm():
+
+        with process_wrapper(num_alive_procs, [], hard_reset_conditions):
+
+            reg._commit_address = None # this process commits directly
+
+            with reg.open() as reg:
+
+                with multiprocessing.connection.Listener(authkey = authkey) as listener:
+
+                    conn.send(listener.address)
+                    reg._serve_commits(listener, conn, _COMMIT_BATCH_SIZE_DEFAULT)
+
+@contextmanager
+def _commit_services(mp_ctx, regs, num_alive_procs, hard_reset_conditions):
+    """Start one commit service process per `Register` in `regs`. While the context is active, `add_disk_blk` in any
+    process that unpickles one of `regs` writes the data file itself and sends the metadata to the service, which
+    commits it in batches. On exit, the services commit what they have received and stop."""
+
+    services = []
+
+    try:
+
+        for reg in regs:
+
+            authkey = os.urandom(32)
+            conn, child_conn = mp_ctx.Pipe()
+            proc = mp_ctx.Process(
+                target = _serve_commits, args = (reg, authkey, child_conn, num_alive_procs, hard_reset_conditions)
+            )
+            proc.start()
+            child_conn.close()
+            services.append((reg, proc, conn))
+
+            try:
+                reg._commit_address = conn.recv()
+
+            except EOFError:
+                raise RegisterError(f"The commit service of `{reg.shorthand()}` failed to start.") from None
+
+            reg._commit_authkey = authkey
+
+        yield
+
+    finally:
+
+        for _, _, conn in services:
+
+            try:
+                conn.send(None)
+
+            except OSError:
+                pass
+
+        for reg, proc, conn in services:
+
+            proc.join()
+            conn.close()
+            reg._commit_address = None
+            reg._commit_authkey = None
 
 def _wrap_target(target, num_procs, proc_index, args, num_alive_procs, hard_reset_conditions):
 
+    _forget_inherited_dbs()
+
     with make_sigterm_raise_ReceivedSigterm():
 
         with process_wrapper(num_alive_procs, [], hard_reset_conditions):
-            target(num_procs, proc_index, *args)
 
+            with ExitStack() as stack:
+                target(num_procs, proc_index, *_attach_shared_args(args, stack))
+
+
+class _RegArg:
+    """Stands in for a `Register` in the `args` of a task sent to a worker, since the shared synchronization
+    primitives of a `Register` can only be pickled when a process is spawned."""
+
+    def __init__(self, index):
+        self.index = index
+
+def _wrap_worker(conn, regs, open_regs, readonly, num_alive_procs, hard_reset_conditions):
+
+    _forget_inherited_dbs()
+
+    with make_sigterm_raise_ReceivedSigterm():
+
+        with process_wrapper(num_alive_procs, [], hard_reset_conditions):
+
+            with ExitStack() as stack:
+
+                try:
+
+                    if open_regs:
+                        regs = tuple(stack.enter_context(reg.open(readonly)) for reg in regs)
+
+                except Exception:
+
+                    conn.send((None, False, traceback.format_exc())) # failed to start
+                    raise
+
+                conn.send(None) # ready for the first task
+
+                while True:
+
+                    task = conn.recv()
+
+                    if task is None:
+                        break
+
+                    task_index, target, leading_args, args, send_result = task
+                    args = tuple(regs[arg.index] if isinstance(arg, _RegArg) else arg for arg in args)
+                    start = time.time()
+
+                    try:
+
+                        with ExitStack() as task_stack:
+                            result = target(*leading_args, *_attach_shared_args(args, task_stack))
+
+                        if open_regs:
+
+                            for reg in regs:
+                                reg.flush_commits()
+
+                    except Exception:
+                        conn.send((task_index, False, traceback.format_exc()))
+
+                    else:
+
+                        try:
+                            conn.send((task_index, True, (time.time() - start, result if send_result else None)))
+
+                        except Exception: # e.g. `result` does not pickle, which is an error of the task, not a crash
+                            conn.send((task_index, False, traceback.format_exc()))
+
+class _WorkQueue:
+    """Keeps `num_procs` worker processes alive and hands out the tasks of a job one at a time, as each worker finishes
+    its previous task. The task of a worker that dies is re-queued and the worker is replaced. Every `Register` in the
+    `args` of a job must be an element of `regs`. If `open_regs` is `True`, then each worker opens `regs` once, when it
+    starts. If a job is submitted with `on_result`, then the return value of each finished task is pickled back and
+    passed to `on_result(task_index, result)` from `poll`. A worker that dies before it is ready for its first task
+    holds no task, so such deaths are counted separately, and `poll` raises once more than `max_retries` happen in a
+    row."""
+
+    def __init__(self, mp_ctx, num_procs, regs, open_regs, readonly, num_alive_procs, hard_reset_conditions):
+
+        self._mp_ctx = mp_ctx
+        self._num_procs = num_procs
+        self._regs = regs
+        self._open_regs = open_regs
+        self._readonly = readonly
+        self._num_alive_procs = num_alive_procs
+        self._hard_reset_conditions = hard_reset_conditions
+        self._workers = [] # tuples `(proc, conn)`
+        self._idle = set() # `proc`s waiting for a task
+        self._started = set() # `proc`s that were ready for their first task
+        self._num_startup_failures = 0 # consecutive workers that died before they were ready
+        self._startup_error = None
+        self._startup_exitcode = None
+        self._max_retries = 0
+        self._assigned = {} # maps `proc` to the index of its current task
+        self._tasks = []
+        self._queue = deque()
+        self._on_result = None
+        self._num_deaths = []
+        self._num_finished = 0
+        self.num_dead_workers = 0
+        self.timings = {}
+        self.errors = {}
+
+    @property
+    def procs(self):
+        return [proc for proc, _ in self._workers]
+
+    def _spawn(self):
+
+        conn, child_conn = self._mp_ctx.Pipe()
+        proc = self._mp_ctx.Process(
+            target = _wrap_worker,
+            args = (
+                child_conn, self._regs, self._open_regs, self._readonly, self._num_alive_procs,
+                self._hard_reset_conditions
+            )
+        )
+        proc.start()
+        child_conn.close()
+        self._workers.append((proc, conn))
+
+    def fill(self):
+
+        while len(self._workers) < self._num_procs:
+            self._spawn()
+
+    def submit(self, target, args, leading_args, max_retries, on_result = None):
+        """Start a job consisting of the tasks `target(*leading_args[i], *args)`."""
+
+        self._target = target
+        self._on_result = on_result
+        self._args = tuple(self._reg_arg(arg) if isinstance(arg, Register) else arg for arg in args)
+        self._tasks = leading_args
+        self._max_retries = max_retries
+        self._num_startup_failures = 0
+        self._queue = deque(range(len(leading_args)))
+        self._num_deaths = [0] * len(leading_args)
+        self._num_finished = 0
+        self.timings = {}
+        self.errors = {}
+        self.fill()
+        self._dispatch()
+
+    def done(self):
+        return self._num_finished == len(self._tasks)
+
+    def _reg_arg(self, reg):
+
+        for index, reg_ in enumerate(self._regs):
+
+            if reg_ is reg:
+                return _RegArg(index)
+
+        raise ValueError(f"Register `{reg.shorthand()}` is not one of the registers of this pool of workers.")
+
+    def _dispatch(self):
+
+        for proc, conn in self._workers:
+
+            if len(self._queue) == 0:
+                break
+
+            if proc in self._idle:
+
+                task_index = self._queue.popleft()
+                self._idle.discard(proc)
+                self._assigned[proc] = task_index
+                conn.send((task_index, self._target, self._tasks[task_index], self._args, self._on_result is not None))
+
+    def poll(self, timeout):
+        """Wait up to `timeout` seconds for workers to finish tasks or die, then hand out tasks and replace dead
+        workers."""
+
+        multiprocessing.connection.wait(
+            [conn for _, conn in self._workers] + [proc.sentinel for proc, _ in self._workers], timeout
+        )
+
+        for proc, conn in self._workers:
+
+            while True:
+
+                try:
+
+                    if not conn.poll():
+                        break
+
+                    msg = conn.recv()
+
+                except (EOFError, OSError):
+                    break
+
+                if msg is not None and msg[0] is None: # the worker failed to start and is exiting
+
+                    self._startup_error = msg[2]
+                    continue
+
+                elif msg is None:
+
+                    self._started.add(proc)
+                    self._num_startup_failures = 0
+                    self._startup_error = None
+
+                else:
+
+                    task_index, success, payload = msg
+                    del self._assigned[proc]
+                    self._num_finished += 1
+
+                    if success:
+
+                        self.timings[task_index], result = payload
+
+                        if self._on_result is not None:
+                            self._on_result(task_index, result)
+
+                    else:
+
+                        self.errors[task_index] = payload
+                        log(f'Task {task_index} raised:\n{payload}')
+
+                self._idle.add(proc)
+
+        alive = []
+
+        for proc, conn in self._workers:
+
+            if proc.is_alive():
+                alive.append((proc, conn))
+
+            else:
+
+                proc.join()
+                conn.close()
+                self.num_dead_workers += 1
+                self._idle.discard(proc)
+                task_index = self._assigned.pop(proc, None)
+
+                if proc not in self._started:
+
+                    self._num_startup_failures += 1
+                    self._startup_exitcode = proc.exitcode
+                    log(f'Worker died (exit code {proc.exitcode}) before it was ready.')
+
+                self._started.discard(proc)
+
+                if task_index is not None:
+
+                    self._num_deaths[task_index] += 1
+                    log(f'Worker died (exit code {proc.exitcode}) while processing task {task_index}.')
+
+                    if self._num_deaths[task_index] > self._max_retries:
+
+                        self.errors[task_index] = f"The worker died (exit code {proc.exitcode})."
+                        self._num_finished += 1
+
+                    else:
+                        self._queue.appendleft(task_index)
+
+        self._workers = alive
+
+        if self._num_startup_failures > self._max_retries:
+
+            error = self._startup_error or f"The worker exited with code {self._startup_exitcode}.\n"
+            raise RuntimeError(
+                f"{self._num_startup_failures} worker processes in a row died before they were ready for a task. "
+                f"The last error was :\n{error}"
+            )
+
+        if len(self._queue) > 0:
+            self.fill()
+
+        self._dispatch()
+
+    def terminate(self):
+
+        for proc, conn in self._workers:
+
+            proc.terminate()
+            proc.join()
+            conn.close()
+
+        self._workers = []
+        self._idle.clear()
+        self._started.clear()
+        self._assigned.clear()
+
+    def close(self, timeout):
+
+        for proc, conn in self._workers:
+
+            try:
+                conn.send(None)
+
+            except (BrokenPipeError, OSError):
+                pass
+
+        start = time.time()
+
+        for proc, _ in self._workers:
+            proc.join(max(0.0, timeout - (time.time() - start)))
+
+        self.terminate()
+
+def _check_target_raise(target, args, items):
+
+    num_params = len(inspect.signature(target).parameters)
+    num_leading_params = 2 if items is None else 1
+
+    if items is not None and num_params < 1:
+        raise ValueError("`target` function must have at least one parameter, namely the work item.")
+
+    elif items is None and num_params < 2:
+        raise ValueError(
+            "`target` function must have at least two parameters. The first must be `num_procs` (the number of "
+            "processes, a positive int) and the second must be `proc_index` (the process index, and int between 0 and "
+            "`num_procs-1`, inclusive)."
+        )
+
+    has_variable_num_args = any(
+        param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+        for param in inspect.signature(target).parameters.values()
+    )
+
+    if not has_variable_num_args and num_leading_params + len(args) > num_params:
+        raise ValueError(
+            f"`target` function takes at most {num_params} parameters, but `args` parameter has length {len(args)} "
+            + (
+                f"(plus 2 for `num_procs` and `proc_index`)." if items is None else
+                f"(plus 1 for the work item)."
+            )
+        )
+
+def _check_items_raise(items, max_retries):
+
+    if items is not None:
+
+        if not isinstance(items, (list, range)):
+            raise TypeError("`items` must be of type `list` or `range`.")
+
+        max_retries = check_return_int(max_retries, "max_retries")
+
+        if max_retries < 0:
+            raise ValueError("`max_retries` must be non-negative.")
+
+    return max_retries
+
+def _wait_for_exit(procs, timeout):
+    """Wait until some process of `procs` exits or `timeout` seconds pass. Returns immediately if no process of `procs`
+    is alive, since `multiprocessing.connection.wait` of no objects sleeps for the full `timeout`."""
+
+    sentinels = [proc.sentinel for proc in procs if proc.is_alive()]
+
+    if len(sentinels) > 0:
+        multiprocessing.connection.wait(sentinels, timeout)
+
+def _time_to_next_event(start, timeout, last_update_end, update_period, last_reader_check):
+    """Seconds until either `timeout` expires, the next permanent database update is due, or the next stale reader
+    check is due."""
+
+    deadline = min(start + timeout, last_reader_check + _READER_CHECK_PERIOD)
+
+    if update_period is not None:
+        deadline = min(deadline, last_update_end + update_period)
+
+    return max(0.0, deadline - time.time())
+
+def _reap_stale_readers(regs):
+    """Free the LMDB reader slots held by dead processes, so that `Register._txn` rarely needs a hard reset."""
+
+    for reg in regs:
+
+        try:
+            num_reaped = reg._reap_stale_readers()
+
+        except lmdb.Error as e:
+            log(f'Could not check the readers of `{reg.shorthand()}` : {e}')
+
+        else:
+
+            if num_reaped > 0:
+                log(f'Freed {num_reaped} stale reader slot(s) of `{reg.shorthand()}`.')
+
+def _raise_work_queue_errors(work_queue, name):
+
+    if len(work_queue.errors) > 0:
+
+        index = min(work_queue.errors.keys())
+        raise RuntimeError(
+            f"`target` failed on the {name} with the following indices : {sorted(work_queue.errors.keys())}. "
+            f"The error for index {index} was :\n{work_queue.errors[index]}"
+        )
 
 def parallelize(
     num_procs, target, args = (), timeout = 600, tmp_dir = None, update_period = None, update_timeout = 60,
-    sec_per_block_upper_bound = 60
+    sec_per_block_upper_bound = 60, items = None, max_retries = 2, start_method = "spawn", commit_service = False,
+    on_result = None
 ):
+    """Run `target` in `num_procs` processes.
+
+    By default, each process calls `target(num_procs, proc_index, *args)` and is responsible for partitioning the work
+    itself. If `items` is passed, then work items are instead handed out on demand: each process calls
+    `target(item, *args)` for the next unprocessed element of `items` as soon as it finishes the previous one. If a
+    process dies, then its current item is given to a replacement process, up to `max_retries` times per item.
+
+    Pass large read-only NumPy arrays wrapped in a `SharedArray` to avoid pickling them into every process. Registers
+    in `args` must not be open during the call; each process opens its own, so LMDB handles are never inherited
+    across a fork.
+
+    :param items: (type `list` or `range`, optional)
+    :param max_retries: (type `int`, default 2) Non-negative.
+    :param start_method: (type `str`, default "spawn") One of "spawn", "fork", or "forkserver". The fork server
+    preloads `cornifer` and `numpy`.
+    :param commit_service: (type `bool`, default `False`) If `True`, then one extra process per `Register` in `args`
+    commits the metadata of every disk `Block` that `target` adds with `add_disk_blk`, in batches, so that the
+    processes do not contend for the LMDB write lock. `add_disk_blk` then writes the data file and returns without
+    waiting; duplicate `Block`s are reported, and their files deleted, when the `Register` is closed (see
+    `Register.flush_commits`).
+    :param on_result: (type function, optional) Only if `items` is passed. Called in the calling process as
+    `on_result(index, result)` as soon as `target` returns `result` for the item `items[index]`, so the results of
+    finished items are kept even if the call is later interrupted. `result` must be picklable.
+    :raises RuntimeError: If `items` is passed and `target` raised (or killed its process too often) for some item.
+    :return: (type `dict`) If `items` is passed, maps the index of each finished item to the number of seconds that
+    `target` took on it. Items not finished before `timeout` are omitted.
+    """
 
     with make_sigterm_raise_ReceivedSigterm():
 
@@ -35,32 +634,21 @@ def parallelize(
 
         check_type(args, "args", tuple)
         timeout = check_return_int(timeout, "timeout")
+        check_type(commit_service, "commit_service", bool)
         check_return_Path_None_default(tmp_dir, "tmp_dir", None)
+
+        if on_result is not None and (items is None or not callable(on_result)):
+            raise ValueError("`on_result` must be a function, and may only be passed with `items`.")
+
         update_period = check_return_int_None_default(update_period, "update_period", None)
         update_timeout = check_return_int(update_timeout, "update_timeout")
 
         if num_procs <= 0:
             raise ValueError("`num_procs` must be positive.")
 
-        num_params = len(inspect.signature(target).parameters)
-
-        if num_params < 2:
-            raise ValueError(
-                "`target` function must have at least two parameters. The first must be `num_procs` (the number of "
-                "processes, a positive int) and the second must be `proc_index` (the process index, and int between 0 and "
-                "`num_procs-1`, inclusive)."
-            )
-
-        has_variable_num_args = any(
-            param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
-            for param in inspect.signature(target).parameters.values()
-        )
-
-        if not has_variable_num_args and 2 + len(args) > num_params:
-            raise ValueError(
-                f"`target` function takes at most {num_params} parameters, but `args` parameter has length {len(args)} "
-                f"(plus 2 for `num_procs` and `proc_index`)."
-            )
+        max_retries = _check_items_raise(items, max_retries)
+        _check_target_raise(target, args, items)
+        mp_ctx = _get_mp_ctx(start_method)
 
         if timeout <= 0:
             raise ValueError("`timeout` must be positive.")
@@ -77,7 +665,7 @@ def parallelize(
             if reg._opened:
                 raise RegisterOpenError(f"Register `{reg.shorthand()}` cannot be open during a call to `parallelize`.")
 
-        if tmp_dir is None and update_period is None:
+        if tmp_dir is None and update_period is not None:
             warnings.warn(
                 'You passed `update_period` to `parallelize, but did not pass `tmp_dir`.'
             )
@@ -93,14 +681,13 @@ def parallelize(
             for reg_ in regs:
                 await reg_._update_perm_db(update_timeout)
 
-        mp_ctx = multiprocessing.get_context("spawn")
         num_alive_procs = mp_ctx.Value('i', 0)
         procs = []
 
         for reg in regs:
 
             if tmp_dir is not None:
-                reg._create_update_perm_db_shared_data(mp_ctx, update_timeout)
+                reg._enable_update_perm_db()
 
             reg._create_hard_reset_shared_data(mp_ctx, num_alive_procs, 2 * sec_per_block_upper_bound)
 
@@ -111,21 +698,42 @@ def parallelize(
                 for reg in regs:
                     stack.enter_context(reg.tmp_db(tmp_dir, update_timeout))
 
-            for proc_index in range(num_procs):
-                procs.append(mp_ctx.Process(
-                    target = _wrap_target,
-                    args = (target, num_procs, proc_index, args, num_alive_procs, [reg._hard_reset_condition for reg in regs])
-                ))
+            hard_reset_conditions = [reg._hard_reset_condition for reg in regs]
+
+            if commit_service:
+                stack.enter_context(_commit_services(mp_ctx, regs, num_alive_procs, hard_reset_conditions))
+
+            if items is None:
+
+                work_queue = None
+
+                for proc_index in range(num_procs):
+                    procs.append(mp_ctx.Process(
+                        target = _wrap_target,
+                        args = (target, num_procs, proc_index, args, num_alive_procs, hard_reset_conditions)
+                    ))
 
-            for proc in procs:
-                proc.start()
+                for proc in procs:
+                    proc.start()
+
+            else:
+
+                work_queue = _WorkQueue(
+                    mp_ctx, min(num_procs, len(items)), regs, False, False, num_alive_procs, hard_reset_conditions
+                )
+                work_queue.submit(target, args, [(item,) for item in items], max_retries, on_result)
 
             try:
 
                 last_update_end = time.time()
+                last_reader_check = time.time()
+                num_dead_checked = 0
 
                 while True: # timeout loop
 
+                    if work_queue is not None:
+                        procs = work_queue.procs
+
                     if time.time() - start >= timeout:
 
                         log(f'Terminating procs due to timeout.')
@@ -136,7 +744,12 @@ def parallelize(
                         log(f'Procs terminated.')
                         break # timeout loop
 
-                    elif all(not proc.is_alive() for proc in procs):
+                    elif work_queue is None and all(not proc.is_alive() for proc in procs):
+                        break # timeout loop
+
+                    elif work_queue is not None and work_queue.done():
+
+                        work_queue.close(timeout - (time.time() - start))
                         break # timeout loop
 
                     elif update_period is not None and tmp_dir is not None and time.time() - last_update_end >= update_period:
@@ -144,11 +757,35 @@ def parallelize(
                         asyncio.run(update_all_perm_dbs())
                         last_update_end = time.time()
 
-                    time.sleep(1)
+                    if work_queue is None:
+                        num_dead = sum(not proc.is_alive() for proc in procs)
+
+                    else:
+                        num_dead = work_queue.num_dead_workers
+
+                    if num_dead != num_dead_checked or time.time() - last_reader_check >= _READER_CHECK_PERIOD:
+
+                        _reap_stale_readers(regs)
+                        last_reader_check = time.time()
+                        num_dead_checked = num_dead
+
+                    wait_time = _time_to_next_event(
+                        start, timeout, last_update_end, update_period if tmp_dir is not None else None,
+                        last_reader_check
+                    )
+
+                    if work_queue is None:
+                        _wait_for_exit(procs, wait_time)
+
+                    else:
+                        work_queue.poll(wait_time)
+
+            except BaseException as e:
 
-            except ReceivedSigterm:
+                log(f'Terminating procs due to {"sigterm" if isinstance(e, ReceivedSigterm) else "an error"}.')
 
-                log(f'Terminating procs due to sigterm.')
+                if work_queue is not None:
+                    procs = work_queue.procs
 
                 for p in procs:
                     p.terminate()
@@ -160,4 +797,217 @@ def parallelize(
             else:
 
                 for proc in procs:
-                    proc.join()
\ No newline at end of file
+                    proc.join()
+
+        if work_queue is not None:
+
+            _raise_work_queue_errors(work_queue, "items")
+            return work_queue.timings
+
+class WorkerPool:
+    """Worker processes that stay alive across several `parallelize`-style jobs, so that the cost of spawning processes
+    and opening registers is paid once rather than once per job.
+
+    Usage :
+
+        with WorkerPool(8, (reg,), tmp_dir) as pool:
+
+            pool.parallelize(f, (reg,), items = range(1000))
+            pool.parallelize(g, (reg,))
+
+    Each worker opens every `Register` in `regs` when it starts and keeps it open until the pool is closed. Any of
+    those registers that appear in the `args` of a job refer, inside the worker, to the already-opened instance, so
+    `target` must NOT open them itself. The pool's registers must not be open in the calling process. If `tmp_dir` is
+    passed, then the permanent databases are updated at the end of every job and when the pool is closed.
+    `start_method` and `commit_service` are as for `parallelize`; with the commit service, the commits of each task
+    are acknowledged before the task counts as finished.
+    """
+
+    def __init__(
+        self, num_procs, regs = (), tmp_dir = None, update_timeout = 60, sec_per_block_upper_bound = 60,
+        readonly = False, start_method = "spawn", commit_service = False
+    ):
+
+        num_procs = check_return_int(num_procs, "num_procs")
+        check_type(regs, "regs", tuple)
+        tmp_dir = check_return_Path_None_default(tmp_dir, "tmp_dir", None)
+        update_timeout = check_return_int(update_timeout, "update_timeout")
+        sec_per_block_upper_bound = check_return_int(sec_per_block_upper_bound, "sec_per_block_upper_bound")
+        check_type(readonly, "readonly", bool)
+        check_type(commit_service, "commit_service", bool)
+
+        if num_procs <= 0:
+            raise ValueError("`num_procs` must be positive.")
+
+        if update_timeout <= 0:
+            raise ValueError("`update_timeout` must be positive.")
+
+        for reg in regs:
+            check_type(reg, "reg", Register)
+
+        if readonly and commit_service:
+            raise ValueError("`commit_service` cannot be `True` if `readonly` is `True`.")
+
+        self.num_procs = num_procs
+        self._regs = regs
+        self._tmp_dir = None if tmp_dir is None else resolve_path(tmp_dir)
+        self._update_timeout = update_timeout
+        self._sec_per_block_upper_bound = sec_per_block_upper_bound
+        self._readonly = readonly
+        self._mp_ctx = _get_mp_ctx(start_method)
+        self._commit_service = commit_service
+        self._stack = None
+        self._work_queue = None
+
+    def __enter__(self):
+
+        if self._stack is not None:
+            raise ValueError("This `WorkerPool` is already running.")
+
+        for reg in self._regs:
+
+            if reg._opened:
+                raise RegisterOpenError(f"Register `{reg.shorthand()}` cannot be open during the life of a `WorkerPool`.")
+
+        mp_ctx = self._mp_ctx
+        num_alive_procs = mp_ctx.Value('i', 0)
+
+        for reg in self._regs:
+
+            if self._tmp_dir is not None:
+                reg._enable_update_perm_db()
+
+            reg._create_hard_reset_shared_data(mp_ctx, num_alive_procs, 2 * self._sec_per_block_upper_bound)
+
+        stack = ExitStack()
+
+        try:
+
+            stack.enter_context(make_sigterm_raise_ReceivedSigterm())
+
+            if self._tmp_dir is not None:
+
+                for reg in self._regs:
+                    stack.enter_context(reg.tmp_db(self._tmp_dir, self._update_timeout))
+
+            hard_reset_conditions = [reg._hard_reset_condition for reg in self._regs]
+
+            if self._commit_service:
+                stack.enter_context(_commit_services(mp_ctx, self._regs, num_alive_procs, hard_reset_conditions))
+
+            self._work_queue = _WorkQueue(
+                mp_ctx, self.num_procs, self._regs, True, self._readonly, num_alive_procs, hard_reset_conditions
+            )
+            stack.callback(self._work_queue.close, self._update_timeout)
+            self._work_queue.fill()
+
+        except BaseException:
+
+            stack.close()
+            raise
+
+        self._stack = stack
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+
+        if exc_type is not None:
+            self._work_queue.terminate()
+
+        try:
+            self._stack.close()
+
+        finally:
+
+            self._stack = None
+            self._work_queue = None
+
+    def _update_all_perm_dbs(self):
+
+        async def update_all_perm_dbs():
+
+            for reg in self._regs:
+                await reg._update_perm_db(self._update_timeout)
+
+        asyncio.run(update_all_perm_dbs())
+
+    def parallelize(self, target, args = (), timeout = 600, update_period = None, items = None, max_retries = 2):
+        """Run one job on the pool's workers. The parameters and return value are the same as those of the function
+        `parallelize`, except that `num_procs` is the pool's."""
+
+        if self._stack is None:
+            raise ValueError("`WorkerPool.parallelize` can only be called inside a `with` block.")
+
+        start = time.time()
+
+        if not callable(target):
+            raise TypeError("`target` must be a function.")
+
+        check_type(args, "args", tuple)
+        timeout = check_return_int(timeout, "timeout")
+        update_period = check_return_int_None_default(update_period, "update_period", None)
+        max_retries = _check_items_raise(items, max_retries)
+        _check_target_raise(target, args, items)
+
+        if timeout <= 0:
+            raise ValueError("`timeout` must be positive.")
+
+        if update_period is not None and update_period <= 0:
+            raise ValueError("`update_period` must be positive.")
+
+        work_queue = self._work_queue
+
+        if items is None:
+            work_queue.submit(target, args, [(self.num_procs, proc_index) for proc_index in range(self.num_procs)], 0)
+
+        else:
+            work_queue.submit(target, args, [(item,) for item in items], max_retries)
+
+        try:
+
+            last_update_end = time.time()
+            last_reader_check = time.time()
+            num_dead_checked = work_queue.num_dead_workers
+
+            while not work_queue.done(): # timeout loop
+
+                if time.time() - start >= timeout:
+
+                    log(f'Terminating procs due to timeout.')
+                    work_queue.terminate()
+                    log(f'Procs terminated.')
+                    break # timeout loop
+
+                elif update_period is not None and self._tmp_dir is not None and time.time() - last_update_end >= update_period:
+
+                    self._update_all_perm_dbs()
+                    last_update_end = time.time()
+
+                if (
+                    work_queue.num_dead_workers != num_dead_checked or
+                    time.time() - last_reader_check >= _READER_CHECK_PERIOD
+                ):
+
+                    _reap_stale_readers(self._regs)
+                    last_reader_check = time.time()
+                    num_dead_checked = work_queue.num_dead_workers
+
+                work_queue.poll(_time_to_next_event(
+                    start, timeout, last_update_end, update_period if self._tmp_dir is not None else None,
+                    last_reader_check
+                ))
+
+        except BaseException as e:
+
+            log(f'Terminating procs due to {"sigterm" if isinstance(e, ReceivedSigterm) else "an error"}.')
+            work_queue.terminate()
+            log(f'Procs terminated.')
+            raise
+
+        if self._tmp_dir is not None:
+            self._update_all_perm_dbs()
+
+        _raise_work_queue_errors(work_queue, "tasks" if items is None else "items")
+
+        if items is not None:
+            return work_queue.timings
@@ -13,14 +13,20 @@
     GNU General Public License for more details.
 """
 import asyncio
+import bisect
 import itertools
 import json
+import multiprocessing
+import multiprocessing.connection
 import pickle
 import re
 import shutil
 import tempfile
+import threading
 import warnings
 import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager, ExitStack
 from pathlib import Path
 from abc import ABC, abstractmethod
@@ -28,19 +34,18 @@ import time
 
 import lmdb
 import numpy as np
-import aioshutil
 
 from .errors import DataNotFoundError, RegisterAlreadyOpenError, RegisterError, CompressionError, \
     DecompressionError, NOT_ABSOLUTE_ERROR_MESSAGE, RegisterRecoveryError, BlockNotOpenError, DataExistsError, \
     RegisterNotOpenError, RegisterOpenError
 from .info import ApriInfo, AposInfo, _InfoJsonEncoder
-from .blocks import Block, MemmapBlock
+from .blocks import Block, MemmapBlock, SharedBlock
 from .filemetadata import FileMetadata
 from ._utilities import random_unique_filename, resolve_path, BYTES_PER_MB, is_deletable, check_type, \
     check_return_int_None_default, check_return_Path, check_return_int, bytify_int, intify_bytes, intervals_overlap, \
     write_txt_file, read_txt_file, intervals_subset, combine_intervals, sort_intervals, is_int, hash_file, \
-    timeout_cm, BreakableExitStack, BreakExitStack
-from ._utilities.lmdb import r_txn_has_key, open_lmdb, ReversibleWriter, num_open_readers_accurate, \
+    fingerprint_file, timeout_cm, BreakableExitStack, BreakExitStack
+from ._utilities.lmdb import r_txn_has_key, open_lmdb, ReversibleWriter, GrowingWriter, num_open_readers_accurate, \
     r_txn_prefix_iter, r_txn_count_keys, create_lmdb
 from .regfilestructure import VERSION_FILEPATH, LOCAL_DIR_CHARS, \
     COMPRESSED_FILE_SUFFIX, MSG_FILEPATH, CLS_FILEPATH, check_reg_structure, DATABASE_FILEPATH, \
@@ -68,6 +73,12 @@ _APOS_KEY_PREFIX           = b"apos"
 _COMPRESSED_KEY_PREFIX     = b"compr"
 _LENGTH_LENGTH_KEY         = b"lenlen"
 _MAX_APRI_LEN_KEY          = b'max_apri_len'
+_STATS_KEY_PREFIX          = b"stats"
+_MONOTONE_KEY_PREFIX       = b"mono"
+_INVERSE_KEY_PREFIX        = b"inv"
+_HAS_INVERSE_KEY_PREFIX    = b"hasinv"
+_KEY_FORMAT_KEY            = b"keyfmt"
+_GENERATION_KEY            = b"gen"
 
 _KEY_SEP_LEN               = len(_KEY_SEP)
 _SUB_KEY_PREFIX_LEN        = len(_SUB_KEY_PREFIX)
@@ -76,6 +87,10 @@ _APRI_ID_KEY_PREFIX_LEN    = len(_APRI_ID_KEY_PREFIX)
 _ID_APRI_KEY_PREFIX_LEN    = len(_ID_APRI_KEY_PREFIX)
 _COMPRESSED_KEY_PREFIX_LEN = len(_COMPRESSED_KEY_PREFIX)
 _APOS_KEY_PREFIX_LEN       = len(_APOS_KEY_PREFIX)
+_STATS_KEY_PREFIX_LEN      = len(_STATS_KEY_PREFIX)
+_MONOTONE_KEY_PREFIX_LEN   = len(_MONOTONE_KEY_PREFIX)
+_INVERSE_KEY_PREFIX_LEN    = len(_INVERSE_KEY_PREFIX)
+_HAS_INVERSE_KEY_PREFIX_LEN = len(_HAS_INVERSE_KEY_PREFIX)
 _IS_NOT_COMPRESSED_VAL     = b""
 _SUB_VAL                   = b""
 
@@ -83,7 +98,7 @@ _SUB_VAL                   = b""
 #        ERROR MESSAGES         #
 
 _MEMORY_FULL_ERROR_MESSAGE = (
-    "Exceeded max `Register` size of {0} Bytes. Please increase the max size using the method `increase_size`."
+    "Exceeded max `Register` size of {0} Bytes. Please increase the max size using the method `set_max_reg_size`."
 )
 _NO_APRI_ERROR_MESSAGE = "The following `ApriInfo` is not known to this register :\n{0}\n{1}"
 _NO_APOS_ERROR_MESSAGE = "No apos associated with the following apri : \n{0}\n{1}"
@@ -96,17 +111,33 @@ _RAM_BLOCK_NOT_OPEN_ERROR_MESSAGE = (
 
 _START_N_TAIL_LENGTH_DEFAULT   = 12
 _LENGTH_LENGTH_DEFAULT         = 7
+_INVERSE_INT_LENGTH            = 20
+_INVERSE_VALUE_OFFSET          = 2 ** 63
 _MAX_LENGTH_DEFAULT            = 10 ** _LENGTH_LENGTH_DEFAULT - 1
 _START_N_HEAD_DEFAULT          = 0
 _INITIAL_REGISTER_SIZE_DEFAULT = 5 * BYTES_PER_MB
 _MAX_APRI_DFL_LEN              = 6
 _MAX_APRI_DFL                  = 10 ** _MAX_APRI_DFL_LEN
+_MAX_REGISTER_SIZE_DEFAULT     = 2 ** 40
+_MAP_GROWTH_FACTOR             = 2
+_COMMIT_BATCH_SIZE_DEFAULT     = 1000
+_MIGRATE_BATCH_SIZE_DEFAULT    = 10000
+_BLK_TASKS_TIMEOUT             = 10 ** 6 # seconds, in effect no timeout for `build`, `map_blks`, and `reduce`
+# key formats, see `Register.migrate_key_format`
+_DECIMAL_KEY_FORMAT            = 1
+_BINARY_KEY_FORMAT             = 2
+_BINARY_APRI_ID_LEN            = 4
+_BINARY_INT_LEN                = 8
+_BINARY_MAX_APRI               = 2 ** (8 * _BINARY_APRI_ID_LEN)
+_BINARY_MAX_INT                = 2 ** (8 * _BINARY_INT_LEN) - 1
+_BINARY_APRI_ID_JSON_LEN       = len(str(_BINARY_MAX_APRI - 1))
 
 class Register(ABC):
 
     file_suffix = ""
     _constructors = {}
     _instances = {}
+    _instances_lock = threading.RLock()
 
     #################################
     #            PATTERNS           #
@@ -408,8 +439,11 @@ class Register(ABC):
         self._max_length = _MAX_LENGTH_DEFAULT
         self._max_apri_len = _MAX_APRI_DFL_LEN
         self._max_apri = _MAX_APRI_DFL
+        self._key_format = _DECIMAL_KEY_FORMAT
         # RAM BLOCKS #
         self._ram_blks = {}
+        # VIRTUAL APRIS #
+        self._virtual_apris = {}
         # TIMEIT #
         self.set_elapsed = 0
         self.get_elapsed = 0
@@ -418,12 +452,30 @@ class Register(ABC):
         self.rmv_elapsed = 0
         self.compress_elapsed = 0
         self.decompress_elapsed = 0
+        # THREADS #
+        self._lock = threading.RLock() # guards the timers and caches, so that threads can share a reader
+        self._snapshot_local = threading.local() # `txn` attribute is the pinned read transaction of `snapshot`
+        self._num_active_readers = 0 # read transactions of this process, which prevent the map from being resized
+        # guards `_num_active_readers` and `_env_exclusive`, which keeps threads from beginning read transactions
+        # while the LMDB environment is resized or reopened (see `Register._exclusive_env`)
+        self._env_cond = threading.Condition(self._lock)
+        self._env_exclusive = False
+        # MAP SIZE #
+        self._max_reg_size = _MAX_REGISTER_SIZE_DEFAULT
+        self.num_map_growths = 0
+        # COMMIT SERVICE #
+        self._commit_address = None # address of the process that commits `add_disk_blk` metadata, if any
+        self._commit_authkey = None
+        self._commit_conn = None # connection of this process to the commit service
+        self._pending_commits = {} # maps the ID of each unacknowledged commit to the filename of its `Block`
+        # MEMOIZE #
+        self._memoized = [] # `_MemoizedFunction`s whose buffers are flushed when this `Register` is closed
+        self._next_commit_id = 0
+        self._commit_errors = []
         # TRANSACTIONS #
         self._txn_timeout = 30 # seconds
         self._do_update_perm_db = False
-        self._update_perm_db_event = None
-        self._num_active_rw_txns = None
-        self._update_perm_db_timeout = None
+        self._perm_db_txnid = None # LMDB txn id of the write database when it was last synced to the permanent one
         self._do_hard_reset = False
         self._hard_reset_event = None
         self._hard_reset_condition = None
@@ -499,7 +551,8 @@ class Register(ABC):
         if not local_dir.is_absolute():
             raise ValueError(NOT_ABSOLUTE_ERROR_MESSAGE.format(str(local_dir)))
 
-        Register._instances[local_dir] = reg
+        with Register._instances_lock:
+            Register._instances[local_dir] = reg
 
     @staticmethod
     def _instance_exists(local_dir):
@@ -511,7 +564,8 @@ class Register(ABC):
         if not local_dir.is_absolute():
             raise ValueError(NOT_ABSOLUTE_ERROR_MESSAGE.format(str(local_dir)))
 
-        return local_dir in Register._instances.keys()
+        with Register._instances_lock:
+            return local_dir in Register._instances.keys()
 
     @staticmethod
     def _get_instance(local_dir):
@@ -523,7 +577,8 @@ class Register(ABC):
         if not local_dir.is_absolute():
             raise ValueError(NOT_ABSOLUTE_ERROR_MESSAGE.format(str(local_dir)))
 
-        return Register._instances[local_dir]
+        with Register._instances_lock:
+            return Register._instances[local_dir]
 
     #################################
     #           PICKLING            #
@@ -532,15 +587,18 @@ class Register(ABC):
         return {
             'local_dir' : str(self._local_dir),
             'do_update_perm_db' : self._do_update_perm_db,
-            'update_perm_db_event' : self._update_perm_db_event,
-            'num_active_rw_txns' : self._num_active_rw_txns,
-            'update_perm_db_timeout' : self._update_perm_db_timeout,
             'do_hard_reset' : self._do_hard_reset,
             'hard_reset_event' : self._hard_reset_event,
             'hard_reset_condition' : self._hard_reset_condition,
             'num_alive_procs' : self._num_alive_procs,
             'num_waiting_procs' : self._num_waiting_procs,
-            'hard_reset_timeout' : self._hard_reset_timeout
+            'hard_reset_timeout' : self._hard_reset_timeout,
+            'max_reg_size' : self._max_reg_size,
+            'commit_address' : self._commit_address,
+            'commit_authkey' : self._commit_authkey,
+            'shared_ram_blks' : [
+                blk for blks in self._ram_blks.values() for blk in blks if isinstance(blk, SharedBlock)
+            ]
         }
 
     def __setstate__(self, state):
@@ -554,15 +612,21 @@ class Register(ABC):
 
             self.__dict__ = Register._from_local_dir(local_dir).__dict__
             self._do_update_perm_db = state['do_update_perm_db']
-            self._update_perm_db_event = state['update_perm_db_event']
-            self._num_active_rw_txns = state['num_active_rw_txns']
-            self._update_perm_db_timeout = state['update_perm_db_timeout']
             self._do_hard_reset = state['do_hard_reset']
             self._hard_reset_event = state['hard_reset_event']
             self._hard_reset_condition = state['hard_reset_condition']
             self._num_alive_procs = state['num_alive_procs']
             self._num_waiting_procs = state['num_waiting_procs']
             self._hard_reset_timeout = state['hard_reset_timeout']
+            self._max_reg_size = state['max_reg_size']
+            self._commit_address = state['commit_address']
+            self._commit_authkey = state['commit_authkey']
+
+            for blk in state['shared_ram_blks']: # already sorted
+
+                blk.__enter__() # as the creator keeps it entered while it is shared
+                self._add_apri_ram(blk.apri, False)
+                self._ram_blks[blk.apri].append(blk)
 
     def __getnewargs__(self):
         return None, None, None, None, None, str(self._local_dir)
@@ -575,62 +639,49 @@ class Register(ABC):
 
         if self._do_hard_reset and not self._hard_reset_event.is_set(): # If not set, must do hard reset
 
-            if self._opened: # a soft reset could fail on `open_lmdb`
-
-                self._db.close()
-                self._opened = False
-
-            with self._num_waiting_procs.get_lock():
+            with self._exclusive_env():
 
-                first = self._num_waiting_procs.value == 0
-                self._num_waiting_procs.value += 1
+                if not self._hard_reset_event.is_set(): # another thread of this process may have done it
 
-            with self._hard_reset_condition:
-                self._hard_reset_condition.notify()
+                    if self._opened: # a soft reset could fail on `open_lmdb`
 
-            try:
+                        self._db.close()
+                        self._opened = False
 
-                if not first:
+                    with self._num_waiting_procs.get_lock():
 
-                    self._hard_reset_event.wait(self._hard_reset_timeout)
-                    self._db = open_lmdb(self._write_db_filepath, self._db_map_size, self._readonly)
-                    self._opened = True
+                        first = self._num_waiting_procs.value == 0
+                        self._num_waiting_procs.value += 1
 
-                else:
-                    # first process to arrive performs hard reset and notifies remaining processes to proceed
                     with self._hard_reset_condition:
+                        self._hard_reset_condition.notify()
 
-                        while self._num_waiting_procs.value < self._num_alive_procs.value:
-                            self._hard_reset_condition.wait(self._hard_reset_timeout)
-
-                    (self._write_db_filepath / LOCK_FILEPATH.name).unlink()
-                    self._db = open_lmdb(self._write_db_filepath, self._db_map_size, self._readonly)
-                    self._opened = True
-                    self._hard_reset_event.set() # notify waiting processes
-
-            finally:
-
-                with self._num_waiting_procs.get_lock():
-                    self._num_waiting_procs.value -= 1
+                    try:
 
-        if self._do_update_perm_db:
+                        if not first:
 
-            self._update_perm_db_event.wait(self._update_perm_db_timeout)
+                            self._hard_reset_event.wait(self._hard_reset_timeout)
+                            self._db = open_lmdb(self._write_db_filepath, self._db_map_size, self._readonly)
+                            self._opened = True
 
-            if kind == 'writer':
+                        else:
+                            # first process to arrive performs hard reset and notifies remaining processes to proceed
+                            with self._hard_reset_condition:
 
-                with self._num_active_rw_txns.get_lock():
-                    self._num_active_rw_txns.value += 1
+                                while self._num_waiting_procs.value < self._num_alive_procs.value:
+                                    self._hard_reset_condition.wait(self._hard_reset_timeout)
 
-        try:
-            yield
+                            (self._write_db_filepath / LOCK_FILEPATH.name).unlink()
+                            self._db = open_lmdb(self._write_db_filepath, self._db_map_size, self._readonly)
+                            self._opened = True
+                            self._hard_reset_event.set() # notify waiting processes
 
-        finally:
+                    finally:
 
-            if self._do_update_perm_db and kind == 'writer':
+                        with self._num_waiting_procs.get_lock():
+                            self._num_waiting_procs.value -= 1
 
-                with self._num_active_rw_txns.get_lock():
-                    self._num_active_rw_txns.value -= 1
+        yield
 
     @contextmanager
     def _txn(self, kind):
@@ -638,11 +689,21 @@ class Register(ABC):
         if kind not in ("reader", "writer", "reversible"):
             raise ValueError
 
-        for i in range(3):
+        if kind == "reader" and getattr(self._snapshot_local, "txn", None) is not None:
+            # reuse the read transaction pinned by `Register.snapshot`
+            yield self._snapshot_local.txn
+            return
+
+        reaped = False
+        i = 0
+
+        while i < 3:
 
             with ExitStack() as stack:
 
                 txn = None
+                retry = False
+                adopt = False
                 stack.enter_context(self._manage_txn(kind))
 
                 with timeout_cm(self._txn_timeout):
@@ -650,17 +711,29 @@ class Register(ABC):
                     try:
 
                         if kind == "reader":
+                            # counted before `begin`, so that the environment cannot be reset in between
+                            stack.enter_context(self._count_reader())
                             txn = stack.enter_context(self._db.begin())
 
                         elif kind == "writer":
-                            txn = stack.enter_context(self._db.begin(write = True))
+                            txn = stack.enter_context(GrowingWriter(self._db, self._grow_map).begin())
 
                         else:
-                            txn = stack.enter_context(ReversibleWriter(self._db).begin())
+                            txn = stack.enter_context(ReversibleWriter(self._db, self._grow_map).begin())
+
+                    except lmdb.MapResizedError:
+                        # another process grew the map
+                        adopt = True
+                        retry = True
 
-                    except (lmdb.ReadersFullError, lmdb.InvalidParameterError, lmdb.BadRslotError):
+                    except (lmdb.ReadersFullError, lmdb.InvalidParameterError, lmdb.BadRslotError) as e:
 
-                        if i == 2 or (i == 1 and not self._do_hard_reset):
+                        if isinstance(e, lmdb.ReadersFullError) and not reaped:
+                            # the slots are usually held by dead processes, and freeing them is far cheaper than a reset
+                            reaped = True
+                            retry = self._db.reader_check() > 0
+
+                        if not retry and (i == 2 or (i == 1 and not self._do_hard_reset)):
                             raise
 
                 if txn is not None:
@@ -668,24 +741,32 @@ class Register(ABC):
                     yield txn
                     return
 
+            if adopt: # after `stack` has uncounted the reader of this thread
+                self._adopt_map_size()
+
+            if retry:
+                continue
+
             if i == 0:
                 # perform soft reset on first failure, closing database handle and reopening for this process only
-                self._db.close()
-                self._opened = False
+                with self._exclusive_env():
 
-                try:
-                    self._db = open_lmdb(self._write_db_filepath, self._db_map_size, self._readonly)
+                    self._db.close()
+                    self._opened = False
 
-                except lmdb.ReadersFullError as e:
+                    try:
+                        self._db = open_lmdb(self._write_db_filepath, self._db_map_size, self._readonly)
 
-                    if self._do_hard_reset:
-                        self._hard_reset_event.clear()
+                    except lmdb.ReadersFullError as e:
 
-                    else:
-                        raise
+                        if self._do_hard_reset:
+                            self._hard_reset_event.clear()
 
-                else:
-                    self._opened = True
+                        else:
+                            raise
+
+                    else:
+                        self._opened = True
 
             elif i == 1: # hence `self._do_hard_reset is True`
                 # perform hard reset, closing database handles for all processes, deleting the lockfile,
@@ -693,13 +774,141 @@ class Register(ABC):
                 # `Register._manage_txn`).
                 self._hard_reset_event.clear()
 
-    def _create_update_perm_db_shared_data(self, mp_ctx, timeout):
+            i += 1
+
+    @contextmanager
+    def _count_reader(self):
+
+        with self._env_cond:
+
+            own = getattr(self._snapshot_local, "num_readers", 0)
+
+            # `Register._exclusive_env` waits for the readers this thread already has, so it must not wait for them
+            while self._env_exclusive and own == 0:
+                self._env_cond.wait()
+
+            self._num_active_readers += 1
+            self._snapshot_local.num_readers = own + 1
+
+        try:
+            yield
+
+        finally:
+
+            with self._env_cond:
+
+                self._num_active_readers -= 1
+                self._snapshot_local.num_readers -= 1
+                self._env_cond.notify_all()
+
+    @contextmanager
+    def _exclusive_env(self):
+        """Wait for the other threads of this process to finish their read transactions, and keep them from beginning
+        new ones, so that the LMDB environment can be resized or reopened. Read transactions of the calling thread are
+        not waited for.
+
+        :raises RegisterError: If the other threads do not finish within the transaction timeout.
+        """
+
+        with self._env_cond:
+
+            while self._env_exclusive:
+                self._env_cond.wait()
+
+            self._env_exclusive = True
+            own = getattr(self._snapshot_local, "num_readers", 0)
+
+            if not self._env_cond.wait_for(lambda: self._num_active_readers <= own, self._txn_timeout):
+
+                self._env_exclusive = False
+                self._env_cond.notify_all()
+                raise RegisterError(
+                    f"Timed out waiting for the read transactions of other threads to finish.\n{self}"
+                )
+
+        try:
+            yield
+
+        finally:
+
+            with self._env_cond:
+
+                self._env_exclusive = False
+                self._env_cond.notify_all()
 
+    def _grow_map(self):
+        """Multiply the map size by `_MAP_GROWTH_FACTOR`, up to `max_reg_size`, and record the new size in
+        `mapsize.txt`. Called by `GrowingWriter` when the map is full, after it has aborted its transaction. Resizing
+        the map would invalidate the open read transactions of this process, so this waits for those of the other
+        threads to finish. Other processes pick up the new size when they next begin a transaction (see
+        `Register._adopt_map_size`).
+
+        :raises RegisterError: If this thread has read transactions open, or if those of the other threads do not
+        finish within the transaction timeout.
+        :return: (type `bool`) Whether the map grew.
+        """
+
+        if getattr(self._snapshot_local, "num_readers", 0) > 0:
+            raise RegisterError(
+                "The map of this `Register` is full, but this thread cannot grow it while it has read transactions "
+                "open (for example, inside `Register.snapshot`)."
+            )
+
+        with self._exclusive_env():
+
+            if self._db_map_size >= self._max_reg_size:
+                return False
+
+            new_size = min(self._max_reg_size, _MAP_GROWTH_FACTOR * self._db_map_size)
+
+            try:
+                self._db.set_mapsize(new_size)
+
+            except lmdb.Error:
+                return False
+
+            self._db_map_size = new_size
+            self.num_map_growths += 1
+
+            if int(read_txt_file(self._db_map_size_filepath)) < new_size:
+                write_txt_file(str(new_size), self._db_map_size_filepath, True)
+
+            return True
+
+    def _adopt_map_size(self):
+        """Adopt the map size of another process that grew the map, once the other threads of this process have
+        finished their read transactions."""
+
+        if getattr(self._snapshot_local, "num_readers", 0) > 0:
+            raise RegisterError(
+                "Another process grew the map of this `Register`, but this thread cannot adopt the new size while it "
+                "has read transactions open (for example, inside `Register.snapshot`)."
+            )
+
+        with self._exclusive_env():
+
+            self._db.set_mapsize(0) # 0 means adopt the size that is in use
+            self._db_map_size = self._db.info()['map_size']
+
+    def _reap_stale_readers(self):
+        """Free the reader slots of the write database that are held by dead processes.
+
+        :return: (type `int`) The number of slots freed.
+        """
+
+        if self._opened:
+            return self._db.reader_check()
+
+        db = open_lmdb(self._write_db_filepath, self._db_map_size, True)
+
+        try:
+            return db.reader_check()
+
+        finally:
+            db.close()
+
+    def _enable_update_perm_db(self):
         self._do_update_perm_db = True
-        self._update_perm_db_event = mp_ctx.Event()
-        self._update_perm_db_event.set()
-        self._num_active_rw_txns = mp_ctx.Value('i', 0)
-        self._update_perm_db_timeout = timeout
 
     def _create_hard_reset_shared_data(self, mp_ctx, num_alive_procs, timeout):
 
@@ -850,6 +1059,9 @@ class Register(ABC):
         user is discouraged to call this method for large `tail_len` values (>12), as this is likely unnecessary and
         defeats the purpose of this method.
 
+        Registers that use the binary key format (see `migrate_key_format`) store `startn` as a fixed-width integer,
+        so for them this method only validates its arguments.
+
         :param head: (type `int`, optional) Non-negative. If omitted, resets this `Register` to the default `head`.
         :param tail_len: (type `int`) Positive. If omitted, resets this `Register` to the default `tail_len`.
         """
@@ -865,6 +1077,9 @@ class Register(ABC):
         if tail_len <= 0:
             raise ValueError("`tail_len` must be positive.")
 
+        if self._key_format == _BINARY_KEY_FORMAT:
+            return
+
         if head == self._startn_head and tail_len == self._startn_tail_length:
             return
 
@@ -915,12 +1130,81 @@ class Register(ABC):
     def reg_size(self):
         return self._db_map_size
 
+    def max_reg_size(self):
+        return self._max_reg_size
+
+    def set_max_reg_size(self, num_bytes):
+        """When a write would exceed the current size of this `Register`, the size is multiplied by 2, up to
+        `num_bytes`, and the write is retried. Past that, writes raise `RegisterError`. Applies to this process only.
+
+        :param num_bytes: (type `int`) Positive.
+        """
+
+        num_bytes = check_return_int(num_bytes, "num_bytes")
+
+        if num_bytes <= 0:
+            raise ValueError("`num_bytes` must be positive.")
+
+        self._max_reg_size = num_bytes
+
     def ident(self):
         return self._local_dir.name
 
     def shorthand(self):
         return self._shorthand
 
+    @contextmanager
+    def snapshot(self):
+        """Pin one LMDB read transaction that every reader method called by this thread inside the `with` block
+        reuses, instead of beginning a new one for each call. This saves the overhead of beginning transactions and
+        gives a consistent view of the disk data across calls: changes committed after the snapshot began, including
+        those made inside the `with` block, are not visible until `renew_snapshot` is called. Nested calls reuse the
+        outermost snapshot. RAM `Block`s are not part of the snapshot.
+
+        Keep the `with` block short if other processes write to this `Register`, since LMDB cannot reclaim pages that
+        a pinned transaction can still see.
+        """
+
+        self._check_open_raise("snapshot")
+
+        if getattr(self._snapshot_local, "txn", None) is not None:
+            yield self
+
+        else:
+
+            with self._manage_txn("reader"), self._count_reader():
+
+                self._snapshot_local.txn = self._db.begin()
+
+                try:
+                    yield self
+
+                finally:
+
+                    self._snapshot_local.txn.abort()
+                    self._snapshot_local.txn = None
+
+    def renew_snapshot(self):
+        """Move the read transaction pinned by `snapshot` forward to the latest committed data. Generators returned
+        by reader methods before this call must not be used afterwards."""
+
+        self._check_open_raise("renew_snapshot")
+
+        if getattr(self._snapshot_local, "txn", None) is None:
+            raise ValueError("`renew_snapshot` can only be called inside a `with reg.snapshot():` block.")
+
+        self._snapshot_local.txn.abort() # frees the reader slot for the next `begin`
+        self._snapshot_local.txn = self._db.begin()
+
+    def reader_slot_usage(self):
+        """The number of LMDB reader slots of this `Register` in use by any process, and the maximum number.
+
+        :return: (type `tuple` of two `int`)
+        """
+
+        self._check_open_raise("reader_slot_usage")
+        return num_open_readers_accurate(self._db), self._db.info()['max_readers']
+
     def reset_timers(self):
 
         self.set_elapsed = 0
@@ -942,7 +1226,9 @@ class Register(ABC):
             write_txt_file(str(self._write_db_filepath), self._local_dir / WRITE_DB_FILEPATH, True)
 
             try:
+
                 shutil.copytree(self._perm_db_filepath, self._write_db_filepath)
+                self._perm_db_txnid = self._write_db_txnid()
 
             except:
 
@@ -965,12 +1251,207 @@ class Register(ABC):
             self._write_db_filepath = self._perm_db_filepath
             write_txt_file(str(self._write_db_filepath), self._local_dir / WRITE_DB_FILEPATH, True)
 
+    def key_format(self):
+        """:return: (type `int`) 1 for the decimal key format, 2 for the binary key format (see
+        `migrate_key_format`)."""
+        return self._key_format
+
+    def migrate_key_format(self, batch_size = _MIGRATE_BATCH_SIZE_DEFAULT):
+        """Rewrite the database of this `Register` in the binary key format.
+
+        In the binary key format, apri IDs are big-endian 4-byte integers and the `startn` and length of disk
+        `Block`s are big-endian 8-byte integers, with no separators between them. Keys are shorter and compare
+        faster, `startn` and lengths can be as large as 2^64 - 1, and `set_startn_info` is no longer needed. Versions
+        of cornifer that predate the binary key format cannot read a migrated `Register`.
+
+        The database is streamed from a single read transaction into a new database, `batch_size` keys per write
+        transaction, and the new database then atomically replaces the old one. Does nothing if this `Register`
+        already uses the binary key format.
+
+        WARNING: The `Register` must not be open, in this or any other process, while this method runs.
+
+        :param batch_size: (type `int`, default 10000) Positive.
+        """
+
+        self._check_not_open_raise("migrate_key_format")
+        batch_size = check_return_int(batch_size, "batch_size")
+
+        if batch_size <= 0:
+            raise ValueError("`batch_size` must be positive.")
+
+        if self._write_db_filepath != self._perm_db_filepath:
+            raise RegisterError(f"Cannot migrate the key format of a `Register` that uses a `tmp_db`.\n{self}")
+
+        snapshot_dir = random_unique_filename(self._perm_db_filepath)
+        snapshot_dir.mkdir()
+
+        try:
+
+            old_db = open_lmdb(self._perm_db_filepath, self._db_map_size, True)
+
+            try:
+
+                with old_db.begin() as ro_txn:
+
+                    if int(ro_txn.get(_KEY_FORMAT_KEY, default = b"1")) == _BINARY_KEY_FORMAT:
+                        return
+
+                    map_size = old_db.info()['map_size']
+                    new_db = open_lmdb(snapshot_dir, map_size, False)
+
+                    try:
+
+                        batch = [(_KEY_FORMAT_KEY, bytify_int(_BINARY_KEY_FORMAT))]
+
+                        with ro_txn.cursor() as cursor:
+
+                            for key, val in Register._iter_binary_key_format(cursor, ro_txn):
+
+                                batch.append((key, val))
+
+                                if len(batch) >= batch_size:
+
+                                    map_size = self._put_migrated_batch(new_db, map_size, batch)
+                                    batch = []
+
+                        if len(batch) > 0:
+                            map_size = self._put_migrated_batch(new_db, map_size, batch)
+
+                    finally:
+                        new_db.close()
+
+            finally:
+                old_db.close()
+
+            (snapshot_dir / DATA_FILEPATH.name).replace(self._perm_db_filepath / DATA_FILEPATH.name)
+
+            if map_size > self._db_map_size:
+
+                self._db_map_size = map_size
+                write_txt_file(str(map_size), self._db_map_size_filepath, True)
+
+            write_txt_file(self._digest(), self._digest_filepath, True)
+
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors = True)
+
+        self._key_format = _BINARY_KEY_FORMAT
+
+    def _put_migrated_batch(self, db, map_size, batch):
+        """Write `batch` to `db` in one transaction, growing the map of `db` as necessary.
+
+        :return: (type `int`) The map size of `db`.
+        """
+
+        while True:
+
+            try:
+
+                with db.begin(write = True) as rw_txn:
+
+                    for key, val in batch:
+                        rw_txn.put(key, val)
+
+                return map_size
+
+            except lmdb.MapFullError:
+
+                if map_size >= self._max_reg_size:
+                    raise RegisterError(_MEMORY_FULL_ERROR_MESSAGE.format(self._max_reg_size)) from None
+
+                map_size = min(self._max_reg_size, _MAP_GROWTH_FACTOR * map_size)
+                db.set_mapsize(map_size)
+
+    @staticmethod
+    def _iter_binary_key_format(cursor, r_txn):
+        """Iterate over the key-value pairs of a database in the decimal key format, translated to the binary key
+        format.
+
+        :param cursor: (type `lmdb.Cursor`) Over the database in the decimal key format.
+        :param r_txn: (type `lmdb.Transaction`) The transaction of `cursor`.
+        :raises RegisterError: If an apri ID does not fit in the binary key format.
+        :return: (type `bytes`) key
+        :return: (type `bytes`) value
+        """
+
+        apri_len = int(r_txn.get(_MAX_APRI_LEN_KEY))
+        head = int(r_txn.get(_START_N_HEAD_KEY))
+        tail_len = int(r_txn.get(_START_N_TAIL_LENGTH_KEY))
+        max_length = 10 ** int(r_txn.get(_LENGTH_LENGTH_KEY)) - 1
+        ref_regex = re.compile(b'"' + ApriInfo.__name__.encode("ASCII") + rb'(\d{%d})"' % apri_len)
+
+        def id_(old_id):
+
+            num = intify_bytes(old_id)
+
+            if num >= _BINARY_MAX_APRI:
+                raise RegisterError(f"Apri ID {num} is too large for the binary key format.")
+
+            return num.to_bytes(_BINARY_APRI_ID_LEN, "big")
+
+        def json_(old_json):
+            return ref_regex.sub(
+                lambda match: (
+                    b'"' + ApriInfo.__name__.encode("ASCII") +
+                    bytify_int(intify_bytes(match.group(1)), _BINARY_APRI_ID_JSON_LEN) + b'"'
+                ),
+                old_json
+            )
+
+        for key, val in cursor:
+
+            for prefix in (_BLK_KEY_PREFIX, _COMPRESSED_KEY_PREFIX, _STATS_KEY_PREFIX):
+
+                if key.startswith(prefix):
+
+                    stop1 = len(prefix) + apri_len
+                    stop2 = stop1 + _KEY_SEP_LEN + tail_len
+                    startn = head * 10 ** tail_len + intify_bytes(key[stop1 + _KEY_SEP_LEN : stop2])
+                    length = max_length - intify_bytes(key[stop2 + _KEY_SEP_LEN : ])
+                    yield (
+                        prefix + id_(key[len(prefix) : stop1]) +
+                        startn.to_bytes(_BINARY_INT_LEN, "big") +
+                        (_BINARY_MAX_INT - length).to_bytes(_BINARY_INT_LEN, "big"),
+                        val
+                    )
+                    break
+
+            else:
+
+                if key.startswith(_APRI_ID_KEY_PREFIX):
+                    yield _APRI_ID_KEY_PREFIX + json_(key[_APRI_ID_KEY_PREFIX_LEN : ]), id_(val)
+
+                elif key.startswith(_ID_APRI_KEY_PREFIX):
+                    yield _ID_APRI_KEY_PREFIX + id_(key[_ID_APRI_KEY_PREFIX_LEN : ]), json_(val)
+
+                elif key.startswith(_APOS_KEY_PREFIX):
+                    yield _APOS_KEY_PREFIX + id_(key[_APOS_KEY_PREFIX_LEN : ]), json_(val)
+
+                elif key.startswith(_HAS_INVERSE_KEY_PREFIX):
+                    yield _HAS_INVERSE_KEY_PREFIX + id_(key[_HAS_INVERSE_KEY_PREFIX_LEN : ]), val
+
+                elif key.startswith(_MONOTONE_KEY_PREFIX):
+                    yield _MONOTONE_KEY_PREFIX + id_(key[_MONOTONE_KEY_PREFIX_LEN : ]), val
+
+                elif key.startswith(_INVERSE_KEY_PREFIX):
+
+                    stop = _INVERSE_KEY_PREFIX_LEN + apri_len
+                    yield _INVERSE_KEY_PREFIX + id_(key[_INVERSE_KEY_PREFIX_LEN : stop]) + key[stop : ], val
+
+                else:
+                    yield key, val
+
     def increase_max_apri(self, new_max):
 
         self._check_open_raise('increase_max_apri')
         self._check_readwrite_raise('increase_max_apri')
         new_max = check_return_int(new_max, 'new_max')
 
+        if self._key_format == _BINARY_KEY_FORMAT:
+            raise ValueError(
+                f"This `Register` uses the binary key format, whose max number of apris is fixed at {self._max_apri}."
+            )
+
         if new_max <= 0:
             raise ValueError('`new_max` must be positive.')
 
@@ -1039,6 +1520,10 @@ class Register(ABC):
             # 3. Put new keys and vals of (apri_id -> apos)
             # 4. Update keys of (blk -> blkdata)
             # 5. Update keys of (compr -> comprdata)
+            # 6. Update keys of (stats -> statsdata)
+            # 7. Update keys of (mono -> b"")
+            # 8. Update keys of (hasinv -> b"")
+            # 9. Update keys of (inv -> count)
 
             for apri, old_apri_id in apris:
                 # 1. For each apri ordered by the list `apris`, do the following: Update keys and vals of
@@ -1080,10 +1565,15 @@ class Register(ABC):
             puts = []
 
             for prefix, prefix_len in (
-                (_BLK_KEY_PREFIX, _BLK_KEY_PREFIX_LEN), (_COMPRESSED_KEY_PREFIX, _COMPRESSED_KEY_PREFIX_LEN)
+                (_BLK_KEY_PREFIX, _BLK_KEY_PREFIX_LEN), (_COMPRESSED_KEY_PREFIX, _COMPRESSED_KEY_PREFIX_LEN),
+                (_STATS_KEY_PREFIX, _STATS_KEY_PREFIX_LEN)
             ):
                 # 4. Update keys of (blk -> blkdata)
                 # 5. Update keys of (compr -> comprdata)
+                # 6. Update keys of (stats -> statsdata)
+                puts.clear()
+                deletes.clear()
+
                 with r_txn_prefix_iter(prefix, rw_txn) as it:
 
                     for key, val in it:
@@ -1098,6 +1588,38 @@ class Register(ABC):
                 for delete in deletes:
                     rw_txn.delete(delete)
 
+            puts.clear()
+            deletes.clear()
+
+            for prefix, prefix_len in (
+                (_MONOTONE_KEY_PREFIX, _MONOTONE_KEY_PREFIX_LEN), (_HAS_INVERSE_KEY_PREFIX, _HAS_INVERSE_KEY_PREFIX_LEN)
+            ):
+                # 7. Update keys of (mono -> b"")
+                # 8. Update keys of (hasinv -> b"")
+                with r_txn_prefix_iter(prefix, rw_txn) as it:
+
+                    for key, val in it:
+
+                        deletes.append(key)
+                        puts.append((prefix + new_id(key[prefix_len : ]), val))
+
+            with r_txn_prefix_iter(_INVERSE_KEY_PREFIX, rw_txn) as it:
+                # 9. Update keys of (inv -> count)
+                for key, val in it:
+
+                    deletes.append(key)
+                    old_apri_id = key[_INVERSE_KEY_PREFIX_LEN : _INVERSE_KEY_PREFIX_LEN + self._max_apri_len]
+                    puts.append((
+                        _INVERSE_KEY_PREFIX + new_id(old_apri_id) + key[_INVERSE_KEY_PREFIX_LEN + self._max_apri_len : ],
+                        val
+                    ))
+
+            for delete in deletes:
+                rw_txn.delete(delete)
+
+            for put in puts:
+                rw_txn.put(*put)
+
             rw_txn.put(_MAX_APRI_LEN_KEY, str(new_max_len).encode('ASCII'))
 
         self._max_apri = new_max
@@ -1106,49 +1628,131 @@ class Register(ABC):
     #################################
     #    PROTEC REGISTER METHODS    #
 
-    async def _update_perm_db(self, timeout):
+    def _write_db_txnid(self):
 
-        start = time.time()
+        db = open_lmdb(self._write_db_filepath, self._db_map_size, True)
 
-        if not self._do_update_perm_db:
-            raise ValueError
+        try:
+            return db.info()['last_txnid']
 
-        self._update_perm_db_event.clear() # block future transactions
+        finally:
+            db.close()
 
-        while timeout is None or time.time() - start < timeout:
+    def _snapshot_write_db(self, snapshot_dir):
+        """Copy a consistent snapshot of the write database into `snapshot_dir` from a read transaction, so that
+        writers are never blocked, and increment its generation (see `Register._perm_db_generation`). Return the txn id
+        of the snapshot, or `None` if nothing was committed since the last sync."""
 
-            if self._num_active_rw_txns.value == 0:
+        with ExitStack() as stack:
 
-                tmp_filename = random_unique_filename(self._perm_db_filepath, ".mdb")
+            if self._opened: # LMDB does not allow opening an environment twice in the same process
+                db = self._db
 
-                try:
-                    await asyncio.wait_for(
-                        aioshutil.copy(self._write_db_filepath / DATA_FILEPATH.name, tmp_filename),
-                        timeout + start - time.time() if timeout is not None else None
-                    )
+            else:
 
-                except (asyncio.exceptions.TimeoutError, TimeoutError) as e:
+                db = open_lmdb(self._write_db_filepath, self._db_map_size, True)
+                stack.callback(db.close)
 
-                    tmp_filename.unlink(missing_ok = True)
-                    raise
+            if db.info()['last_txnid'] == self._perm_db_txnid:
+                return None
 
-                tmp_filename.rename(self._perm_db_filepath / DATA_FILEPATH.name)
-                write_txt_file(self._digest(), self._digest_filepath, True)
-                self._update_perm_db_event.set()
-                return
+            with db.begin() as r_txn:
 
-            await asyncio.sleep(0.1)
+                db.copy(str(snapshot_dir), compact = True, txn = r_txn)
+                txnid = r_txn.id()
 
-    def _digest(self):
+        generation = self._perm_db_generation()
+        snapshot = open_lmdb(snapshot_dir, self._db_map_size, False)
 
-        return (
-            f"{hash_file(self._version_filepath).hexdigest()}," 
-            f"{hash_file(self._shorthand_filepath).hexdigest()},"
-            f"{hash_file(self._msg_filepath).hexdigest()},"
-            f"{hash_file(self._cls_filepath).hexdigest()},"
-            f"{hash_file(self._db_map_size_filepath).hexdigest()},"
-            f"{hash_file(self._perm_db_filepath / DATA_FILEPATH.name).hexdigest()},"
-            f"{(self._perm_db_filepath / DATA_FILEPATH.name).stat().st_size}"
+        try:
+
+            with snapshot.begin(write = True) as rw_txn:
+                rw_txn.put(_GENERATION_KEY, bytify_int(0 if generation is None else generation + 1))
+
+        finally:
+            snapshot.close()
+
+        return txnid
+
+    def _perm_db_generation(self):
+        """The number of times that `Register._update_perm_db` has replaced the permanent database. It is stored in the
+        database itself, since compacted copies all have the same LMDB txn id and so may be distinguishable only by
+        pages that `fingerprint_file` does not sample.
+
+        :return: (type `int`) Or `None` if the permanent database cannot be read, for example because a network
+        filesystem has not finished syncing it.
+        """
+
+        if self._opened and self._write_db_filepath == self._perm_db_filepath:
+
+            with self._txn("reader") as ro_txn:
+                return intify_bytes(ro_txn.get(_GENERATION_KEY, default = b"0"))
+
+        try:
+            # `lock = False` so as not to touch the lockfile, which belongs to the processes that open the database
+            db = lmdb.open(str(self._perm_db_filepath), map_size = self._db_map_size, readonly = True, lock = False)
+
+        except lmdb.Error:
+            return None
+
+        try:
+
+            with db.begin() as r_txn:
+                return intify_bytes(r_txn.get(_GENERATION_KEY, default = b"0"))
+
+        except lmdb.Error:
+            return None
+
+        finally:
+            db.close()
+
+    async def _update_perm_db(self, timeout):
+        """Replace the permanent database with a snapshot of the write database, unless no transaction has been
+        committed to the write database since the last call. The snapshot is swapped in atomically.
+
+        An LMDB copy cannot be interrupted, so if the snapshot takes longer than `timeout` seconds, then this method
+        still waits for it to finish, so as not to delete its directory while it is being written, before raising
+        `TimeoutError`. The call can therefore take longer than `timeout`.
+        """
+
+        if not self._do_update_perm_db:
+            raise ValueError
+
+        snapshot_dir = random_unique_filename(self._perm_db_filepath)
+        snapshot_dir.mkdir()
+
+        try:
+
+            snapshot = asyncio.ensure_future(asyncio.to_thread(self._snapshot_write_db, snapshot_dir))
+
+            try:
+                # `shield` so that a timeout does not delete `snapshot_dir` while LMDB is still writing to it
+                txnid = await asyncio.wait_for(asyncio.shield(snapshot), timeout)
+
+            except (asyncio.exceptions.TimeoutError, TimeoutError):
+
+                await snapshot
+                raise
+
+            if txnid is not None:
+
+                (snapshot_dir / DATA_FILEPATH.name).replace(self._perm_db_filepath / DATA_FILEPATH.name)
+                self._perm_db_txnid = txnid
+                write_txt_file(self._digest(), self._digest_filepath, True)
+
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors = True)
+
+    def _digest(self):
+
+        return (
+            f"{hash_file(self._version_filepath).hexdigest()}," 
+            f"{hash_file(self._shorthand_filepath).hexdigest()},"
+            f"{hash_file(self._msg_filepath).hexdigest()},"
+            f"{hash_file(self._cls_filepath).hexdigest()},"
+            f"{hash_file(self._db_map_size_filepath).hexdigest()},"
+            f"{fingerprint_file(self._perm_db_filepath / DATA_FILEPATH.name)},"
+            f"{self._perm_db_generation()}"
         )
 
     def _set_startn_info_pre(self, head, tail_len, r_txn):
@@ -1173,7 +1777,8 @@ class Register(ABC):
         changes = []
 
         for prefix, prefix_len in (
-            (_BLK_KEY_PREFIX, _BLK_KEY_PREFIX_LEN), (_COMPRESSED_KEY_PREFIX, _COMPRESSED_KEY_PREFIX_LEN)
+            (_BLK_KEY_PREFIX, _BLK_KEY_PREFIX_LEN), (_COMPRESSED_KEY_PREFIX, _COMPRESSED_KEY_PREFIX_LEN),
+            (_STATS_KEY_PREFIX, _STATS_KEY_PREFIX_LEN)
         ):
 
             with r_txn_prefix_iter(prefix, r_txn) as it:
@@ -1183,9 +1788,7 @@ class Register(ABC):
                     startn, _ = self._get_startn_length(prefix_len, key)
                     apri_id, _, length_bytes = self._get_raw_startn_length(prefix_len, key)
                     new_startn_bytes = bytify_int(startn % new_mod, tail_len)
-                    new_key = Register._join_disk_blk_data(
-                        _BLK_KEY_PREFIX, apri_id, new_startn_bytes, length_bytes
-                    )
+                    new_key = Register._join_disk_blk_data(prefix, apri_id, new_startn_bytes, length_bytes)
 
                     if key != new_key:
 
@@ -1243,20 +1846,48 @@ class Register(ABC):
         except lmdb.Error as e:
             raise RegisterError(f'Failed to open `Register`\n{self}') from e
 
+        ret._db_map_size = ret._db.info()['map_size'] # the map may have grown in another process
+
         with ret._txn("reader") as ro_txn:
 
+            ret._key_format = int(ro_txn.get(_KEY_FORMAT_KEY, default = bytify_int(_DECIMAL_KEY_FORMAT)))
             ret._length_length = int(ro_txn.get(_LENGTH_LENGTH_KEY))
             ret._max_apri_len = int(ro_txn.get(_MAX_APRI_LEN_KEY))
 
-        ret._max_apri = 10 ** ret._max_apri_len
-        ret._max_length = 10 ** ret._length_length - 1
+        if ret._key_format == _BINARY_KEY_FORMAT:
+
+            ret._max_apri_len = _BINARY_APRI_ID_LEN
+            ret._max_apri = _BINARY_MAX_APRI
+            ret._max_length = _BINARY_MAX_INT
+
+        else:
+
+            ret._max_apri = 10 ** ret._max_apri_len
+            ret._max_length = 10 ** ret._length_length - 1
+
         ret._opened = True
         return ret
 
     def _close(self):
 
-        self._opened = False
-        self._db.close()
+        try:
+
+            try:
+
+                for fn in self._memoized:
+                    fn.flush()
+
+            finally:
+
+                self._memoized = []
+
+                if self._commit_conn is not None:
+                    self.flush_commits()
+
+        finally:
+
+            self._opened = False
+            self._db.close()
 
     @contextmanager
     def _recursive_open(self, readonly):
@@ -1350,7 +1981,9 @@ class Register(ABC):
             yield
 
         finally:
-            self.__dict__[elapsed_name] += time.time() - start_time
+
+            with self._lock:
+                self.__dict__[elapsed_name] += time.time() - start_time
 
     #################################
     #      PROTEC INFO METHODS      #
@@ -1672,6 +2305,10 @@ class Register(ABC):
     def _get_id_apri_key(apri_id):
         return _ID_APRI_KEY_PREFIX + apri_id
 
+    @staticmethod
+    def _get_monotone_key(apri_id):
+        return _MONOTONE_KEY_PREFIX + apri_id
+
     def _get_apri_id(self, apri, apri_json, reencode, r_txn):
 
         if reencode:
@@ -1692,7 +2329,7 @@ class Register(ABC):
 
         for next_apri_id_num in range(int(rw_txn.get(_CURR_ID_KEY)), self._max_apri):
 
-            next_id = bytify_int(next_apri_id_num, self._max_apri_len)
+            next_id = self._bytify_apri_id(next_apri_id_num)
 
             if next_id not in reserved:
                 break
@@ -1700,9 +2337,45 @@ class Register(ABC):
         else:
             raise RegisterError(f"Too many apris added to this `Register`, the limit is {self._max_apri}.")
 
-        rw_txn.put(_CURR_ID_KEY, bytify_int(next_apri_id_num + 1, self._max_apri_len))
+        if self._key_format == _BINARY_KEY_FORMAT:
+            rw_txn.put(_CURR_ID_KEY, bytify_int(next_apri_id_num + 1))
+
+        else:
+            rw_txn.put(_CURR_ID_KEY, bytify_int(next_apri_id_num + 1, self._max_apri_len))
+
         return next_id
 
+    def _bytify_apri_id(self, apri_id_num):
+
+        if self._key_format == _BINARY_KEY_FORMAT:
+            return apri_id_num.to_bytes(_BINARY_APRI_ID_LEN, "big")
+
+        else:
+            return bytify_int(apri_id_num, self._max_apri_len)
+
+    def _apri_id_to_str(self, apri_id):
+        """Inverse of `_apri_id_from_str`. Used to embed references to other `ApriInfo`s in relational JSON."""
+
+        if self._key_format == _BINARY_KEY_FORMAT:
+            return f"{int.from_bytes(apri_id, 'big'):0{_BINARY_APRI_ID_JSON_LEN}d}"
+
+        else:
+            return apri_id.decode("ASCII")
+
+    def _apri_id_from_str(self, str_):
+        """Inverse of `_apri_id_to_str`. Returns `None` if `str_` is not a valid ID string."""
+
+        if self._key_format == _BINARY_KEY_FORMAT:
+            len_ = _BINARY_APRI_ID_JSON_LEN
+
+        else:
+            len_ = self._max_apri_len
+
+        if len(str_) != len_ or not str_.isdigit():
+            return None
+
+        return self._bytify_apri_id(int(str_))
+
     def _add_apri_ram(self, apri, exclude_root):
 
         for key, inner_info in apri.iter_inner_info():
@@ -1825,6 +2498,16 @@ class Register(ABC):
                                     blk_filenames.append(blk_filename)
                                     keys.append(compressed_key)
                                     compressed_filenames.append(compressed_filename)
+                                    keys.append(Register._get_stats_key(blk_key))
+
+                apri_id_ = self._get_apri_id(apri_, apri_json_, False, r_txn)
+                keys.append(Register._get_monotone_key(apri_id_))
+                keys.append(Register._get_has_inverse_key(apri_id_))
+
+                with r_txn_prefix_iter(Register._get_inverse_prefix(apri_id_), r_txn) as it:
+
+                    for key, _ in it:
+                        keys.append(key)
 
                 apos_key = self._get_apos_key(apri_, apri_json_, False, r_txn)
 
@@ -2378,7 +3061,7 @@ class Register(ABC):
 
             startn_head = blk.startn // self._startn_tail_mod
 
-            if startn_head != self._startn_head:
+            if self._key_format == _DECIMAL_KEY_FORMAT and startn_head != self._startn_head:
                 raise IndexError(
                     "The `startn` for the passed `Block` does not have the correct head:\n"
                     f"`tail_len`      : {self._startn_tail_length}\n"
@@ -2388,6 +3071,9 @@ class Register(ABC):
                     "Please see the method `set_startn_info` to troubleshoot this error."
                 )
 
+            if self._commit_address is not None:
+                return self._add_disk_blk_remote(blk, exists_ok, dups_ok, ret_metadata, kwargs)
+
             with self._txn("reader") as ro_txn:
                 blk_key, compressed_key, filename, add_apri = self._add_disk_blk_pre(
                     blk.apri, None, True, blk.startn, len(blk), exists_ok, dups_ok, ro_txn
@@ -2399,7 +3085,8 @@ class Register(ABC):
 
                 with self._txn("reversible") as rrw_txn:
                     self._add_disk_blk_disk(
-                        blk.apri, blk.startn, len(blk), blk_key, compressed_key, filename, add_apri, rrw_txn
+                        blk.apri, blk.startn, len(blk), blk_key, compressed_key, filename, add_apri, blk.segment,
+                        rrw_txn
                     )
 
                 return type(self)._add_disk_blk_disk2(blk.segment, filename, ret_metadata, kwargs)
@@ -2447,7 +3134,8 @@ class Register(ABC):
 
                 with self._txn("reversible") as rrw_txn:
                     self._add_disk_blk_disk(
-                        blk.apri, blk.startn, len(blk), blk_key, compressed_key, filename, add_apri, rrw_txn
+                        blk.apri, blk.startn, len(blk), blk_key, compressed_key, filename, add_apri, blk.segment,
+                        rrw_txn
                     )
 
                 file_metadata = type(self)._add_disk_blk_disk2(blk.segment, filename, ret_metadata, kwargs)
@@ -2514,7 +3202,9 @@ class Register(ABC):
             try:
 
                 with self._txn("reversible") as rrw_txn:
+
                     Register._rmv_disk_blk_disk(blk_key, compressed_key, rrw_txn)
+                    self._update_inverse_file_disk(apri, blk_key, blk_filename, compressed_filename, -1, rrw_txn)
 
                 self._rmv_disk_blk_disk2(blk_filename, compressed_filename, kwargs)
 
@@ -2530,6 +3220,201 @@ class Register(ABC):
                 else:
                     raise
 
+    def map_blks(
+        self, src_apri, dst_apri, fn, num_procs = 1, dst_reg = None, batch_size = 100, decompress = False, **kwargs
+    ):
+        """For each disk `Block` of `src_apri`, add the disk `Block` `fn(seg)` to `dst_reg` with the `ApriInfo`
+        `dst_apri` and the same `startn`. Disk `Block`s already present in `dst_reg` with the same `startn` and length
+        are skipped, so re-running an interrupted call only computes the missing `Block`s.
+
+        The `Block`s are loaded, mapped, and saved by `num_procs` worker processes (see `parallelize`), which do not
+        access either database. The new `Block`s are added to the `dst_reg` database by the calling process,
+        `batch_size` `Block`s per transaction. All `Block`s completed before an error or a SIGTERM are kept. If `fn`
+        raises an error, then it is re-raised if `num_procs == 1`; otherwise, the remaining `Block`s are still mapped
+        and a `RuntimeError` is raised at the end.
+
+        RAM `Block`s of `src_apri` are ignored.
+
+        :param src_apri: (type `ApriInfo`)
+        :param dst_apri: (type `ApriInfo`)
+        :param fn: (type function) Takes a segment and returns a segment of the same length. Must be picklable (e.g.
+        defined at the top-level of a module) if `num_procs > 1`.
+        :param num_procs: (type `int`, default 1) Positive.
+        :param dst_reg: (type `Register`, default `self`) Must be opened in read-write mode.
+        :param batch_size: (type `int`, default 100) Positive.
+        :param kwargs: Passed to `load_disk_data`.
+        :return: (type `int`) The number of `Block`s added to `dst_reg`.
+        """
+
+        with self._time("add_elapsed"):
+
+            if dst_reg is None:
+                dst_reg = self
+
+            self._check_open_raise("map_blks")
+            check_type(src_apri, "src_apri", ApriInfo)
+            check_type(dst_apri, "dst_apri", ApriInfo)
+            check_type(dst_reg, "dst_reg", Register)
+            num_procs = check_return_int(num_procs, "num_procs")
+            batch_size = check_return_int(batch_size, "batch_size")
+            check_type(decompress, "decompress", bool)
+            dst_reg._check_open_raise("map_blks")
+            dst_reg._check_readwrite_raise("map_blks")
+
+            if not callable(fn):
+                raise TypeError("`fn` must be a function.")
+
+            if num_procs <= 0:
+                raise ValueError("`num_procs` must be positive.")
+
+            if batch_size <= 0:
+                raise ValueError("`batch_size` must be positive.")
+
+            with self._txn("reader") as ro_txn:
+
+                with dst_reg._txn("reader") as dst_ro_txn:
+                    tasks = self._map_blks_pre(src_apri, dst_reg, dst_apri, decompress, ro_txn, dst_ro_txn)
+
+            if len(tasks) == 0:
+                return 0
+
+            src_apri_json = src_apri.to_json()
+            worker_args = [(type(self), type(dst_reg), src_apri_json, fn, task, kwargs) for task in tasks]
+            return dst_reg._run_blk_tasks(
+                dst_apri, _map_blk_worker, worker_args, {task[-1] for task in tasks}, num_procs, batch_size
+            )
+
+    def build(self, apri, fn, start, stop, blk_len, num_procs = 1, batch_size = 100):
+        """Calculate the data of `apri` for the indices `start <= n < stop` and add it as disk `Block`s. Only the
+        ranges of indices not already contained in some disk `Block` (see `Register.gaps`) are calculated, so
+        re-running an interrupted call only does the remaining work.
+
+        The missing ranges are split at the multiples of `blk_len`, and each piece is calculated by one of `num_procs`
+        worker processes (see `parallelize`), which saves it to a file without accessing the database. Finished pieces
+        are added to the database by the calling process, `batch_size` `Block`s per transaction. All `Block`s completed
+        before an error or a SIGTERM are kept. If `fn` raises an error, then it is re-raised if `num_procs == 1`;
+        otherwise, the remaining pieces are still calculated and a `RuntimeError` is raised at the end.
+
+        :param apri: (type `ApriInfo`)
+        :param fn: (type function) Called as `fn(startn, length)` and returns the segment of the indices
+        `startn <= n < startn + length`. Must be picklable (e.g. defined at the top-level of a module) if
+        `num_procs > 1`.
+        :param start: (type `int`) Non-negative.
+        :param stop: (type `int`) Non-negative.
+        :param blk_len: (type `int`) Positive.
+        :param num_procs: (type `int`, default 1) Positive.
+        :param batch_size: (type `int`, default 100) Positive.
+        :return: (type `int`) The number of `Block`s added.
+        """
+
+        with self._time("add_elapsed"):
+
+            self._check_open_raise("build")
+            self._check_readwrite_raise("build")
+            check_type(apri, "apri", ApriInfo)
+            blk_len = check_return_int(blk_len, "blk_len")
+            num_procs = check_return_int(num_procs, "num_procs")
+            batch_size = check_return_int(batch_size, "batch_size")
+
+            if not callable(fn):
+                raise TypeError("`fn` must be a function.")
+
+            if blk_len <= 0:
+                raise ValueError("`blk_len` must be positive.")
+
+            if blk_len > self._max_length:
+                raise ValueError(f"`blk_len` must be at most {self._max_length}.")
+
+            if num_procs <= 0:
+                raise ValueError("`num_procs` must be positive.")
+
+            if batch_size <= 0:
+                raise ValueError("`batch_size` must be positive.")
+
+            tasks = []
+            filenames = set()
+
+            for gap_start, gap_length in self.gaps(apri, start, stop, diskonly = True):
+
+                n = gap_start
+
+                while n < gap_start + gap_length:
+
+                    piece_stop = min((n // blk_len + 1) * blk_len, gap_start + gap_length)
+
+                    if self._key_format == _DECIMAL_KEY_FORMAT and n // self._startn_tail_mod != self._startn_head:
+                        raise IndexError(
+                            f"`startn` = {n} does not have the correct head. Please see the method `set_startn_info` "
+                            f"to troubleshoot this error."
+                        )
+
+                    while True:
+
+                        filename = random_unique_filename(self._local_dir, suffix = type(self).file_suffix, length = 6)
+
+                        if filename not in filenames:
+                            break
+
+                    filenames.add(filename)
+                    tasks.append((n, piece_stop - n, filename))
+                    n = piece_stop
+
+            worker_args = [(type(self), fn, task) for task in tasks]
+            return self._run_blk_tasks(apri, _build_blk_worker, worker_args, filenames, num_procs, batch_size)
+
+    def _run_blk_tasks(self, apri, worker, worker_args, uncommitted, num_procs, batch_size):
+        """Call `worker(*args)` for each `args` in `worker_args`, and add the returned `Block`s to this `Register` (see
+        `Register._map_blks_disk`) in batches. If `num_procs > 1`, then the calls are handed out to worker processes by
+        `parallelize`, so a SIGTERM terminates the workers and raises `ReceivedSigterm` here, after the `Block`s already
+        returned are added. Files in `uncommitted` that are not added are deleted.
+
+        :return: (type `int`) The number of `Block`s added.
+        """
+
+        if len(worker_args) == 0:
+            return 0
+
+        uncommitted = set(uncommitted)
+        num_added = 0
+        batch = []
+
+        def commit():
+
+            nonlocal num_added, batch
+            self._map_blks_commit(apri, batch)
+            uncommitted.difference_update(filename for _, _, filename, _ in batch)
+            num_added += len(batch)
+            batch = []
+
+        def add_result(_, result):
+
+            batch.append(result)
+
+            if len(batch) >= batch_size:
+                commit()
+
+        try:
+
+            try:
+                _run_tasks(num_procs, worker, worker_args, add_result)
+
+            finally:
+
+                if len(batch) > 0:
+                    commit()
+
+        finally:
+
+            for filename in uncommitted:
+
+                try:
+                    filename.unlink()
+
+                except FileNotFoundError:
+                    pass
+
+        return num_added
+
     def blk_metadata(self, apri, startn = None, length = None, recursively = False, timeout = None):
 
         with ExitStack() as stack:
@@ -2709,8 +3594,8 @@ class Register(ABC):
         if blk_key is None:
             return None, None
 
-        len1 = _BLK_KEY_PREFIX_LEN        + self._max_apri_len + _KEY_SEP_LEN
-        len2 = _COMPRESSED_KEY_PREFIX_LEN + self._max_apri_len + _KEY_SEP_LEN
+        len1 = _BLK_KEY_PREFIX_LEN        + self._max_apri_len + self._key_sep_len()
+        len2 = _COMPRESSED_KEY_PREFIX_LEN + self._max_apri_len + self._key_sep_len()
         return blk_key[ : len1], compressed_key[ : len2]
 
     def _get_disk_blk_prefixes_startn(self, apri, apri_json, reencode, startn, r_txn):
@@ -2720,8 +3605,9 @@ class Register(ABC):
         if blk_key is None:
             return None, None
 
-        len1 = _BLK_KEY_PREFIX_LEN        + self._max_apri_len + _KEY_SEP_LEN + self._startn_tail_length + _KEY_SEP_LEN
-        len2 = _COMPRESSED_KEY_PREFIX_LEN + self._max_apri_len + _KEY_SEP_LEN + self._startn_tail_length + _KEY_SEP_LEN
+        suffix_len = self._max_apri_len + self._key_sep_len() + self._startn_len() + self._key_sep_len()
+        len1 = _BLK_KEY_PREFIX_LEN        + suffix_len
+        len2 = _COMPRESSED_KEY_PREFIX_LEN + suffix_len
         return blk_key[: len1], compressed_key[: len2]
 
     def _add_disk_blk_pre(self, apri, apri_json, reencode, startn, length, exists_ok, dups_ok, r_txn):
@@ -2771,16 +3657,25 @@ class Register(ABC):
 
         return blk_key, compressed_key, filename, add_apri
 
-    def _add_disk_blk_disk(self, apri, startn, length, blk_key, compressed_key, filename, add_apri, rw_txn):
+    def _add_disk_blk_disk(
+        self, apri, startn, length, blk_key, compressed_key, filename, add_apri, seg, rw_txn, stats = None
+    ):
 
         if add_apri:
 
             self._add_apri_disk(apri, [], False, rw_txn)
             blk_key, compressed_key = self._get_disk_blk_keys(apri, None, True, startn, length, rw_txn)
 
+        if stats is None:
+            stats = type(self)._blk_stats(seg)
+
         filename_bytes = filename.name.encode("ASCII")
         rw_txn.put(blk_key, filename_bytes)
         rw_txn.put(compressed_key, _IS_NOT_COMPRESSED_VAL)
+        Register._put_stats_disk(blk_key, stats, rw_txn)
+
+        if not add_apri:
+            self._update_inverse_blk_disk(blk_key, seg, 1, rw_txn)
 
     @classmethod
     def _add_disk_blk_disk2(cls, seg, filename, ret_metadata, kwargs):
@@ -2833,125 +3728,394 @@ class Register(ABC):
             else:
                 return e
 
-    def _append_disk_blk_pre(self, apri, apri_json, reencode, startn, length, r_txn):
+    def _add_disk_blk_remote(self, blk, exists_ok, dups_ok, ret_metadata, kwargs):
+        """Write the data of `blk` and send its metadata to the commit service (see `parallelize`)."""
+
+        if self._commit_conn is None:
+            self._commit_conn = multiprocessing.connection.Client(self._commit_address, authkey = self._commit_authkey)
+
+        filename = random_unique_filename(self._local_dir, suffix = type(self).file_suffix, length = 6)
+        ret = type(self)._add_disk_blk_disk2(blk.segment, filename, ret_metadata, kwargs)
+        commit_id = self._next_commit_id
+        self._next_commit_id += 1
+        self._pending_commits[commit_id] = filename
 
         try:
+            self._commit_conn.send((
+                commit_id, blk.apri.to_json(), blk.startn, len(blk), filename.name,
+                type(self)._blk_stats(blk.segment), exists_ok, dups_ok
+            ))
 
-            if reencode:
-                apri_json = self._relational_encode_info(apri, r_txn)
+        except BaseException:
 
-        except DataNotFoundError:
-            add_apri = True
+            del self._pending_commits[commit_id]
+            filename.unlink(missing_ok = True)
+            raise
 
-        else:
+        self._recv_commit_acks(False)
+        return ret
 
-            apri_id_key = Register._get_apri_id_key(apri_json)
-            add_apri = not Register._disk_apri_key_exists(apri_id_key, r_txn)
+    def _recv_commit_acks(self, block):
 
-        filename = random_unique_filename(self._local_dir, suffix = type(self).file_suffix, length = 6)
+        while len(self._pending_commits) > 0 and (block or self._commit_conn.poll()):
 
-        if not add_apri:
+            for commit_id, error in self._commit_conn.recv():
 
-            try:
-                prefix = self._maxn_pre(apri, apri_json, False, r_txn)
+                filename = self._pending_commits.pop(commit_id)
 
-            except DataNotFoundError: # if apri has no disk blks (used passed startn)
-                pass
+                if error is not None:
+                    # roll back
+                    filename.unlink(missing_ok = True)
+                    self._commit_errors.append(error)
 
-            else:
-                startn = self._maxn_disk(prefix, r_txn) + 1
+    def flush_commits(self):
+        """Wait until the commit service has acknowledged every `Block` that this process added with `add_disk_blk`.
+        This is called when the `Register` is closed.
 
-            blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn, length, r_txn)
+        :raises DataExistsError: If the commit service rejected a `Block` because it duplicates another one. The data
+        file of each rejected `Block` is deleted.
+        :raises RegisterError: If the commit service failed to commit a `Block` for any other reason.
+        """
 
-        else:
-            blk_key = compressed_key = None
+        if self._commit_conn is None:
+            return
 
-        return blk_key, compressed_key, filename, add_apri, startn
+        self._recv_commit_acks(True)
 
-    def _check_blk_open_raise(self, blk, method_name):
+        if len(self._commit_errors) > 0:
 
-        if blk._num_entered == 0:
-            raise BlockNotOpenError(f"You must do `with blk:` before you call `{self._shorthand}.{method_name}()`.")
+            errors = self._commit_errors
+            self._commit_errors = []
+            error_cls = DataExistsError if all(name == "DataExistsError" for name, _ in errors) else RegisterError
+            raise error_cls(
+                f"The commit service rejected {len(errors)} `Block`(s). The first error was :\n{errors[0][1]}"
+            )
 
-    def _blk_metadata_pre(self, apri, apri_json, reencode, startn, length, r_txn):
+    def _serve_commits(self, listener, stop_conn, batch_size):
+        """Run the commit service: receive the metadata of `Block`s whose data was written by other processes, and
+        commit it in batches of up to `batch_size` per write transaction, until `stop_conn` receives a message."""
 
-        errmsg = self._blk_not_found_err_msg(False, True, False, apri, startn, length, None)
+        conns = []
+        accepted = deque()
+        wake_conn, wake_conn_ = multiprocessing.Pipe(False)
 
-        if reencode:
-            apri_json = self._relational_encode_info(apri, r_txn)
+        def accept():
 
-        if not Register._disk_apri_key_exists(Register._get_apri_id_key(apri_json), r_txn):
-            raise DataNotFoundError(errmsg)
+            while True:
 
-        startn_, length_ = self._resolve_startn_length_disk(apri, apri_json, False, startn, length, r_txn)
+                try:
+                    accepted.append(listener.accept())
 
-        if startn_ is None:
-            raise DataNotFoundError(errmsg)
+                except OSError: # `listener` was closed
+                    return
 
-        blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn_, length_, r_txn)
-        blk_filename, compressed_filename = self._get_disk_blk_filenames(blk_key, compressed_key, True, r_txn)
+                wake_conn_.send_bytes(b"")
 
-        return blk_filename, compressed_filename
+        threading.Thread(target = accept, daemon = True).start()
+        stop = False
 
-    @staticmethod
-    def _blk_metadata_disk(blk_filename, compressed_filename):
+        while not stop:
 
-        if compressed_filename is None:
-            return FileMetadata.from_path(blk_filename)
+            ready = multiprocessing.connection.wait([stop_conn, wake_conn] + conns)
+            stop = stop_conn in ready
 
-        else:
-            return FileMetadata.from_path(compressed_filename)
+            while wake_conn.poll():
+                wake_conn.recv_bytes()
 
-    def _blk_metadata_recursive(self, apri, startn, length, r_txn):
+            while len(accepted) > 0:
+                conns.append(accepted.popleft())
 
-        for subreg, ro_txn in self._subregs_bfs(True, r_txn):
+            records = []
 
-            try:
-                blk_filename, compressed_filename = subreg._blk_metadata_pre(apri, None, True, startn, length, r_txn)
+            for conn in list(conns):
 
-            except DataNotFoundError:
-                pass
+                try:
 
-            else:
-                return Register._blk_metadata_disk(blk_filename, compressed_filename)
+                    while conn.poll():
+                        records.append((conn, conn.recv()))
 
-        raise DataNotFoundError(self._blk_not_found_err_msg(False, True, True, apri, startn, length, None))
+                except (EOFError, OSError):
+                    conns.remove(conn)
 
-    def _rmv_disk_blk_pre(self, apri, apri_json, reencode, startn, length, ignore_errors, r_txn):
+            for i in range(0, len(records), batch_size):
+                self._commit_batch(records[i : i + batch_size])
 
-        errmsg = self._blk_not_found_err_msg(False, True, False, apri, startn, length, None)
+    def _commit_batch(self, records):
 
-        if reencode:
-            apri_json = self._relational_encode_info(apri, r_txn) # raises `DataNotFoundError` (see pattern VI.1)
+        acks = {}
 
-        startn_, length_ = self._resolve_startn_length_disk(apri, apri_json, False, startn, length, r_txn)
+        try:
 
-        if startn_ is None:
-            raise DataNotFoundError(errmsg) # see pattern VI.1
+            with self._txn("writer") as rw_txn:
 
-        blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn_, length_, r_txn)
+                for conn, record in records:
+                    acks.setdefault(conn, []).append((record[0], self._commit_record(record, rw_txn)))
 
-        if not Register._disk_blk_keys_exist(blk_key, compressed_key, r_txn):
-            raise DataNotFoundError(errmsg)
+        except Exception as e:
 
-        blk_filename, compressed_filename = self._get_disk_blk_filenames(blk_key, compressed_key, not ignore_errors, r_txn)
+            if len(records) > 1:
+                # a failure part way through a record leaves the transaction in an unknown state, so fall back to one
+                # transaction per record
+                for conn_record in records:
+                    self._commit_batch([conn_record])
 
-        if blk_filename is not None and not is_deletable(blk_filename):
-            raise OSError(f"Cannot delete `Block` file `{blk_filename}`.")
+                return
 
-        if compressed_filename is not None and not is_deletable(compressed_filename):
-            raise OSError(f"Cannot delete compressed `Block` file `{compressed_filename}`.")
+            conn, record = records[0]
+            acks = {conn : [(record[0], (type(e).__name__, str(e)))]}
 
-        return startn_, length_, blk_key, compressed_key, blk_filename, compressed_filename
+        for conn, acks_ in acks.items():
 
-    @staticmethod
-    def _rmv_disk_blk_disk(blk_key, compressed_key, rw_txn):
+            try:
+                conn.send(acks_)
 
-        rw_txn.delete(blk_key)
-        rw_txn.delete(compressed_key)
+            except OSError:
+                pass # that process has died
 
-    @classmethod
-    def _rmv_disk_blk_disk2(cls, blk_filename, compressed_filename, kwargs):
+    def _commit_record(self, record, rw_txn):
+
+        _, apri_json, startn, length, filename, stats, exists_ok, dups_ok = record
+        apri = ApriInfo.from_json(apri_json)
+        filename = self._local_dir / filename
+
+        try:
+            blk_key, compressed_key, _, add_apri = self._add_disk_blk_pre(
+                apri, None, True, startn, length, exists_ok, dups_ok, rw_txn
+            )
+
+        except DataExistsError as e:
+            return type(e).__name__, str(e)
+
+        self._add_disk_blk_disk(
+            apri, startn, length, blk_key, compressed_key, filename, add_apri, _DiskSeg(type(self), filename), rw_txn,
+            stats
+        )
+        return None
+
+    def _map_blks_pre(self, src_apri, dst_reg, dst_apri, decompress, r_txn, dst_r_txn):
+
+        try:
+            src_prefix = self._intervals_pre(src_apri, None, True, r_txn)
+
+        except DataNotFoundError:
+            return []
+
+        try:
+            dst_apri_json = dst_reg._relational_encode_info(dst_apri, dst_r_txn)
+
+        except DataNotFoundError:
+            dst_apri_json = None
+
+        tasks = []
+        filenames = set()
+
+        for startn, length in self._intervals_disk(src_prefix, r_txn):
+
+            if (
+                dst_reg._key_format == _DECIMAL_KEY_FORMAT and
+                startn // dst_reg._startn_tail_mod != dst_reg._startn_head
+            ):
+                raise IndexError(
+                    f"`startn` = {startn} does not have the correct head for `dst_reg`. Please see the method "
+                    f"`set_startn_info` to troubleshoot this error."
+                )
+
+            if length > dst_reg._max_length:
+                raise ValueError(
+                    f"The disk `Block` with `startn` = {startn} has length {length}, but `dst_reg` allows a length of "
+                    f"at most {dst_reg._max_length}."
+                )
+
+            if dst_apri_json is not None:
+
+                blk_key, _ = dst_reg._get_disk_blk_keys(dst_apri, dst_apri_json, False, startn, length, dst_r_txn)
+
+                if blk_key is not None and r_txn_has_key(blk_key, dst_r_txn):
+                    continue
+
+            blk_filename, compressed_filename, _, is_compressed = self._blk_pre(
+                src_apri, None, True, startn, length, decompress, r_txn
+            )
+
+            while True:
+
+                filename = random_unique_filename(
+                    dst_reg._local_dir, suffix = type(dst_reg).file_suffix, length = 6
+                )
+
+                if filename not in filenames:
+                    break
+
+            filenames.add(filename)
+            tasks.append((startn, blk_filename, compressed_filename, is_compressed, filename))
+
+        return tasks
+
+    def _map_blks_commit(self, apri, batch):
+
+        rrw_txn = None
+
+        try:
+
+            with self._txn("reversible") as rrw_txn:
+                self._map_blks_disk(apri, batch, rrw_txn)
+
+        except BaseException as e:
+
+            if rrw_txn is not None:
+
+                with self._txn("writer") as rw_txn:
+                    ee = self._add_disk_blk_error(None, rw_txn, rrw_txn, e)
+
+                raise ee
+
+            else:
+                raise
+
+    def _map_blks_disk(self, apri, batch, rw_txn):
+
+        try:
+            apri_json = self._relational_encode_info(apri, rw_txn)
+
+        except DataNotFoundError:
+            add_apri = True
+
+        else:
+            add_apri = not Register._disk_apri_key_exists(Register._get_apri_id_key(apri_json), rw_txn)
+
+        if add_apri:
+
+            self._add_apri_disk(apri, [], False, rw_txn)
+            apri_json = self._relational_encode_info(apri, rw_txn)
+
+        for startn, length, filename, stats in batch:
+
+            blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn, length, rw_txn)
+            rw_txn.put(blk_key, filename.name.encode("ASCII"))
+            rw_txn.put(compressed_key, _IS_NOT_COMPRESSED_VAL)
+            Register._put_stats_disk(blk_key, stats, rw_txn)
+            self._update_inverse_file_disk(apri, blk_key, filename, None, 1, rw_txn)
+
+    def _append_disk_blk_pre(self, apri, apri_json, reencode, startn, length, r_txn):
+
+        try:
+
+            if reencode:
+                apri_json = self._relational_encode_info(apri, r_txn)
+
+        except DataNotFoundError:
+            add_apri = True
+
+        else:
+
+            apri_id_key = Register._get_apri_id_key(apri_json)
+            add_apri = not Register._disk_apri_key_exists(apri_id_key, r_txn)
+
+        filename = random_unique_filename(self._local_dir, suffix = type(self).file_suffix, length = 6)
+
+        if not add_apri:
+
+            try:
+                prefix = self._maxn_pre(apri, apri_json, False, r_txn)
+
+            except DataNotFoundError: # if apri has no disk blks (used passed startn)
+                pass
+
+            else:
+                startn = self._maxn_disk(prefix, r_txn) + 1
+
+            blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn, length, r_txn)
+
+        else:
+            blk_key = compressed_key = None
+
+        return blk_key, compressed_key, filename, add_apri, startn
+
+    def _check_blk_open_raise(self, blk, method_name):
+
+        if blk._num_entered == 0:
+            raise BlockNotOpenError(f"You must do `with blk:` before you call `{self._shorthand}.{method_name}()`.")
+
+    def _blk_metadata_pre(self, apri, apri_json, reencode, startn, length, r_txn):
+
+        errmsg = self._blk_not_found_err_msg(False, True, False, apri, startn, length, None)
+
+        if reencode:
+            apri_json = self._relational_encode_info(apri, r_txn)
+
+        if not Register._disk_apri_key_exists(Register._get_apri_id_key(apri_json), r_txn):
+            raise DataNotFoundError(errmsg)
+
+        startn_, length_ = self._resolve_startn_length_disk(apri, apri_json, False, startn, length, r_txn)
+
+        if startn_ is None:
+            raise DataNotFoundError(errmsg)
+
+        blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn_, length_, r_txn)
+        blk_filename, compressed_filename = self._get_disk_blk_filenames(blk_key, compressed_key, True, r_txn)
+
+        return blk_filename, compressed_filename
+
+    @staticmethod
+    def _blk_metadata_disk(blk_filename, compressed_filename):
+
+        if compressed_filename is None:
+            return FileMetadata.from_path(blk_filename)
+
+        else:
+            return FileMetadata.from_path(compressed_filename)
+
+    def _blk_metadata_recursive(self, apri, startn, length, r_txn):
+
+        for subreg, ro_txn in self._subregs_bfs(True, r_txn):
+
+            try:
+                blk_filename, compressed_filename = subreg._blk_metadata_pre(apri, None, True, startn, length, r_txn)
+
+            except DataNotFoundError:
+                pass
+
+            else:
+                return Register._blk_metadata_disk(blk_filename, compressed_filename)
+
+        raise DataNotFoundError(self._blk_not_found_err_msg(False, True, True, apri, startn, length, None))
+
+    def _rmv_disk_blk_pre(self, apri, apri_json, reencode, startn, length, ignore_errors, r_txn):
+
+        errmsg = self._blk_not_found_err_msg(False, True, False, apri, startn, length, None)
+
+        if reencode:
+            apri_json = self._relational_encode_info(apri, r_txn) # raises `DataNotFoundError` (see pattern VI.1)
+
+        startn_, length_ = self._resolve_startn_length_disk(apri, apri_json, False, startn, length, r_txn)
+
+        if startn_ is None:
+            raise DataNotFoundError(errmsg) # see pattern VI.1
+
+        blk_key, compressed_key = self._get_disk_blk_keys(apri, apri_json, False, startn_, length_, r_txn)
+
+        if not Register._disk_blk_keys_exist(blk_key, compressed_key, r_txn):
+            raise DataNotFoundError(errmsg)
+
+        blk_filename, compressed_filename = self._get_disk_blk_filenames(blk_key, compressed_key, not ignore_errors, r_txn)
+
+        if blk_filename is not None and not is_deletable(blk_filename):
+            raise OSError(f"Cannot delete `Block` file `{blk_filename}`.")
+
+        if compressed_filename is not None and not is_deletable(compressed_filename):
+            raise OSError(f"Cannot delete compressed `Block` file `{compressed_filename}`.")
+
+        return startn_, length_, blk_key, compressed_key, blk_filename, compressed_filename
+
+    @staticmethod
+    def _rmv_disk_blk_disk(blk_key, compressed_key, rw_txn):
+
+        rw_txn.delete(blk_key)
+        rw_txn.delete(compressed_key)
+        rw_txn.delete(Register._get_stats_key(blk_key))
+
+    @classmethod
+    def _rmv_disk_blk_disk2(cls, blk_filename, compressed_filename, kwargs):
 
         if _debug == 1:
             raise KeyboardInterrupt
@@ -3309,11 +4473,117 @@ class Register(ABC):
 
         else:
 
-            tail = bytify_int(startn % self._startn_tail_mod, self._startn_tail_length)
-            op_length = bytify_int(self._max_length - length, self._length_length)
-            suffix = apri_id + _KEY_SEP + tail + _KEY_SEP + op_length
+            if self._key_format == _BINARY_KEY_FORMAT:
+
+                if not 0 <= startn <= _BINARY_MAX_INT:
+                    raise ValueError(f"`startn` must be at most {_BINARY_MAX_INT}.")
+
+                suffix = (
+                    apri_id +
+                    startn.to_bytes(_BINARY_INT_LEN, "big") +
+                    (self._max_length - length).to_bytes(_BINARY_INT_LEN, "big")
+                )
+
+            else:
+
+                tail = bytify_int(startn % self._startn_tail_mod, self._startn_tail_length)
+                op_length = bytify_int(self._max_length - length, self._length_length)
+                suffix = apri_id + _KEY_SEP + tail + _KEY_SEP + op_length
+
             return _BLK_KEY_PREFIX + suffix, _COMPRESSED_KEY_PREFIX + suffix
 
+    @staticmethod
+    def _get_stats_key(blk_key):
+        return _STATS_KEY_PREFIX + blk_key[_BLK_KEY_PREFIX_LEN : ]
+
+    @staticmethod
+    def _get_stats_disk(blk_key, r_txn):
+        """
+        :return: (type `tuple`) `(min, max, sum, count)` of the disk `Block` whose key is `blk_key`, or `None` if those
+        statistics are not recorded.
+        """
+
+        val = r_txn.get(Register._get_stats_key(blk_key), default = None)
+
+        if val is None:
+            return None
+
+        else:
+            return tuple(json.loads(val.decode("ASCII")))
+
+    @staticmethod
+    def _put_stats_disk(blk_key, stats, rw_txn):
+
+        if stats is not None:
+            rw_txn.put(Register._get_stats_key(blk_key), json.dumps(list(stats)).encode("ASCII"))
+
+        else:
+            rw_txn.delete(Register._get_stats_key(blk_key))
+
+    @classmethod
+    def _blk_stats(cls, seg):
+        """Calculate the statistics recorded by `add_disk_blk` for the segment `seg`. Subclasses that can summarize their
+        segments should override this method.
+
+        :return: (type `tuple`) `(min, max, sum, count)`, or `None` if no statistics are recorded for `seg`.
+        """
+        return None
+
+    @staticmethod
+    def _get_has_inverse_key(apri_id):
+        return _HAS_INVERSE_KEY_PREFIX + apri_id
+
+    @staticmethod
+    def _get_inverse_prefix(apri_id, value = None):
+
+        prefix = _INVERSE_KEY_PREFIX + apri_id + _KEY_SEP
+
+        if value is not None:
+            prefix += bytify_int(value + _INVERSE_VALUE_OFFSET, _INVERSE_INT_LENGTH) + _KEY_SEP
+
+        return prefix
+
+    def _update_inverse_disk(self, apri_id, seg, startn, increment, rw_txn):
+        """If the apri whose ID is `apri_id` has an inverse index, then add `increment` to the count of each entry
+        `(seg[i], startn + i)`, deleting entries whose count drops to 0. The count of an entry is the number of disk
+        `Block`s that contain it.
+        """
+
+        if not r_txn_has_key(Register._get_has_inverse_key(apri_id), rw_txn):
+            return
+
+        seg = _check_inverse_seg_raise(seg)
+
+        for key in _split_inverse_keys(apri_id, _inverse_keys(apri_id, seg, startn)):
+
+            count = intify_bytes(rw_txn.get(key, default = b"0")) + increment
+
+            if count > 0:
+                rw_txn.put(key, bytify_int(count))
+
+            else:
+                rw_txn.delete(key)
+
+    def _update_inverse_blk_disk(self, blk_key, seg, increment, rw_txn):
+
+        apri_id, _, _ = self._get_raw_startn_length(_BLK_KEY_PREFIX_LEN, blk_key)
+        startn, _ = self._get_startn_length(_BLK_KEY_PREFIX_LEN, blk_key)
+        self._update_inverse_disk(apri_id, seg, startn, increment, rw_txn)
+
+    def _update_inverse_file_disk(self, apri, blk_key, blk_filename, compressed_filename, increment, rw_txn):
+        """Like `Register._update_inverse_blk_disk`, but only loads the disk `Block` if there is an inverse index."""
+
+        apri_id, _, _ = self._get_raw_startn_length(_BLK_KEY_PREFIX_LEN, blk_key)
+
+        if r_txn_has_key(Register._get_has_inverse_key(apri_id), rw_txn):
+
+            startn, _ = self._get_startn_length(_BLK_KEY_PREFIX_LEN, blk_key)
+
+            with type(self)._blk_disk2(
+                blk_filename, compressed_filename, apri, startn, compressed_filename is not None, False, {}
+            ) as blk:
+                self._update_inverse_disk(apri_id, blk.segment, startn, increment, rw_txn)
+
     def _num_disk_blks(self, apri, apri_json, reencode, r_txn):
 
         try:
@@ -3342,7 +4612,7 @@ class Register(ABC):
         """
 
         try:
-            prefix += self._get_apri_id(apri, apri_json, reencode, r_txn) + _KEY_SEP
+            prefix += self._get_apri_id(apri, apri_json, reencode, r_txn) + _KEY_SEP[ : self._key_sep_len()]
 
         except DataNotFoundError: # see pattern VI.1
             pass # see pattern VI.3
@@ -3352,15 +4622,22 @@ class Register(ABC):
             with r_txn_prefix_iter(prefix, r_txn) as it:
                 yield from it
 
+    def _key_sep_len(self):
+        return 0 if self._key_format == _BINARY_KEY_FORMAT else _KEY_SEP_LEN
+
+    def _startn_len(self):
+        return _BINARY_INT_LEN if self._key_format == _BINARY_KEY_FORMAT else self._startn_tail_length
+
     def _get_raw_startn_length(self, prefix_len, key):
 
+        sep_len = self._key_sep_len()
         stop1 = prefix_len + self._max_apri_len
-        stop2 = stop1 + _KEY_SEP_LEN + self._startn_tail_length
+        stop2 = stop1 + sep_len + self._startn_len()
 
         return (
-            key[prefix_len           : stop1], # apri id
-            key[stop1 + _KEY_SEP_LEN : stop2], # startn
-            key[stop2 + _KEY_SEP_LEN : ] # op_length
+            key[prefix_len       : stop1], # apri id
+            key[stop1 + sep_len  : stop2], # startn
+            key[stop2 + sep_len  : ] # op_length
         )
 
     @staticmethod
@@ -3383,6 +4660,12 @@ class Register(ABC):
 
         _, startn_bytes, op_length_bytes = self._get_raw_startn_length(prefix_len, key)
 
+        if self._key_format == _BINARY_KEY_FORMAT:
+            return (
+                int.from_bytes(startn_bytes, "big"),
+                self._max_length - int.from_bytes(op_length_bytes, "big")
+            )
+
         return (
             intify_bytes(startn_bytes) + self._startn_head * self._startn_tail_mod,
             self._max_length - intify_bytes(op_length_bytes)
@@ -3511,14 +4794,31 @@ class Register(ABC):
         for apri in self._apris_ram():
             self._ram_blks[apri] = []
 
-    #################################
-    #    PROTEC RAM BLK METHODS     #
+    def flush_ram_blk(self, blk, exists_ok = False, dups_ok = True, ret_metadata = False, timeout = None, **kwargs):
+        """Save the RAM `Block` `blk` as one disk `Block` and remove it from RAM, for example a `SharedBlock` after
+        `parallelize` has filled it. The parameters are as for `add_disk_blk`.
+        """
 
-    #################################
-    # PUBLIC RAM & DISK BLK METHODS #
+        self._check_open_raise("flush_ram_blk")
+        self._check_readwrite_raise("flush_ram_blk")
+        self.rmv_ram_blk(blk)
 
-    @contextmanager
-    def blk_by_n(self, apri, n, decompress = False, diskonly = False, recursively = False, ret_metadata = False, timeout = None, **kwargs):
+        try:
+            return self.add_disk_blk(blk, exists_ok, dups_ok, ret_metadata, timeout, **kwargs)
+
+        except BaseException:
+
+            self.add_ram_blk(blk)
+            raise
+
+    #################################
+    #    PROTEC RAM BLK METHODS     #
+
+    #################################
+    # PUBLIC RAM & DISK BLK METHODS #
+
+    @contextmanager
+    def blk_by_n(self, apri, n, decompress = False, diskonly = False, recursively = False, ret_metadata = False, timeout = None, **kwargs):
 
         with ExitStack() as post_yield:
 
@@ -3787,6 +5087,65 @@ class Register(ABC):
 
                 raise DataNotFoundError(self._blk_not_found_err_msg(not diskonly, True, False, apri, None, None, n))
 
+    def get_many(self, apri, ns, decompress = False, diskonly = False, num_threads = None, **kwargs):
+        """Equivalent to `[self.get(apri, n, decompress, diskonly, **kwargs) for n in ns]`, except that the reads are
+        spread over a pool of threads of this process, each using its own read transaction.
+
+        :param apri: (type `ApriInfo`)
+        :param ns: (type `list` of `int`)
+        :param num_threads: (type `int`, optional) Positive. Default is `ThreadPoolExecutor`'s.
+        :return: (type `list`)
+        """
+
+        self._check_open_raise("get_many")
+        check_type(apri, "apri", ApriInfo)
+        ns = [check_return_int(n, "n") for n in ns]
+        check_type(decompress, 'decompress', bool)
+        check_type(diskonly, "diskonly", bool)
+        num_threads = check_return_int_None_default(num_threads, "num_threads", None)
+
+        if num_threads is not None and num_threads <= 0:
+            raise ValueError("`num_threads` must be positive.")
+
+        with ThreadPoolExecutor(num_threads) as executor:
+            return list(executor.map(lambda n: self.get(apri, n, decompress, diskonly, **kwargs), ns))
+
+    def blks_parallel(
+        self, apri, fn, decompress = False, diskonly = False, recursively = False, num_threads = None, **kwargs
+    ):
+        """Call `fn(blk)` for every `Block` of `apri`, spread over a pool of threads of this process, each using its
+        own read transaction. `fn` must not keep a reference to `blk`, which is closed after `fn` returns.
+
+        :param apri: (type `ApriInfo`)
+        :param fn: (type `callable`)
+        :param num_threads: (type `int`, optional) Positive. Default is `ThreadPoolExecutor`'s.
+        :return: (type `list`) The return values of `fn`, sorted by `startn` and then `length` of the `Block`.
+        """
+
+        self._check_open_raise("blks_parallel")
+        check_type(apri, "apri", ApriInfo)
+
+        if not callable(fn):
+            raise TypeError("`fn` must be callable.")
+
+        check_type(decompress, 'decompress', bool)
+        check_type(diskonly, "diskonly", bool)
+        check_type(recursively, "recursively", bool)
+        num_threads = check_return_int_None_default(num_threads, "num_threads", None)
+
+        if num_threads is not None and num_threads <= 0:
+            raise ValueError("`num_threads` must be positive.")
+
+        intervals = sorted(set(self.intervals(apri, diskonly = diskonly, recursively = recursively)))
+
+        def call(interval):
+
+            with self.blk(apri, *interval, decompress, diskonly, recursively, **kwargs) as blk:
+                return fn(blk)
+
+        with ThreadPoolExecutor(num_threads) as executor:
+            return list(executor.map(call, intervals))
+
     def __setitem__(self, apri_n_diskonly, value):
 
         apri, n, diskonly = Register._resolve_apri_n_diskonly(apri_n_diskonly)
@@ -3814,6 +5173,8 @@ class Register(ABC):
                     blk[n] = value
                     return
 
+            self._check_readwrite_raise("set")
+
             with ExitStack() as blk_stack:
 
                 with self._txn("reader") as ro_txn:
@@ -3842,6 +5203,7 @@ class Register(ABC):
                             )
                             blk_stack.enter_context(blk)
                             length = len(blk)
+                            old_value = blk[n]
                             blk[n] = value
 
                             try:
@@ -3852,9 +5214,19 @@ class Register(ABC):
                             except DataNotFoundError as e:
                                 raise RegisterError from e # see pattern IV.4
 
+                            old_stats = Register._get_stats_disk(blk_key, ro_txn)
+                            apri_id, _, _ = self._get_raw_startn_length(_BLK_KEY_PREFIX_LEN, blk_key)
+                            has_inverse = r_txn_has_key(Register._get_has_inverse_key(apri_id), ro_txn)
+
                 if to_raise:
                     raise DataNotFoundError(self._blk_not_found_err_msg(not diskonly, True, False, apri, None, None, n))
 
+                if old_stats is not None:
+                    # the file cannot be written in the same transaction, so the stats are deleted first, lest a query
+                    # prune the `Block` using stats that no longer hold
+                    with self._txn("writer") as rw_txn:
+                        Register._put_stats_disk(blk_key, None, rw_txn)
+
                 try:
                     type(self)._rmv_disk_blk_disk2(blk_filename, compressed_filename, kwargs)
 
@@ -3872,6 +5244,16 @@ class Register(ABC):
                 except BaseException as e:
                     raise RegisterRecoveryError from e
 
+                new_stats = type(self)._blk_stats(blk.segment)
+
+                if old_stats is not None or new_stats is not None or has_inverse:
+
+                    with self._txn("writer") as rw_txn:
+
+                        Register._put_stats_disk(blk_key, new_stats, rw_txn)
+                        self._update_inverse_disk(apri_id, [old_value], n, -1, rw_txn)
+                        self._update_inverse_disk(apri_id, [blk[n]], n, 1, rw_txn)
+
     def intervals(self, apri, sort = False, combine = False, diskonly = False, recursively = False):
 
         self._check_open_raise("intervals")
@@ -3931,6 +5313,52 @@ class Register(ABC):
         check_type(recursively, "recursively", bool)
         return sum(length for _, length in self.intervals(apri, False, combine, diskonly, recursively))
 
+    def gaps(self, apri, start, stop, diskonly = False, recursively = False):
+        """Find the ranges of indices `start <= n < stop` that are not contained in any `Block` of `apri`.
+
+        :param apri: (type `ApriInfo`)
+        :param start: (type `int`) Non-negative.
+        :param stop: (type `int`) Non-negative.
+        :return: (type `list`) Sorted, disjoint pairs `(startn, length)`.
+        """
+
+        self._check_open_raise("gaps")
+        check_type(apri, "apri", ApriInfo)
+        start = check_return_int(start, "start")
+        stop = check_return_int(stop, "stop")
+        check_type(diskonly, "diskonly", bool)
+        check_type(recursively, "recursively", bool)
+
+        if start < 0:
+            raise ValueError("`start` must be non-negative.")
+
+        if stop < 0:
+            raise ValueError("`stop` must be non-negative.")
+
+        try:
+            intervals = list(self.intervals(apri, True, True, diskonly, recursively))
+
+        except DataNotFoundError:
+            intervals = []
+
+        ret = []
+        n = start
+
+        for startn, length in intervals:
+
+            if n >= stop:
+                break
+
+            if startn > n:
+                ret.append((n, min(startn, stop) - n))
+
+            n = max(n, startn + length)
+
+        if n < stop:
+            ret.append((n, stop - n))
+
+        return ret
+
     def num_blks(self, apri, diskonly = False, recursively = False):
 
         self._check_open_raise("num_blks")
@@ -4240,6 +5668,174 @@ class Register(ABC):
                         if stop is not None and n >= stop:
                             return
 
+    def _iter_pieces_pre(self, apri, start, stop, contiguous, diskonly, decompress, r_txn):
+        """Decide which `Block` supplies each index `start <= n < stop`. RAM `Block`s take precedence over disk `Block`s
+        (see pattern VII.2) and, among overlapping disk `Block`s, the one that reaches furthest is preferred, so that
+        each disk `Block` is used for exactly one contiguous run of indices.
+
+        :param start: (type `int`) If `None`, then start from the least index of this `Register`.
+        :param stop: (type `int`) If `None`, then continue until the first index not belonging to any `Block` (if
+        `contiguous`) or until the greatest index of this `Register` (if not `contiguous`).
+        :param contiguous: (type `bool`) Whether to stop at the first index not belonging to any `Block`, rather than
+        skip to the next `Block`.
+        :return: (type `list`) Tuples `(piece_start, piece_stop, src)`, ordered by `piece_start`. If `contiguous`, then
+        each `piece_stop` is the next `piece_start`. `src` is either a RAM `Block` or a tuple `(blk_filename,
+        compressed_filename, startn, length, is_compressed, stats)`, where `stats` is the return value of
+        `Register._get_stats_disk`.
+        """
+
+        ram = []
+        disk = []
+
+        if not diskonly:
+
+            for blk in self._blks_ram(apri):
+
+                try:
+                    blk_len = len(blk)
+
+                except BlockNotOpenError as e:
+                    raise BlockNotOpenError(_RAM_BLOCK_NOT_OPEN_ERROR_MESSAGE.format(apri, blk.startn)) from e
+
+                if blk_len > 0:
+                    ram.append((blk.startn, blk.startn + blk_len, blk))
+
+        try:
+            apri_json = self._relational_encode_info(apri, r_txn)
+
+        except DataNotFoundError:
+            apri_json = None
+
+        else:
+
+            prefix = self._intervals_pre(apri, apri_json, False, r_txn)
+
+            for startn, length in self._intervals_disk(prefix, r_txn):
+
+                if length > 0 and (start is None or startn + length > start) and (stop is None or startn < stop):
+                    disk.append((startn, startn + length))
+
+        if start is None:
+
+            if len(ram) == 0 and len(disk) == 0:
+                return []
+
+            start = min(itertools.chain((s for s, _, _ in ram), (s for s, _ in disk)))
+
+        disk.sort()
+        disk_index = 0
+        furthest = None # disk interval with `startn <= n` that reaches furthest
+        plan = []
+        srcs = {}
+        n = start
+
+        while stop is None or n < stop:
+
+            while disk_index < len(disk) and disk[disk_index][0] <= n:
+
+                if furthest is None or disk[disk_index][1] > furthest[1]:
+                    furthest = disk[disk_index]
+
+                disk_index += 1
+
+            for startn, end, blk in ram:
+
+                if startn <= n < end:
+
+                    piece_stop = end
+                    src = blk
+                    break
+
+            else:
+
+                if furthest is None or furthest[1] <= n:
+
+                    if contiguous:
+                        break
+
+                    next_starts = [startn for startn, _, _ in ram if startn > n]
+
+                    if disk_index < len(disk):
+                        next_starts.append(disk[disk_index][0])
+
+                    if len(next_starts) == 0 or (stop is not None and min(next_starts) >= stop):
+                        break
+
+                    n = min(next_starts)
+                    continue
+
+                piece_stop = min(itertools.chain(
+                    (furthest[1],), (startn for startn, _, _ in ram if n < startn < furthest[1])
+                ))
+
+                if furthest not in srcs:
+
+                    startn, length = furthest[0], furthest[1] - furthest[0]
+                    blk_filename, compressed_filename, _, is_compressed = self._blk_pre(
+                        apri, apri_json, False, startn, length, decompress, r_txn
+                    )
+                    blk_key, _ = self._get_disk_blk_keys(apri, apri_json, False, startn, length, r_txn)
+                    srcs[furthest] = (
+                        blk_filename, compressed_filename, startn, length, is_compressed,
+                        Register._get_stats_disk(blk_key, r_txn)
+                    )
+
+                src = srcs[furthest]
+
+            if stop is not None:
+                piece_stop = min(piece_stop, stop)
+
+            plan.append((n, piece_stop, src))
+            n = piece_stop
+
+        return plan
+
+    def _check_pieces_raise(self, plan, apri, start, stop, diskonly):
+
+        if len(plan) == 0:
+
+            if start is not None or stop is not None:
+                raise DataNotFoundError(self._blk_not_found_err_msg(
+                    not diskonly, True, False, apri, None, None, 0 if start is None else start
+                ))
+
+            return
+
+        if stop is not None and plan[-1][1] < stop:
+            raise DataNotFoundError(
+                self._blk_not_found_err_msg(not diskonly, True, False, apri, None, None, plan[-1][1])
+            )
+
+    @classmethod
+    def _iter_pieces(cls, plan, apri, kwargs):
+        """Yield `(piece_start, seg)` for each element of `plan` (see `Register._iter_pieces_pre`), where `seg` holds the
+        values of the indices `piece_start <= n < piece_stop`. Each disk `Block` is loaded at most once.
+        """
+
+        curr_src = None
+
+        with ExitStack() as stack:
+
+            for piece_start, piece_stop, src in plan:
+
+                if isinstance(src, Block):
+                    seg_startn, seg = src.startn, src.segment
+
+                else:
+
+                    if src is not curr_src:
+
+                        stack.close()
+                        blk_filename, compressed_filename, startn, _, is_compressed, _ = src
+                        blk = stack.enter_context(cls._blk_disk2(
+                            blk_filename, compressed_filename, apri, startn, is_compressed, False, kwargs
+                        ))
+                        curr_src = src
+
+                    seg_startn, seg = blk.startn, blk.segment
+
+                yield piece_start, seg[piece_start - seg_startn : piece_stop - seg_startn]
+
     def _num_blks_ram(self, apri):
 
         if self.___contains___ram(apri):
@@ -4956,6 +6552,54 @@ class NumpyRegister(Register, file_suffix = ".npy"):
                 "https://numpy.org/doc/stable/reference/generated/numpy.memmap.html#numpy.memmap for more information."
             )
 
+    @classmethod
+    def _blk_stats(cls, seg):
+
+        if isinstance(seg, np.ndarray) and seg.ndim == 1 and len(seg) > 0 and seg.dtype.kind in "iuf":
+
+            min_, max_ = seg.min().item(), seg.max().item()
+
+            if min_ != min_ or max_ != max_: # NaN
+                return None
+
+            return min_, max_, _exact_sum(seg), len(seg)
+
+        else:
+            return None
+
+    def get(self, apri, n, decompress = False, diskonly = False, **kwargs):
+
+        if diskonly or len(self._virtual_apris) == 0 or apri not in self._virtual_apris:
+            return super().get(apri, n, decompress, diskonly, **kwargs)
+
+        elif isinstance(n, slice):
+
+            for index, name in [(n.start, "Start"), (n.stop, "Stop"), (n.step, "Step")]:
+
+                if index is not None and not is_int(index):
+                    raise TypeError(f"{name} index of slice must be an `int`.")
+
+                if index is not None and index < 0 and name != "Step":
+                    raise ValueError(f"{name} index cannot be negative.")
+
+            step = 1 if n.step is None else int(n.step)
+
+            if step <= 0:
+                raise ValueError("Step index of slice must be positive.")
+
+            return self._get_slice_virtual(apri, n.start, n.stop, step, decompress, kwargs)
+
+        else:
+
+            try:
+                return super().get(apri, n, decompress, False, **kwargs)
+
+            except DataNotFoundError:
+
+                n = check_return_int(n, "n")
+                startn, seg = self._virtual_chunk(apri, n)
+                return seg[n - startn]
+
     def set(self, apri, n, value, diskonly = False, **kwargs):
 
         mmap_mode = kwargs.get("mmap_mode", None)
@@ -4979,26 +6623,67 @@ class NumpyRegister(Register, file_suffix = ".npy"):
                     blk[n] = value
                     return
 
-            with self._txn("reader") as ro_txn:
+            self._check_readwrite_raise("set")
 
-                try:
-                    blk_filename, compressed_filename, startn, is_compressed = self._blk_by_n_pre(
-                        apri, None, True, n, False, ro_txn
-                    )
+            with ExitStack() as blk_stack:
 
-                except DataNotFoundError:
+                with self._txn("reader") as ro_txn:
+
+                    try:
+                        blk_filename, compressed_filename, startn, is_compressed = self._blk_by_n_pre(
+                            apri, None, True, n, False, ro_txn
+                        )
+
+                    except DataNotFoundError:
+                        found = False
+
+                    else:
+
+                        found = True
+                        blk = self._blk_disk2(
+                            blk_filename, compressed_filename, apri, startn, is_compressed, False, kwargs
+                        )
+                        blk_stack.enter_context(blk)
+                        blk_key, _ = self._get_disk_blk_keys(apri, None, True, startn, len(blk), ro_txn)
+                        stats = Register._get_stats_disk(blk_key, ro_txn)
+                        apri_id, _, _ = self._get_raw_startn_length(_BLK_KEY_PREFIX_LEN, blk_key)
+                        has_inverse = r_txn_has_key(Register._get_has_inverse_key(apri_id), ro_txn)
+
+                if not found:
+                    raise DataNotFoundError(self._blk_not_found_err_msg(not diskonly, True, False, apri, None, None, n))
+
+                if stats is not None:
+                    # as in `Register.set`, the stats are deleted before the file is written
+                    with self._txn("writer") as rw_txn:
+                        Register._put_stats_disk(blk_key, None, rw_txn)
+
+                if stats is not None or has_inverse:
+                    old_value = blk[n].item()
+
+                blk[n] = value
+
+                if stats is not None or has_inverse:
+                    new_value = blk[n].item()
+
+            if stats is not None or has_inverse:
+
+                if stats is None:
                     pass
 
-                else:
+                elif new_value != new_value: # NaN
+                    stats = None
 
-                    with self._blk_disk2(
-                        blk_filename, compressed_filename, apri, startn, is_compressed, False, kwargs
-                    ) as blk:
+                else:
+                    # `min` and `max` are only ever widened, so they remain valid bounds, even if not sharp
+                    stats = (
+                        min(stats[0], new_value), max(stats[1], new_value), stats[2] + new_value - old_value, stats[3]
+                    )
 
-                        blk[n] = value
-                        return
+                with self._txn("writer") as rw_txn:
 
-            raise DataNotFoundError(self._blk_not_found_err_msg(not diskonly, True, False, apri, None, None, n))
+                    Register._put_stats_disk(blk_key, stats, rw_txn)
+                    self._update_inverse_disk(apri_id, [old_value], n, -1, rw_txn)
+                    self._update_inverse_disk(apri_id, [new_value], n, 1, rw_txn)
 
     @contextmanager
     def blk(self, apri, startn = None, length = None, decompress = False, diskonly = False, recursively = False, ret_metadata = False, **kwargs):
@@ -5014,7 +6699,22 @@ class NumpyRegister(Register, file_suffix = ".npy"):
         :return: (type `File_Metadata`) If `ret_metadata is True`.
         """
 
-        with super().blk(apri, startn, length, decompress, diskonly, recursively, ret_metadata, **kwargs) as ret:
+        with ExitStack() as stack:
+
+            try:
+                ret = stack.enter_context(
+                    super().blk(apri, startn, length, decompress, diskonly, recursively, ret_metadata, **kwargs)
+                )
+
+            except DataNotFoundError:
+
+                if diskonly or len(self._virtual_apris) == 0 or apri not in self._virtual_apris:
+                    raise
+
+                ret = stack.enter_context(self._virtual_blk(apri, startn, length))
+
+                if ret_metadata:
+                    ret = (ret, None)
 
             if ret_metadata:
                 blk = ret[0]
@@ -5040,44 +6740,1348 @@ class NumpyRegister(Register, file_suffix = ".npy"):
                 else:
                     yield blk
 
-    def concat_disk_blks(self, apri, startn = None, length = None, delete = False, ret_metadata = False, **kwargs):
+    def add_virtual_apri(self, apri, fn, src_apris, blk_len = 100000, cache_size = 16):
+        """Declare a virtual `apri`, whose data is calculated on demand from the data of other `apri`s, for example
+        `reg[apri, n] == reg[apri1, n + 1] - reg[apri1, n]`. `NumpyRegister.get` (including slices) and
+        `NumpyRegister.blk` calculate a virtual `apri`'s data whenever it is not contained in any (real) `Block`. The
+        data is calculated in chunks `k * blk_len <= n < (k + 1) * blk_len`, the `cache_size` most recently used of
+        which are kept in RAM. Use `NumpyRegister.materialize` to save the data as disk `Block`s.
 
-        self._check_open_raise("concat_disk_blks")
-        self._check_readwrite_raise("concat_disk_blks")
+        Like RAM `Block`s, virtual `apri`s are not saved in the database, so they must be declared every time the
+        `Register` is opened. The cache is not updated if the data of `src_apris` changes.
+
+        :param apri: (type `ApriInfo`)
+        :param fn: (type `callable`) Called as `fn(seg1, seg2, ...)`, where `seg1, seg2, ...` are the data of
+        `src_apris` for the same range of indices. Returns a `numpy.ndarray` of the same length.
+        :param src_apris: (type `list`) Each element is either an `ApriInfo` or a pair `(ApriInfo, shift)`, in which case
+        the data of that `ApriInfo` is read at the indices `n + shift`. May include other virtual `apri`s.
+        :param blk_len: (type `int`, default 100000) Positive.
+        :param cache_size: (type `int`, default 16) Non-negative.
+        :raises ValueError: If `apri` is (indirectly) one of its own `src_apris`.
+        """
+
+        self._check_open_raise("add_virtual_apri")
         check_type(apri, "apri", ApriInfo)
-        startn = check_return_int_None_default(startn, "startn", None)
-        length = check_return_int_None_default(length, "length", None)
-        check_type(ret_metadata, "ret_metadata", bool)
+        blk_len = check_return_int(blk_len, "blk_len")
+        cache_size = check_return_int(cache_size, "cache_size")
 
-        if startn is not None and startn < 0:
-            raise ValueError("`startn` must be non-negative.")
+        if not callable(fn):
+            raise TypeError("`fn` must be callable.")
 
-        if length is not None and length < 0:
-            raise ValueError("`length` must be non-negative.")
+        if blk_len <= 0:
+            raise ValueError("`blk_len` must be positive.")
 
-        with self._txn("reader") as ro_txn:
-            ret = self._concat_disk_blks_pre(apri, None, True, startn, length, ro_txn)
+        if cache_size < 0:
+            raise ValueError("`cache_size` must be non-negative.")
 
-        combined_already, combined_blk_key, combined_compressed_key, combined_filename, combined_seg, del_keys, del_filenames = ret
-        rrw_txn = None
+        srcs = []
 
-        if combined_already:
+        for src in src_apris:
 
-            if ret_metadata:
-                return FileMetadata.from_path(combined_filename)
+            if isinstance(src, ApriInfo):
+                src, shift = src, 0
 
             else:
-                return None
 
-        try:
+                src, shift = src
+                check_type(src, "element of `src_apris`", ApriInfo)
+                shift = check_return_int(shift, "shift")
 
-            with self._txn("reversible") as rrw_txn:
-                self._concat_disk_blks_disk(
-                    combined_blk_key, combined_compressed_key, combined_filename, del_keys, delete, rrw_txn
-                )
+            srcs.append((src, shift))
 
-            return self._concat_disk_blks_disk2(
-                combined_seg, combined_filename, del_filenames, ret_metadata, delete, kwargs
+        if len(srcs) == 0:
+            raise ValueError("`src_apris` must be non-empty.")
+
+        queue = [src for src, _ in srcs]
+
+        while len(queue) > 0:
+
+            src = queue.pop()
+
+            if src == apri:
+                raise ValueError("A virtual `ApriInfo` cannot depend on itself.")
+
+            elif src in self._virtual_apris.keys():
+                queue.extend(src_ for src_, _ in self._virtual_apris[src][1])
+
+        self._virtual_apris[apri] = (fn, srcs, blk_len, cache_size, {})
+
+    def rmv_virtual_apri(self, apri):
+        """Undeclare a virtual `apri` (see `NumpyRegister.add_virtual_apri`) and clear its cache. Any `Block`s saved
+        by `NumpyRegister.materialize` are kept.
+
+        :param apri: (type `ApriInfo`)
+        :raises DataNotFoundError: If `apri` is not virtual.
+        """
+
+        self._check_open_raise("rmv_virtual_apri")
+        check_type(apri, "apri", ApriInfo)
+
+        if apri not in self._virtual_apris.keys():
+            raise DataNotFoundError(f"The following `ApriInfo` is not virtual :\n{apri}")
+
+        del self._virtual_apris[apri]
+
+    def materialize(self, apri, startn = None, length = None):
+        """Calculate the data of a virtual `apri` (see `NumpyRegister.add_virtual_apri`) and save it as disk `Block`s
+        of length `blk_len`. Afterwards, reads of `apri` use the disk `Block`s rather than calculating the data. Chunks
+        that disk `Block`s of `apri` already cover (e.g. from a previous call) are skipped without being calculated.
+
+        :param apri: (type `ApriInfo`)
+        :param startn: (type `int`, optional) Default is the least index for which all of `src_apris` have data.
+        :param length: (type `int`, optional) Default is until the greatest such index.
+        :raises DataNotFoundError: If `apri` is not virtual, or if some index between `startn` and `startn + length`
+        is not contained in some `Block` of `src_apris`.
+        """
+
+        self._check_open_raise("materialize")
+        self._check_readwrite_raise("materialize")
+        check_type(apri, "apri", ApriInfo)
+        startn = check_return_int_None_default(startn, "startn", None)
+        length = check_return_int_None_default(length, "length", None)
+
+        if apri not in self._virtual_apris.keys():
+            raise DataNotFoundError(f"The following `ApriInfo` is not virtual :\n{apri}")
+
+        blk_len = self._virtual_apris[apri][2]
+        ext_start, ext_stop = self._virtual_extent(apri)
+
+        if startn is None:
+            startn = ext_start
+
+        stop = ext_stop if length is None else startn + length
+        gaps = deque(self.gaps(apri, startn, stop, diskonly = True))
+        n = startn
+
+        while n < stop:
+
+            chunk_stop = min((n // blk_len + 1) * blk_len, stop)
+
+            while len(gaps) > 0 and gaps[0][0] + gaps[0][1] <= n:
+                gaps.popleft()
+
+            if len(gaps) > 0 and gaps[0][0] < chunk_stop: # not covered
+
+                with Block(self._compute_virtual(apri, n, chunk_stop), apri, n) as blk:
+                    self.add_disk_blk(blk)
+
+            n = chunk_stop
+
+    def _virtual_extent(self, apri):
+        """Return `(start, stop)`, where `start` is the least and `stop - 1` is the greatest index at which every
+        `src_apri` of the virtual `apri` has data (ignoring gaps)."""
+
+        if apri not in self._virtual_apris.keys():
+
+            intervals = list(self.intervals(apri, sort = True, combine = True))
+
+            if len(intervals) == 0:
+                raise DataNotFoundError(self._blk_not_found_err_msg(True, True, False, apri, None, None, None))
+
+            return intervals[0][0], intervals[-1][0] + intervals[-1][1]
+
+        start = 0
+        stop = None
+
+        for src, shift in self._virtual_apris[apri][1]:
+
+            src_start, src_stop = self._virtual_extent(src)
+            start = max(start, src_start - shift)
+            stop = src_stop - shift if stop is None else min(stop, src_stop - shift)
+
+        return start, max(start, stop)
+
+    def _compute_virtual(self, apri, startn, stopn):
+
+        fn, srcs, _, _, _ = self._virtual_apris[apri]
+        segs = []
+
+        for src, shift in srcs:
+
+            try:
+                segs.append(self.get_rows([src], startn + shift, stopn + shift)[src])
+
+            except DataNotFoundError:
+
+                if src not in self._virtual_apris.keys():
+                    raise
+
+                segs.append(self._compute_virtual(src, startn + shift, stopn + shift))
+
+        seg = np.asarray(fn(*segs))
+
+        if len(seg) != stopn - startn:
+            raise ValueError(
+                f"`fn` returned an array of length {len(seg)}, but {stopn - startn} was expected."
+            )
+
+        return seg
+
+    def _virtual_chunk(self, apri, n):
+        """Return `(startn, seg)`, the cached chunk of the virtual `apri` that contains `n`, calculating it if
+        necessary."""
+
+        _, _, blk_len, cache_size, cache = self._virtual_apris[apri]
+        k = n // blk_len
+
+        with self._lock:
+            # move to the end, so that the least recently used chunk is first
+            seg = cache.pop(k, None)
+
+        if seg is None:
+
+            ext_start, ext_stop = self._virtual_extent(apri)
+
+            if not (ext_start <= n < ext_stop):
+                raise DataNotFoundError(self._blk_not_found_err_msg(True, True, False, apri, None, None, n))
+
+            startn = max(k * blk_len, ext_start)
+            seg = (startn, self._compute_virtual(apri, startn, min((k + 1) * blk_len, ext_stop)))
+
+        if cache_size > 0:
+
+            with self._lock:
+
+                while len(cache) >= cache_size and k not in cache.keys():
+                    del cache[next(iter(cache))]
+
+                cache[k] = seg
+
+        if not (seg[0] <= n < seg[0] + len(seg[1])):
+            raise DataNotFoundError(self._blk_not_found_err_msg(True, True, False, apri, None, None, n))
+
+        return seg
+
+    @contextmanager
+    def _virtual_blk(self, apri, startn, length):
+
+        if startn is None:
+            startn = self._virtual_extent(apri)[0]
+
+        chunk_startn, seg = self._virtual_chunk(apri, startn)
+
+        if chunk_startn != startn or (length is not None and length != len(seg)):
+
+            if length is None:
+                length = chunk_startn + len(seg) - startn
+
+            seg = self._compute_virtual(apri, startn, startn + length)
+
+        with Block(seg, apri, startn) as blk:
+            yield blk
+
+    def _get_slice_virtual(self, apri, start, stop, step, decompress, kwargs):
+
+        ext_start, ext_stop = self._virtual_extent(apri)
+        n = ext_start if start is None else start
+        stop = ext_stop if stop is None else stop
+
+        while n < stop:
+
+            with ExitStack() as stack:
+
+                try:
+                    blk = stack.enter_context(self.blk_by_n(apri, n, decompress, **kwargs))
+
+                except DataNotFoundError:
+
+                    chunk_startn, seg = self._virtual_chunk(apri, n)
+                    blk = stack.enter_context(Block(seg, apri, chunk_startn))
+
+                blk_stop = min(blk.startn + len(blk), stop)
+
+                while n < blk_stop:
+
+                    yield blk[n]
+                    n += step
+
+    def memoize(self, apri, flush_len = 10000, vectorized = False):
+        """Decorator that saves the values of a function of a non-negative `int` `n` as the data of `apri`, so that
+        each value is calculated at most once across scripts.
+
+            @reg.memoize(ApriInfo(name = "partition numbers"))
+            def p(n):
+                ...
+
+        A call `p(n)` first looks up `n` among the `Block`s of `apri` that existed when `memoize` was called, using an
+        index held in RAM, so that no transaction is opened per call. Otherwise, `p(n)` is calculated and buffered in
+        RAM. Once `flush_len` values are buffered, when `p.flush()` is called, when a `with p:` block exits, or when
+        the `Register` is closed, the buffered values are added as disk `Block`s, one for each contiguous run of
+        indices. Scattered calls therefore add many short `Block`s (e.g. `p(30)` and `p(40)` add two `Block`s of length
+        1); call `p` on an array of consecutive indices, or use `Register.build`, to add long `Block`s instead.
+
+        `p` may also be called on an array of indices, in which case it returns an array of values.
+
+        :param apri: (type `ApriInfo`)
+        :param flush_len: (type `int`, default 10000) Positive.
+        :param vectorized: (type `bool`, default `False`) If `True`, then the decorated function is called once on the
+        `numpy.ndarray` of all indices that were not found, rather than once for each.
+        :return: (type `callable`) The decorator.
+        """
+
+        self._check_open_raise("memoize")
+        self._check_readwrite_raise("memoize")
+        check_type(apri, "apri", ApriInfo)
+        flush_len = check_return_int(flush_len, "flush_len")
+        check_type(vectorized, "vectorized", bool)
+
+        if flush_len <= 0:
+            raise ValueError("`flush_len` must be positive.")
+
+        def decorator(fn):
+
+            memoized = _MemoizedFunction(self, apri, fn, flush_len, vectorized)
+            self._memoized.append(memoized)
+            return memoized
+
+        return decorator
+
+    def windows(self, apri, size, step = 1, start = None, stop = None, decompress = False, diskonly = False, **kwargs):
+        """Iterate over the windows `reg[apri, n : n + size]` for `n = start, start + step, start + 2 * step, ...`,
+        regardless of how the data is split into `Block`s. A window lying inside a single `Block` is a view of that
+        `Block`'s segment (a `numpy.memmap` for disk `Block`s); only windows straddling a `Block` boundary are copied.
+        Each disk `Block` is loaded at most once.
+
+        :param apri: (type `ApriInfo`)
+        :param size: (type `int`) Positive length of each window.
+        :param step: (type `int`, default 1) Positive distance between the starts of consecutive windows.
+        :param start: (type `int`, optional) Default is the least index of `apri`.
+        :param stop: (type `int`, optional) No window contains `stop` or any later index. Default is the first index
+        following `start` that is not contained in any `Block`.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises DataNotFoundError: If some index between `start` and `stop` is not contained in any `Block`.
+        :return: (type `numpy.ndarray`) Each of length `size`.
+        """
+        yield from self._windows(apri, size, step, start, stop, False, decompress, diskonly, kwargs)
+
+    def iter_chunks(self, apri, chunk_len, start = None, stop = None, decompress = False, diskonly = False, **kwargs):
+        """Iterate over the consecutive chunks `reg[apri, n : n + chunk_len]`, regardless of how the data is split into
+        `Block`s. The final chunk may be shorter than `chunk_len`. See `NumpyRegister.windows` for when chunks are
+        copied.
+
+        :param apri: (type `ApriInfo`)
+        :param chunk_len: (type `int`) Positive.
+        :param start: (type `int`, optional) Default is the least index of `apri`.
+        :param stop: (type `int`, optional) Default is the first index following `start` that is not contained in any
+        `Block`.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises DataNotFoundError: If some index between `start` and `stop` is not contained in any `Block`.
+        :return: (type `numpy.ndarray`)
+        """
+        yield from self._windows(apri, chunk_len, chunk_len, start, stop, True, decompress, diskonly, kwargs)
+
+    def _windows(self, apri, size, step, start, stop, partial, decompress, diskonly, kwargs):
+
+        self._check_open_raise("windows")
+        check_type(apri, "apri", ApriInfo)
+        size = check_return_int(size, "size")
+        step = check_return_int(step, "step")
+        start = check_return_int_None_default(start, "start", None)
+        stop = check_return_int_None_default(stop, "stop", None)
+        check_type(decompress, "decompress", bool)
+        check_type(diskonly, "diskonly", bool)
+
+        if size <= 0:
+            raise ValueError("`size` must be positive.")
+
+        if step <= 0:
+            raise ValueError("`step` must be positive.")
+
+        if start is not None and start < 0:
+            raise ValueError("`start` must be non-negative.")
+
+        if stop is not None and stop < 0:
+            raise ValueError("`stop` must be non-negative.")
+
+        kwargs.setdefault("mmap_mode", "r")
+        self._check_mmap_mode_raise(kwargs["mmap_mode"])
+
+        if start is not None and stop is not None and start >= stop:
+            return
+
+        with self._txn("reader") as ro_txn:
+            plan = self._iter_pieces_pre(apri, start, stop, True, diskonly, decompress, ro_txn)
+
+        self._check_pieces_raise(plan, apri, start, stop, diskonly)
+        pieces = deque()
+        n = None
+        covered = None
+
+        for piece_start, seg in self._iter_pieces(plan, apri, kwargs):
+
+            if n is None:
+                n = piece_start
+
+            pieces.append((piece_start, np.asarray(seg) if not isinstance(seg, np.ndarray) else seg))
+            covered = piece_start + len(seg)
+
+            while n + size <= covered:
+
+                yield NumpyRegister._window(pieces, n, n + size)
+                n += step
+
+                while len(pieces) > 0 and pieces[0][0] + len(pieces[0][1]) <= n:
+                    pieces.popleft()
+
+        if partial and n is not None and n < covered:
+            yield NumpyRegister._window(pieces, n, covered)
+
+    @staticmethod
+    def _window(pieces, startn, stopn):
+
+        segs = []
+
+        for piece_start, seg in pieces:
+
+            lo = max(startn, piece_start)
+            hi = min(stopn, piece_start + len(seg))
+
+            if lo < hi:
+                segs.append(seg[lo - piece_start : hi - piece_start])
+
+        if len(segs) == 1:
+            return segs[0]
+
+        else:
+            return np.concatenate(segs, axis = 0)
+
+    def get_rows(self, apris, start, stop, decompress = False, diskonly = False, recursively = False, **kwargs):
+        """Get `reg[apri, start : stop]` for several `apri`s at once. The `Block`s of different `apri`s need not have
+        the same boundaries. If the indices `start <= n < stop` of some `apri` lie within a single `Block`, then its
+        array is a view of that `Block`'s segment (see `NumpyRegister.windows`).
+
+        :param apris: (type `list` of `ApriInfo`) No duplicates.
+        :param start: (type `int`)
+        :param stop: (type `int`)
+        :param recursively: (type `bool`, default `False`) Look up each `apri` not in this `Register` in its (open)
+        subregisters.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises DataNotFoundError: If some index between `start` and `stop` is not contained in any `Block` of some
+        `apri`.
+        :return: (type `dict`) Maps each `apri` to a `numpy.ndarray` of length `stop - start`.
+        """
+
+        ret = None
+
+        for ret in self._iter_rows("get_rows", apris, None, start, stop, decompress, diskonly, recursively, kwargs):
+            pass
+
+        if ret is None:
+            ret = {apri : np.empty(0) for apri in apris}
+
+        return ret
+
+    def iter_rows(
+        self, apris, chunk_len, start, stop, decompress = False, diskonly = False, recursively = False, **kwargs
+    ):
+        """Like `NumpyRegister.get_rows`, but iterate over the consecutive chunks of `chunk_len` indices, so that
+        ranges larger than RAM can be joined. Each `Block` is loaded at most once. The final chunk may be shorter than
+        `chunk_len`.
+
+        :param apris: (type `list` of `ApriInfo`) No duplicates.
+        :param chunk_len: (type `int`) Positive.
+        :param start: (type `int`)
+        :param stop: (type `int`)
+        :param recursively: (type `bool`, default `False`) See `NumpyRegister.get_rows`.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises DataNotFoundError: If some index between `start` and `stop` is not contained in any `Block` of some
+        `apri`.
+        :return: (type `dict`) Maps each `apri` to a `numpy.ndarray`, all of the same length.
+        """
+        yield from self._iter_rows(
+            "iter_rows", apris, chunk_len, start, stop, decompress, diskonly, recursively, kwargs
+        )
+
+    def _iter_rows(self, method_name, apris, chunk_len, start, stop, decompress, diskonly, recursively, kwargs):
+
+        self._check_open_raise(method_name)
+        apris = list(apris)
+
+        for apri in apris:
+            check_type(apri, "element of `apris`", ApriInfo)
+
+        if len(set(apris)) < len(apris):
+            raise ValueError("`apris` must not contain duplicates.")
+
+        start = check_return_int(start, "start")
+        stop = check_return_int(stop, "stop")
+        check_type(recursively, "recursively", bool)
+
+        if chunk_len is None:
+            chunk_len = max(stop - start, 1)
+
+        regs = []
+
+        for apri in apris:
+
+            if apri in self or not recursively:
+                regs.append(self)
+
+            else:
+
+                with self._txn("reader") as ro_txn:
+                    subregs = [subreg for subreg, _ in self._subregs_bfs(True, ro_txn)]
+
+                for subreg in subregs:
+
+                    if apri in subreg:
+
+                        regs.append(subreg)
+                        break
+
+                else:
+                    regs.append(self)
+
+        gens = [
+            reg._windows(apri, chunk_len, chunk_len, start, stop, True, decompress, diskonly, dict(kwargs))
+            for reg, apri in zip(regs, apris)
+        ]
+
+        for chunks in zip(*gens):
+            yield dict(zip(apris, chunks))
+
+    def reduce(
+        self, apri, map_fn, combine_fn = None, startn = None, length = None, num_procs = 1, decompress = False,
+        diskonly = False, **kwargs
+    ):
+        """Calculate `combine_fn(map_fn(seg1), combine_fn(map_fn(seg2), ...))` over the data of `apri`, where
+        `seg1, seg2, ...` are consecutive views of the data. The views are passed to `map_fn` in order and the partial
+        results are combined pairwise in a balanced tree, so `combine_fn` must be associative, but need not be
+        commutative.
+
+        Disk `Block`s are split among `num_procs` processes (see `parallelize`). The processes load `Block`s directly from their files
+        (by default using `mmap_mode = 'r'`), so the `Register` is not reopened and `Block`s are not copied. RAM
+        `Block`s are mapped by the calling process.
+
+        The following built-in reducers are available by passing a `str` as `map_fn` (and omitting `combine_fn`):
+            'sum': The sum of the data.
+            'count': The number of indices.
+            'minmax': The tuple `(min, max)`.
+            'bincount': `numpy.bincount` of the data, which must consist of non-negative `int`s.
+
+        :param apri: (type `ApriInfo`)
+        :param map_fn: (type `str` or function) If a function, then it must take a `numpy.ndarray` and, if
+        `num_procs > 1`, it must be picklable (e.g. defined at the top-level of a module).
+        :param combine_fn: (type function) Takes two outputs of `map_fn` and returns another. Must be picklable if
+        `num_procs > 1`.
+        :param startn: (type `int`, optional) Default is the least index of `apri`.
+        :param length: (type `int`, optional) Default is until the first index following `startn` that is not
+        contained in any `Block`.
+        :param num_procs: (type `int`, default 1) Positive.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises DataNotFoundError: If no data is found, or if some index between `startn` and `startn + length` is not
+        contained in any `Block`.
+        """
+
+        self._check_open_raise("reduce")
+        check_type(apri, "apri", ApriInfo)
+        startn = check_return_int_None_default(startn, "startn", None)
+        length = check_return_int_None_default(length, "length", None)
+        num_procs = check_return_int(num_procs, "num_procs")
+        check_type(decompress, "decompress", bool)
+        check_type(diskonly, "diskonly", bool)
+
+        if isinstance(map_fn, str):
+
+            if map_fn not in _BUILTIN_REDUCERS:
+                raise ValueError(f"`map_fn` must be one of {', '.join(_BUILTIN_REDUCERS.keys())}, not '{map_fn}'.")
+
+            if combine_fn is not None:
+                raise ValueError("Do not pass `combine_fn` if `map_fn` is a `str`.")
+
+            map_fn, combine_fn = _BUILTIN_REDUCERS[map_fn]
+
+        elif not callable(map_fn):
+            raise TypeError("`map_fn` must be a `str` or a function.")
+
+        elif not callable(combine_fn):
+            raise TypeError("`combine_fn` must be a function.")
+
+        if startn is not None and startn < 0:
+            raise ValueError("`startn` must be non-negative.")
+
+        if length is not None and length <= 0:
+            raise ValueError("`length` must be positive.")
+
+        if num_procs <= 0:
+            raise ValueError("`num_procs` must be positive.")
+
+        kwargs.setdefault("mmap_mode", "r")
+        self._check_mmap_mode_raise(kwargs["mmap_mode"])
+
+        plan, stop = self._plan_pieces(apri, startn, length, True, diskonly, decompress)
+
+        if len(plan) == 0:
+            raise DataNotFoundError(self._blk_not_found_err_msg(not diskonly, True, False, apri, startn, length, None))
+
+        self._check_pieces_raise(plan, apri, startn, stop, diskonly)
+        jobs = NumpyRegister._partition_pieces(plan, num_procs)
+        partials = [None] * len(jobs)
+        disk_jobs = [i for i, job in enumerate(jobs) if not isinstance(job[0][2], Block)]
+        parallel = num_procs > 1 and len(disk_jobs) > 1
+
+        for i, job in enumerate(jobs):
+
+            if isinstance(job[0][2], Block) or not parallel:
+                partials[i] = _reduce_pieces(type(self), job, apri, map_fn, combine_fn, kwargs)
+
+        if parallel:
+
+            from .multiprocessing import parallelize # circular import
+
+            def set_partial(index, partial):
+                partials[disk_jobs[index]] = partial
+
+            apri_json = apri.to_json()
+            parallelize(
+                min(num_procs, len(disk_jobs)), _star_worker, timeout = _BLK_TASKS_TIMEOUT,
+                items = [
+                    (_reduce_pieces_worker, type(self), jobs[i], apri_json, map_fn, combine_fn, kwargs)
+                    for i in disk_jobs
+                ],
+                on_result = set_partial
+            )
+
+        return _tree_combine(combine_fn, partials)
+
+    def _plan_pieces(self, apri, startn, length, contiguous, diskonly, decompress):
+        """Call `Register._iter_pieces_pre` for the indices `startn <= n < startn + length`.
+
+        :return: (type `tuple`) The plan and the resolved stop index (possibly `None`).
+        """
+
+        if startn is not None and length is not None:
+            stop = startn + length
+
+        else:
+            stop = None
+
+        with self._txn("reader") as ro_txn:
+            plan = self._iter_pieces_pre(apri, startn, stop, contiguous, diskonly, decompress, ro_txn)
+
+        if startn is None and length is not None and len(plan) > 0:
+
+            stop = plan[0][0] + length
+            plan = [
+                (piece_start, min(piece_stop, stop), src) for piece_start, piece_stop, src in plan if piece_start < stop
+            ]
+
+        return plan, stop
+
+    def where(self, apri, lo, hi, startn = None, length = None, decompress = False, diskonly = False, **kwargs):
+        """Find all indices `n` such that `lo <= reg[apri, n] <= hi`. The minimum, maximum, and sum of every numeric,
+        one-dimensional disk `Block` are recorded when it is added, and disk `Block`s whose minimum and maximum show
+        that none or all of their values lie in `[lo, hi]` are not loaded. Indices not contained in any `Block` are
+        ignored.
+
+        :param apri: (type `ApriInfo`) Its data must be one-dimensional.
+        :param lo: (type `int` or `float`)
+        :param hi: (type `int` or `float`)
+        :param startn: (type `int`, optional) Default is the least index of `apri`.
+        :param length: (type `int`, optional) Default is until the greatest index of `apri`.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :return: (type `numpy.ndarray`) Sorted indices.
+        """
+
+        plan = self._zone_pieces_pre("where", apri, startn, length, decompress, diskonly, kwargs)
+        found = []
+
+        for piece_start, piece_stop, seg in self._zone_pieces(plan, apri, lo, hi, kwargs):
+
+            if seg is None:
+                found.append(np.arange(piece_start, piece_stop))
+
+            else:
+                found.append(np.flatnonzero((lo <= seg) & (seg <= hi)) + piece_start)
+
+        if len(found) == 0:
+            return np.empty(0, dtype = np.int64)
+
+        else:
+            return np.concatenate(found)
+
+    def range_count(self, apri, lo, hi, startn = None, length = None, decompress = False, diskonly = False, **kwargs):
+        """Count the indices `n` such that `lo <= reg[apri, n] <= hi`. Disk `Block`s whose recorded minimum and maximum
+        show that none or all of their values lie in `[lo, hi]` are not loaded. See `NumpyRegister.where`.
+
+        :return: (type `int`)
+        """
+
+        plan = self._zone_pieces_pre("range_count", apri, startn, length, decompress, diskonly, kwargs)
+        count = 0
+
+        for piece_start, piece_stop, seg in self._zone_pieces(plan, apri, lo, hi, kwargs):
+
+            if seg is None:
+                count += piece_stop - piece_start
+
+            else:
+                count += int(np.count_nonzero((lo <= seg) & (seg <= hi)))
+
+        return count
+
+    def range_sum(self, apri, startn = None, length = None, decompress = False, diskonly = False, **kwargs):
+        """Sum `reg[apri, n]` over all indices `startn <= n < startn + length`. Disk `Block`s lying entirely within that
+        range are summed using their recorded sum (see `NumpyRegister.where`), so only the (at most two) disk
+        `Block`s straddling `startn` or `startn + length` are loaded. Indices not contained in any `Block` are ignored.
+
+        :param apri: (type `ApriInfo`) Its data must be one-dimensional.
+        :param startn: (type `int`, optional) Default is the least index of `apri`.
+        :param length: (type `int`, optional) Default is until the greatest index of `apri`.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :return: (type `int` or `float`)
+        """
+
+        plan = self._zone_pieces_pre("range_sum", apri, startn, length, decompress, diskonly, kwargs)
+        total = 0
+        to_load = []
+
+        for piece_start, piece_stop, src in plan:
+
+            if (
+                not isinstance(src, Block) and src[5] is not None and
+                piece_start == src[2] and piece_stop == src[2] + src[3]
+            ):
+                total += src[5][2]
+
+            else:
+                to_load.append((piece_start, piece_stop, src))
+
+        for _, seg in type(self)._iter_pieces(to_load, apri, kwargs):
+
+            NumpyRegister._check_1d_raise(seg)
+            total += _exact_sum(seg)
+
+        return total
+
+    def _zone_pieces_pre(self, method_name, apri, startn, length, decompress, diskonly, kwargs):
+
+        self._check_open_raise(method_name)
+        check_type(apri, "apri", ApriInfo)
+        startn = check_return_int_None_default(startn, "startn", None)
+        length = check_return_int_None_default(length, "length", None)
+        check_type(decompress, "decompress", bool)
+        check_type(diskonly, "diskonly", bool)
+
+        if startn is not None and startn < 0:
+            raise ValueError("`startn` must be non-negative.")
+
+        if length is not None and length < 0:
+            raise ValueError("`length` must be non-negative.")
+
+        kwargs.setdefault("mmap_mode", "r")
+        self._check_mmap_mode_raise(kwargs["mmap_mode"])
+
+        if length == 0:
+            return []
+
+        return self._plan_pieces(apri, startn, length, False, diskonly, decompress)[0]
+
+    @classmethod
+    def _zone_pieces(cls, plan, apri, lo, hi, kwargs):
+        """Yield `(piece_start, piece_stop, seg)` for each element of `plan`, skipping those pieces whose recorded
+        statistics show that none of their values lie in `[lo, hi]`. If all of a piece's values lie in `[lo, hi]`, then
+        `seg` is `None`. The `yield`s are ordered by `piece_start`.
+        """
+
+        skip = {}
+        to_load = []
+
+        for piece_start, piece_stop, src in plan:
+
+            stats = None if isinstance(src, Block) else src[5]
+
+            if stats is not None and (stats[1] < lo or hi < stats[0]):
+                continue
+
+            elif stats is not None and lo <= stats[0] and stats[1] <= hi:
+                skip[piece_start] = piece_stop
+
+            else:
+                to_load.append((piece_start, piece_stop, src))
+
+        for piece_start, seg in cls._iter_pieces(to_load, apri, kwargs):
+
+            NumpyRegister._check_1d_raise(seg)
+
+            for skip_start in sorted(n for n in skip.keys() if n < piece_start):
+                yield skip_start, skip.pop(skip_start), None
+
+            yield piece_start, piece_start + len(seg), seg
+
+        for skip_start in sorted(skip.keys()):
+            yield skip_start, skip[skip_start], None
+
+    @staticmethod
+    def _check_1d_raise(seg):
+
+        if np.ndim(seg) != 1:
+            raise ValueError("This method only supports one-dimensional data.")
+
+    def set_monotone(self, apri, monotone = True, verify = True, decompress = False):
+        """Declare that the data of `apri` is non-decreasing, which is required by `NumpyRegister.searchsorted`. The
+        `Register` does not check that data added later is also non-decreasing.
+
+        :param apri: (type `ApriInfo`) Its data must be one-dimensional.
+        :param monotone: (type `bool`, default `True`) Set to `False` to revoke the declaration.
+        :param verify: (type `bool`, default `True`) Load all data of `apri` to check that it is non-decreasing.
+        :raises ValueError: If `verify` and the data of `apri` is not non-decreasing.
+        """
+
+        self._check_open_raise("set_monotone")
+        self._check_readwrite_raise("set_monotone")
+        check_type(apri, "apri", ApriInfo)
+        check_type(monotone, "monotone", bool)
+        check_type(verify, "verify", bool)
+        check_type(decompress, "decompress", bool)
+
+        if monotone and verify:
+
+            plan, _ = self._plan_pieces(apri, None, None, False, False, decompress)
+            last = None
+
+            for piece_start, seg in type(self)._iter_pieces(plan, apri, {"mmap_mode" : "r"}):
+
+                NumpyRegister._check_1d_raise(seg)
+
+                if len(seg) > 0:
+
+                    if (last is not None and seg[0] < last) or np.any(seg[1:] < seg[:-1]):
+                        raise ValueError(f"The data of the following `ApriInfo` is not non-decreasing :\n{apri}")
+
+                    last = seg[-1]
+
+        with self._txn("writer") as rw_txn:
+
+            monotone_key = Register._get_monotone_key(self._get_apri_id(apri, None, True, rw_txn))
+
+            if monotone:
+                rw_txn.put(monotone_key, b"")
+
+            else:
+                rw_txn.delete(monotone_key)
+
+    def is_monotone(self, apri):
+        """
+        :param apri: (type `ApriInfo`)
+        :return: (type `bool`) Whether `apri` was declared non-decreasing via `NumpyRegister.set_monotone`.
+        """
+
+        self._check_open_raise("is_monotone")
+        check_type(apri, "apri", ApriInfo)
+
+        with self._txn("reader") as ro_txn:
+            return self._is_monotone_disk(apri, ro_txn)
+
+    def _is_monotone_disk(self, apri, r_txn):
+
+        try:
+            apri_id = self._get_apri_id(apri, None, True, r_txn)
+
+        except DataNotFoundError:
+            return False
+
+        else:
+            return r_txn_has_key(Register._get_monotone_key(apri_id), r_txn)
+
+    def searchsorted(self, apri, values, side = "left", decompress = False, diskonly = False, **kwargs):
+        """For each `v` in `values`, find the least index `n` such that `reg[apri, n] >= v` (if `side == 'left'`) or
+        `reg[apri, n] > v` (if `side == 'right'`). For example, if `reg[apri, n]` is the `n`-th prime, counting from
+        `0`, then `reg.searchsorted(apri, x, 'right')` is the number of primes at most `x`.
+
+        `apri` must first be declared non-decreasing via `NumpyRegister.set_monotone`. The first and last values of
+        each disk `Block` are looked up in the database (see `NumpyRegister.where`), so only one disk `Block` is
+        (memory-mapped and) searched per value. Indices not contained in any `Block` are ignored.
+
+        :param apri: (type `ApriInfo`) Its data must be one-dimensional.
+        :param values: (type `int`, `float`, or array-like)
+        :param side: (type `str`, default 'left') Either 'left' or 'right'.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises DataNotFoundError: If `apri` has no data.
+        :return: (type `int` or `numpy.ndarray`) If `values` is an array, then an array of the same shape. If every
+        value of `apri` is less than `v` (or at most `v`), then the corresponding index is one more than the greatest
+        index of `apri`.
+        """
+
+        plan = self._zone_pieces_pre("searchsorted", apri, None, None, decompress, diskonly, kwargs)
+
+        if side not in ("left", "right"):
+            raise ValueError("`side` must be either 'left' or 'right'.")
+
+        with self._txn("reader") as ro_txn:
+
+            if not self._is_monotone_disk(apri, ro_txn):
+                raise ValueError(
+                    f"The following `ApriInfo` must be declared non-decreasing via `set_monotone` :\n{apri}"
+                )
+
+        if len(plan) == 0:
+            raise DataNotFoundError(self._blk_not_found_err_msg(not diskonly, True, False, apri, None, None, None))
+
+        values = np.asarray(values)
+        flat_values = values.ravel()
+        bounds = []
+
+        for piece_start, piece_stop, src in plan:
+
+            if isinstance(src, Block):
+
+                seg = src.segment[piece_start - src.startn : piece_stop - src.startn]
+                NumpyRegister._check_1d_raise(seg)
+                bounds.append((seg[0], seg[-1]))
+
+            elif src[5] is not None:
+                # the statistics of a disk `Block` apply to each of its pieces
+                bounds.append((src[5][0], src[5][1]))
+
+            else:
+                bounds.append(None)
+
+        # the bounds keep the dtype of the data, since `float64` does not represent every `int64` exactly
+        known = [bound for pair in bounds if pair is not None for bound in pair]
+        dtype = np.array(known).dtype if len(known) > 0 else np.dtype(np.float64)
+
+        if dtype.kind in "iu":
+            unbounded = (np.iinfo(dtype).min, np.iinfo(dtype).max)
+
+        else:
+            unbounded = (-np.inf, np.inf)
+
+        lower_bounds = np.array([unbounded[0] if pair is None else pair[0] for pair in bounds], dtype = dtype)
+        upper_bounds = np.array([unbounded[1] if pair is None else pair[1] for pair in bounds], dtype = dtype)
+
+        # `upper_bounds` may be unsorted if some piece has no (or inexact) statistics, but `v` is greater than every
+        # value in the first `i` pieces if `v` is greater than the first `i` elements of `cummax`
+        cummax = np.maximum.accumulate(upper_bounds)
+        piece_indices = np.searchsorted(cummax, flat_values, side = side)
+        ret = np.empty(len(flat_values), dtype = np.int64)
+        queued = {}
+
+        for j, i in enumerate(piece_indices):
+            queued.setdefault(i, []).append(j)
+
+        for i in range(len(plan) + 1):
+
+            if i not in queued.keys():
+                continue
+
+            js = np.array(queued.pop(i))
+
+            if i == len(plan):
+
+                ret[js] = plan[-1][1]
+                continue
+
+            piece_start, piece_stop, src = plan[i]
+
+            if side == "left":
+                fast = lower_bounds[i] >= flat_values[js]
+
+            else:
+                fast = lower_bounds[i] > flat_values[js]
+
+            ret[js[fast]] = piece_start
+            js = js[~fast]
+
+            if len(js) == 0:
+                continue
+
+            for _, seg in type(self)._iter_pieces([plan[i]], apri, kwargs):
+
+                NumpyRegister._check_1d_raise(seg)
+                found = np.searchsorted(seg, flat_values[js], side = side)
+
+            inside = found < piece_stop - piece_start
+            ret[js[inside]] = piece_start + found[inside]
+
+            if not np.all(inside):
+                # only possible if the upper bound of this piece is inexact
+                queued.setdefault(i + 1, []).extend(js[~inside])
+
+        if values.ndim == 0:
+            return int(ret[0])
+
+        else:
+            return ret.reshape(values.shape)
+
+    def build_inverse_index(self, apri, decompress = False, num_procs = 1):
+        """Build an inverse index of the data of `apri`, so that `NumpyRegister.find` can look up every index `n` with
+        a given value `reg[apri, n]`. The index is stored in the database and is kept up to date as disk `Block`s are
+        added, removed, concatenated, or `set`. RAM `Block`s are not indexed.
+
+        Every entry `n` is a database key of about 50 bytes, so the index takes roughly ten times as much space as
+        64-bit data, and it slows down adding disk `Block`s. The sorted keys of each disk `Block` are calculated by one
+        of `num_procs` worker processes (see `parallelize`), and are then written in bulk, one transaction per `Block`.
+
+        :param apri: (type `ApriInfo`) Its data must be one-dimensional and of integer type.
+        :param decompress: (type `bool`, default `False`) Decompress disk `Block`s in order to index them.
+        :param num_procs: (type `int`, default 1) Positive.
+        :raises ValueError: If the data of `apri` is not one-dimensional or not of integer type. If `num_procs > 1`,
+        then a `RuntimeError` is raised instead (see `parallelize`).
+        :raises CompressionError: If some disk `Block` of `apri` is compressed and `decompress` is `False`.
+        """
+
+        self._check_open_raise("build_inverse_index")
+        self._check_readwrite_raise("build_inverse_index")
+        check_type(apri, "apri", ApriInfo)
+        check_type(decompress, "decompress", bool)
+        num_procs = check_return_int(num_procs, "num_procs")
+
+        if num_procs <= 0:
+            raise ValueError("`num_procs` must be positive.")
+
+        srcs = []
+
+        with self._txn("reader") as ro_txn:
+
+            apri_json = self._relational_encode_info(apri, ro_txn)
+            prefix = self._intervals_pre(apri, apri_json, False, ro_txn)
+
+            # every disk `Block`, including overlapping ones, since `Register._update_inverse_disk` counts each entry
+            # once per `Block` that contains it
+            for startn, length in self._intervals_disk(prefix, ro_txn):
+
+                blk_filename, compressed_filename, _, is_compressed = self._blk_pre(
+                    apri, apri_json, False, startn, length, decompress, ro_txn
+                )
+                srcs.append((startn, length, blk_filename, compressed_filename, is_compressed))
+
+        with self._txn("writer") as rw_txn:
+
+            apri_id = self._get_apri_id(apri, None, True, rw_txn)
+
+            if r_txn_has_key(Register._get_has_inverse_key(apri_id), rw_txn):
+                return
+
+            rw_txn.put(Register._get_has_inverse_key(apri_id), b"")
+
+        # the entries of a `Block` that overlaps no other `Block` are all new, so they can be written without reading
+        # their counts first
+        srcs.sort(key = lambda src: src[0])
+        overlapping = []
+        max_stop = None
+
+        for i, (startn, length, _, _, _) in enumerate(srcs):
+
+            overlapping.append(
+                (max_stop is not None and startn < max_stop) or
+                (i + 1 < len(srcs) and srcs[i + 1][0] < startn + length)
+            )
+            max_stop = startn + length if max_stop is None else max(max_stop, startn + length)
+
+        def add_keys(i, keys):
+
+            keys = _split_inverse_keys(apri_id, keys)
+
+            # one transaction per `Block`, so that the transaction size is bounded
+            with self._txn("writer") as rw_txn:
+
+                if overlapping[i]:
+
+                    for key in keys:
+                        rw_txn.put(key, bytify_int(intify_bytes(rw_txn.get(key, default = b"0")) + 1))
+
+                else:
+                    rw_txn.putmulti([(key, b"1") for key in keys])
+
+        apri_json = apri.to_json()
+        worker_args = [
+            (type(self), apri_json, apri_id, startn, blk_filename, compressed_filename, is_compressed)
+            for startn, _, blk_filename, compressed_filename, is_compressed in srcs
+        ]
+
+        try:
+            _run_tasks(num_procs, _inverse_keys_worker, worker_args, add_keys)
+
+        except BaseException:
+
+            self.drop_inverse_index(apri)
+            raise
+
+    def drop_inverse_index(self, apri):
+        """Delete the inverse index of `apri` (see `NumpyRegister.build_inverse_index`), if it has one.
+
+        :param apri: (type `ApriInfo`)
+        """
+
+        self._check_open_raise("drop_inverse_index")
+        self._check_readwrite_raise("drop_inverse_index")
+        check_type(apri, "apri", ApriInfo)
+
+        with self._txn("writer") as rw_txn:
+
+            apri_id = self._get_apri_id(apri, None, True, rw_txn)
+            rw_txn.delete(Register._get_has_inverse_key(apri_id))
+
+            with r_txn_prefix_iter(Register._get_inverse_prefix(apri_id), rw_txn) as it:
+                keys = [key for key, _ in it]
+
+            for key in keys:
+                rw_txn.delete(key)
+
+    def has_inverse_index(self, apri):
+        """
+        :param apri: (type `ApriInfo`)
+        :return: (type `bool`) Whether `apri` has an inverse index (see `NumpyRegister.build_inverse_index`).
+        """
+
+        self._check_open_raise("has_inverse_index")
+        check_type(apri, "apri", ApriInfo)
+
+        with self._txn("reader") as ro_txn:
+
+            try:
+                apri_id = self._get_apri_id(apri, None, True, ro_txn)
+
+            except DataNotFoundError:
+                return False
+
+            else:
+                return r_txn_has_key(Register._get_has_inverse_key(apri_id), ro_txn)
+
+    def find(self, apri, values):
+        """Find every index `n` such that `reg[apri, n] == v`, using the inverse index of `apri` (see
+        `NumpyRegister.build_inverse_index`). Each lookup is a single range scan of the database, so its time is
+        proportional to the number of matches. Only disk `Block`s are searched.
+
+        :param apri: (type `ApriInfo`)
+        :param values: (type `int` or iterable of `int`)
+        :raises ValueError: If `apri` does not have an inverse index.
+        :return: (type `numpy.ndarray`) If `values` is an `int`, then a sorted array of the indices `n`. Otherwise, a
+        `list` of such arrays, one for each element of `values`.
+        """
+
+        self._check_open_raise("find")
+        check_type(apri, "apri", ApriInfo)
+        scalar = is_int(values)
+
+        if scalar:
+            values = [values]
+
+        ret = []
+
+        with self._txn("reader") as ro_txn:
+
+            try:
+                apri_id = self._get_apri_id(apri, None, True, ro_txn)
+
+            except DataNotFoundError:
+                apri_id = None
+
+            if apri_id is None or not r_txn_has_key(Register._get_has_inverse_key(apri_id), ro_txn):
+                raise ValueError(
+                    f"The following `ApriInfo` does not have an inverse index (see `build_inverse_index`) :\n{apri}"
+                )
+
+            for value in values:
+
+                value = check_return_int(value, "element of `values`")
+                prefix = Register._get_inverse_prefix(apri_id, value)
+                prefix_len = len(prefix)
+
+                with r_txn_prefix_iter(prefix, ro_txn) as it:
+                    ret.append(np.array([intify_bytes(key[prefix_len : ]) for key, _ in it], dtype = np.int64))
+
+        if scalar:
+            return ret[0]
+
+        else:
+            return ret
+
+    def sample(
+        self, apri, k, seed = None, replace = False, strata = None, startn = None, length = None, decompress = False,
+        diskonly = False, **kwargs
+    ):
+        """Draw `k` indices `n` uniformly at random from those contained in some `Block` of `apri`, and return them
+        together with `reg[apri, n]`. The draws are grouped by `Block`, so each `Block` is (memory-mapped and) loaded
+        at most once, and only the sampled entries are read from it.
+
+        :param apri: (type `ApriInfo`)
+        :param k: (type `int`) Number of draws (per stratum, if `strata` is given).
+        :param seed: (type `int`, optional) Passed to `numpy.random.default_rng`.
+        :param replace: (type `bool`, default `False`) Whether an index may be drawn more than once.
+        :param strata: (type `int` or `list`, optional) Either the number of equal-width ranges into which to split the
+        indices of `apri`, or a `list` of pairs `(startn, length)`. `k` indices are drawn from each range.
+        :param startn: (type `int`, optional) Default is the least index of `apri`.
+        :param length: (type `int`, optional) Default is until the greatest index of `apri`.
+        :param mmap_mode: (type `str`, default 'r') See `NumpyRegister.blk`.
+        :raises ValueError: If `replace` is `False` and some range contains fewer than `k` indices.
+        :return: (type `tuple`) Two `numpy.ndarray`s, the drawn indices in increasing order and the corresponding
+        entries `reg[apri, n]`.
+        """
+
+        plan = self._zone_pieces_pre("sample", apri, startn, length, decompress, diskonly, kwargs)
+        k = check_return_int(k, "k")
+        check_type(replace, "replace", bool)
+
+        if k < 0:
+            raise ValueError("`k` must be non-negative.")
+
+        if strata is None:
+            ranges = [(None, None)]
+
+        elif is_int(strata):
+
+            if strata <= 0:
+                raise ValueError("`strata` must be positive.")
+
+            if len(plan) == 0:
+                ranges = []
+
+            else:
+
+                edges = np.linspace(plan[0][0], plan[-1][1], int(strata) + 1).round().astype(np.int64).tolist()
+                ranges = list(zip(edges[:-1], edges[1:]))
+
+        else:
+
+            ranges = []
+
+            for stratum_startn, stratum_length in strata:
+
+                stratum_startn = check_return_int(stratum_startn, "startn")
+                ranges.append((stratum_startn, stratum_startn + check_return_int(stratum_length, "length")))
+
+        rng = np.random.default_rng(seed)
+        ns = []
+
+        for a, b in ranges:
+
+            if a is None:
+                subplan = plan
+
+            else:
+                subplan = [
+                    (max(piece_start, a), min(piece_stop, b), src)
+                    for piece_start, piece_stop, src in plan
+                    if piece_start < b and a < piece_stop
+                ]
+
+            lengths = np.array([piece_stop - piece_start for piece_start, piece_stop, _ in subplan], dtype = np.int64)
+            total = int(np.sum(lengths))
+
+            if not replace and k > total:
+                raise ValueError(f"Cannot draw {k} indices without replacement from {total} indices.")
+
+            elif k == 0:
+                continue
+
+            elif total == 0:
+                raise ValueError(f"Cannot draw {k} indices from 0 indices.")
+
+            if replace:
+                pos = rng.integers(0, total, k)
+
+            else:
+                pos = rng.choice(total, k, replace = False)
+
+            # `pos` counts indices of `subplan`, skipping those not contained in any `Block`
+            cum = np.cumsum(lengths)
+            piece_indices = np.searchsorted(cum, pos, side = "right")
+            starts = np.array([piece_start for piece_start, _, _ in subplan], dtype = np.int64)
+            ns.append(starts[piece_indices] + pos - (cum - lengths)[piece_indices])
+
+        ns = np.sort(np.concatenate([np.empty(0, dtype = np.int64)] + ns))
+        starts = np.array([piece_start for piece_start, _, _ in plan], dtype = np.int64)
+        piece_indices = np.searchsorted(starts, ns, side = "right") - 1
+        bounds = np.searchsorted(piece_indices, np.arange(len(plan) + 1))
+        values = []
+
+        for i in np.unique(piece_indices):
+
+            for piece_start, seg in type(self)._iter_pieces([plan[i]], apri, kwargs):
+                values.append(seg[ns[bounds[i] : bounds[i + 1]] - piece_start])
+
+        if len(values) > 0:
+            values = np.concatenate(values)
+
+        else:
+            values = np.empty(0)
+
+        return ns, values
+
+    @staticmethod
+    def _partition_pieces(plan, num_parts):
+        """Split `plan` (see `Register._iter_pieces_pre`) into consecutive jobs. Disk pieces are grouped or split so that
+        each job covers roughly `1 / num_parts` of the indices. Each RAM piece is its own job.
+        """
+
+        target = -(-(plan[-1][1] - plan[0][0]) // num_parts)
+        jobs = []
+        job = []
+        job_len = 0
+
+        for piece_start, piece_stop, src in plan:
+
+            if isinstance(src, Block):
+
+                if len(job) > 0:
+
+                    jobs.append(job)
+                    job = []
+                    job_len = 0
+
+                jobs.append([(piece_start, piece_stop, src)])
+
+            else:
+
+                while piece_start < piece_stop:
+
+                    take = min(piece_stop - piece_start, target - job_len)
+                    job.append((piece_start, piece_start + take, src))
+                    job_len += take
+                    piece_start += take
+
+                    if job_len >= target:
+
+                        jobs.append(job)
+                        job = []
+                        job_len = 0
+
+        if len(job) > 0:
+            jobs.append(job)
+
+        return jobs
+
+    def concat_disk_blks(self, apri, startn = None, length = None, delete = False, ret_metadata = False, **kwargs):
+
+        self._check_open_raise("concat_disk_blks")
+        self._check_readwrite_raise("concat_disk_blks")
+        check_type(apri, "apri", ApriInfo)
+        startn = check_return_int_None_default(startn, "startn", None)
+        length = check_return_int_None_default(length, "length", None)
+        check_type(ret_metadata, "ret_metadata", bool)
+
+        if startn is not None and startn < 0:
+            raise ValueError("`startn` must be non-negative.")
+
+        if length is not None and length < 0:
+            raise ValueError("`length` must be non-negative.")
+
+        with self._txn("reader") as ro_txn:
+            ret = self._concat_disk_blks_pre(apri, None, True, startn, length, ro_txn)
+
+        combined_already, combined_blk_key, combined_compressed_key, combined_filename, combined_seg, del_keys, del_filenames = ret
+        rrw_txn = None
+
+        if combined_already:
+
+            if ret_metadata:
+                return FileMetadata.from_path(combined_filename)
+
+            else:
+                return None
+
+        try:
+
+            with self._txn("reversible") as rrw_txn:
+                self._concat_disk_blks_disk(
+                    combined_blk_key, combined_compressed_key, combined_filename, del_keys, delete, combined_seg,
+                    rrw_txn
+                )
+
+            return self._concat_disk_blks_disk2(
+                combined_seg, combined_filename, del_filenames, ret_metadata, delete, kwargs
             )
 
         except BaseException as e:
@@ -5223,6 +8227,7 @@ class NumpyRegister(Register, file_suffix = ".npy"):
                     keys = self._get_disk_blk_keys(apri, apri_json, False, startn_, length_, r_txn)
                     del_filenames.append(self._get_disk_blk_filenames(keys[0], keys[1], True,  r_txn))
                     del_keys.extend(keys)
+                    del_keys.append(Register._get_stats_key(keys[0]))
                     last_check = startn_ + length_ == res_startn + res_length
 
         else:
@@ -5277,7 +8282,7 @@ class NumpyRegister(Register, file_suffix = ".npy"):
         return False, combined_blk_key, combined_compressed_key, combined_filename, combined_seg, del_keys, del_filenames
 
     def _concat_disk_blks_disk(
-        self, combined_blk_key, combined_compressed_key, combined_filename, del_keys, delete, rw_txn
+        self, combined_blk_key, combined_compressed_key, combined_filename, del_keys, delete, combined_seg, rw_txn
     ):
 
         if delete:
@@ -5286,9 +8291,13 @@ class NumpyRegister(Register, file_suffix = ".npy"):
                 rw_txn.delete(key)
 
         self._add_disk_blk_disk(
-            None, None, None, combined_blk_key, combined_compressed_key, combined_filename, False, rw_txn
+            None, None, None, combined_blk_key, combined_compressed_key, combined_filename, False, combined_seg, rw_txn
         )
 
+        if delete:
+            # the deleted `Block`s contain exactly the same inverse index entries as the combined `Block`
+            self._update_inverse_blk_disk(combined_blk_key, combined_seg, -1, rw_txn)
+
     @classmethod
     def _concat_disk_blks_disk2(cls, seg, blk_filename, del_filenames, ret_metadata, delete, kwargs):
 
@@ -5345,6 +8354,360 @@ class NumpyRegister(Register, file_suffix = ".npy"):
             no_recover.__cause__ = ee
             return no_recover
 
+def _star_worker(args):
+    return args[0](*args[1:])
+
+def _run_tasks(num_procs, worker, worker_args, on_result):
+    """Call `worker(*args)` for each `args` in `worker_args`, and pass each return value to `on_result(index, result)`.
+    If `num_procs > 1`, then the calls are handed out to worker processes by `parallelize`."""
+
+    if len(worker_args) == 0:
+        return
+
+    if num_procs == 1:
+
+        for index, args in enumerate(worker_args):
+            on_result(index, worker(*args))
+
+    else:
+
+        from .multiprocessing import parallelize # circular import
+
+        parallelize(
+            num_procs, _star_worker, timeout = _BLK_TASKS_TIMEOUT,
+            items = [(worker,) + args for args in worker_args], on_result = on_result
+        )
+
+def _map_blk_worker(src_cls, dst_cls, src_apri_json, fn, task, kwargs):
+
+    startn, blk_filename, compressed_filename, is_compressed, filename = task
+
+    with src_cls._blk_disk2(
+        blk_filename, compressed_filename, ApriInfo.from_json(src_apri_json), startn, is_compressed, False, kwargs
+    ) as blk:
+
+        seg = fn(blk.segment)
+
+        if len(seg) != len(blk):
+            raise ValueError(
+                f"`fn` must preserve length, but it mapped the `Block` with `startn` = {startn} and length = "
+                f"{len(blk)} to a segment of length {len(seg)}."
+            )
+
+    dst_cls._add_disk_blk_disk2(seg, filename, False, {})
+    return startn, len(seg), filename, dst_cls._blk_stats(seg)
+
+def _build_blk_worker(cls, fn, task):
+
+    startn, length, filename = task
+    seg = fn(startn, length)
+
+    if len(seg) != length:
+        raise ValueError(
+            f"`fn({startn}, {length})` returned a segment of length {len(seg)}, but {length} was expected."
+        )
+
+    cls._add_disk_blk_disk2(seg, filename, False, {})
+    return startn, length, filename, cls._blk_stats(seg)
+
+def _inverse_keys_worker(cls, apri_json, apri_id, startn, blk_filename, compressed_filename, is_compressed):
+
+    with cls._blk_disk2(
+        blk_filename, compressed_filename, ApriInfo.from_json(apri_json), startn, is_compressed, False,
+        {"mmap_mode" : "r"}
+    ) as blk:
+        return _inverse_keys(apri_id, _check_inverse_seg_raise(blk.segment), startn)
+
+def _check_inverse_seg_raise(seg):
+
+    seg = np.asarray(seg)
+
+    if seg.ndim != 1 or (len(seg) > 0 and seg.dtype.kind not in "iu"):
+        raise ValueError("Inverse indices only support one-dimensional integer data.")
+
+    return seg
+
+def _inverse_keys(apri_id, seg, startn):
+    """The keys of the inverse index entries `(seg[i], startn + i)` of the apri whose ID is `apri_id` (see
+    `Register._get_inverse_prefix`), in increasing order and concatenated. Every key has the same length."""
+
+    if len(seg) == 0:
+        return b""
+
+    if startn < 0 or (seg.dtype.kind == "u" and int(seg.max()) >= _INVERSE_VALUE_OFFSET):
+        # the keys do not fit the unsigned 64-bit arithmetic below
+        return b"".join(sorted(
+            Register._get_inverse_prefix(apri_id, value) + bytify_int(startn + i, _INVERSE_INT_LENGTH)
+            for i, value in enumerate(seg.tolist())
+        ))
+
+    # wraps around to `value + _INVERSE_VALUE_OFFSET`, which is less than `2 ** 64`
+    values = seg.astype(np.uint64) + np.uint64(_INVERSE_VALUE_OFFSET)
+    ns = np.uint64(startn) + np.arange(len(seg), dtype = np.uint64)
+    order = np.lexsort((ns, values))
+    prefix = Register._get_inverse_prefix(apri_id)
+    cols = [prefix, values[order], _KEY_SEP, ns[order]]
+    keys = np.empty((len(seg), len(prefix) + 2 * _INVERSE_INT_LENGTH + _KEY_SEP_LEN), dtype = np.uint8)
+    start = 0
+
+    for col in cols:
+
+        if isinstance(col, bytes):
+            col = np.frombuffer(col, dtype = np.uint8)
+
+        else:
+            # zero-padded decimal digits, as in `bytify_int`
+            col = np.char.zfill(col.astype(f"S{_INVERSE_INT_LENGTH}"), _INVERSE_INT_LENGTH)
+            col = col.view(np.uint8).reshape(-1, _INVERSE_INT_LENGTH)
+
+        keys[:, start : start + col.shape[-1]] = col
+        start += col.shape[-1]
+
+    return keys.tobytes()
+
+def _split_inverse_keys(apri_id, keys):
+
+    key_len = len(Register._get_inverse_prefix(apri_id, 0)) + _INVERSE_INT_LENGTH
+    return [keys[i : i + key_len] for i in range(0, len(keys), key_len)]
+
+def _reduce_pieces_worker(cls, plan, apri_json, map_fn, combine_fn, kwargs):
+    # `ApriInfo` does not pickle, so it is passed to the worker as JSON
+    return _reduce_pieces(cls, plan, ApriInfo.from_json(apri_json), map_fn, combine_fn, kwargs)
+
+def _reduce_pieces(cls, plan, apri, map_fn, combine_fn, kwargs):
+    return _tree_combine(combine_fn, [map_fn(seg) for _, seg in cls._iter_pieces(plan, apri, kwargs)])
+
+def _exact_sum(seg):
+    """The sum of a one-dimensional numeric `seg` as a Python number. Integer sums are exact, whereas `numpy.sum`
+    silently wraps around."""
+
+    if seg.dtype.kind in "iu" and len(seg) > 0:
+
+        bound = max(abs(int(seg.min())), abs(int(seg.max()))) * len(seg)
+
+        if bound >= 2 ** 63:
+            return int(seg.sum(dtype = object))
+
+        return int(seg.sum(dtype = np.int64))
+
+    return seg.sum().item()
+
+def _tree_combine(combine_fn, partials):
+
+    while len(partials) > 1:
+
+        combined = [combine_fn(partials[i], partials[i + 1]) for i in range(0, len(partials) - 1, 2)]
+
+        if len(partials) % 2 == 1:
+            combined.append(partials[-1])
+
+        partials = combined
+
+    return partials[0]
+
+def _sum_map(seg):
+    return np.sum(seg)
+
+def _sum_combine(x, y):
+    return x + y
+
+def _count_map(seg):
+    return len(seg)
+
+def _minmax_map(seg):
+    return np.min(seg), np.max(seg)
+
+def _minmax_combine(x, y):
+    return min(x[0], y[0]), max(x[1], y[1])
+
+def _bincount_combine(x, y):
+
+    if len(x) < len(y):
+        x, y = y, x
+
+    x = x.copy()
+    x[:len(y)] += y
+    return x
+
+_BUILTIN_REDUCERS = {
+    "sum": (_sum_map, _sum_combine),
+    "count": (_count_map, _sum_combine),
+    "minmax": (_minmax_map, _minmax_combine),
+    "bincount": (np.bincount, _bincount_combine)
+}
+
+class _MemoizedFunction:
+    """See `NumpyRegister.memoize`."""
+
+    def __init__(self, reg, apri, fn, flush_len, vectorized):
+
+        self._reg = reg
+        self._apri = apri
+        self._fn = fn
+        self._flush_len = flush_len
+        self._vectorized = vectorized
+        self._buffer = {}
+        # sorted, disjoint intervals `[self._starts[i], self._stops[i])`, with data `self._segs[i]` (loaded on demand)
+        self._starts = []
+        self._stops = []
+        self._segs = []
+        self._srcs = []
+        self.__name__ = getattr(fn, "__name__", type(self).__name__)
+        self.__doc__ = getattr(fn, "__doc__", None)
+
+        try:
+
+            with reg._txn("reader") as ro_txn:
+                plan = reg._iter_pieces_pre(apri, None, None, False, False, True, ro_txn)
+
+        except DataNotFoundError:
+            plan = []
+
+        for piece_start, piece_stop, src in plan:
+
+            self._starts.append(piece_start)
+            self._stops.append(piece_stop)
+            self._segs.append(None)
+            self._srcs.append((piece_start, piece_stop, src))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def __call__(self, n):
+
+        if is_int(n):
+
+            n = int(n)
+
+            if n < 0:
+                raise ValueError("`n` must be non-negative.")
+
+            i = bisect.bisect_right(self._starts, n) - 1
+
+            if i >= 0 and n < self._stops[i]:
+                return self._seg(i)[n - self._starts[i]]
+
+            elif n in self._buffer.keys():
+                return self._buffer[n]
+
+            value = self._fn(np.array([n]))[0] if self._vectorized else self._fn(n)
+            self._buffer[n] = value
+
+            if len(self._buffer) >= self._flush_len:
+                self.flush()
+
+            return value
+
+        ns = np.asarray(n)
+
+        if ns.dtype.kind not in "iu":
+            raise TypeError("`n` must be an `int` or an array of `int`s.")
+
+        if np.any(ns < 0):
+            raise ValueError("`n` must be non-negative.")
+
+        flat = ns.ravel().astype(np.int64)
+        values = [None] * len(flat)
+        found = np.zeros(len(flat), dtype = bool)
+
+        if len(self._starts) > 0:
+
+            piece_indices = np.searchsorted(self._starts, flat, side = "right") - 1
+            stops = np.array(self._stops, dtype = np.int64)
+            hits = (piece_indices >= 0) & (flat < stops[np.maximum(piece_indices, 0)])
+
+            for i in np.unique(piece_indices[hits]):
+
+                js = np.nonzero(hits & (piece_indices == i))[0]
+                piece_values = self._seg(i)[flat[js] - self._starts[i]]
+
+                for j, value in zip(js, piece_values):
+                    values[j] = value
+
+            found |= hits
+
+        for j in np.nonzero(~found)[0]:
+
+            if flat[j] in self._buffer.keys():
+
+                values[j] = self._buffer[flat[j]]
+                found[j] = True
+
+        misses = np.nonzero(~found)[0]
+
+        if len(misses) > 0:
+
+            miss_ns = np.unique(flat[misses])
+
+            if self._vectorized:
+                miss_values = self._fn(miss_ns)
+
+            else:
+                miss_values = [self._fn(int(m)) for m in miss_ns]
+
+            for m, value in zip(miss_ns.tolist(), miss_values):
+                self._buffer[m] = value
+
+            for j in misses:
+                values[j] = self._buffer[flat[j]]
+
+        if len(self._buffer) >= self._flush_len:
+            self.flush()
+
+        ret = np.array(values)
+        return ret.reshape(ns.shape + ret.shape[1:])
+
+    def _seg(self, i):
+
+        if self._segs[i] is None:
+
+            for _, seg in type(self._reg)._iter_pieces([self._srcs[i]], self._apri, {"mmap_mode" : "r"}):
+                self._segs[i] = seg
+
+        return self._segs[i]
+
+    def flush(self):
+        """Add the buffered values as disk `Block`s, one for each contiguous run of indices (see
+        `NumpyRegister.memoize`)."""
+
+        ns = sorted(self._buffer.keys())
+        run_start = 0
+
+        for k in range(1, len(ns) + 1):
+
+            if k == len(ns) or ns[k] != ns[k - 1] + 1:
+
+                startn = ns[run_start]
+                seg = np.array([self._buffer[n] for n in ns[run_start : k]])
+
+                with Block(seg, self._apri, startn) as blk:
+                    self._reg.add_disk_blk(blk)
+
+                i = bisect.bisect_right(self._starts, startn)
+                self._starts.insert(i, startn)
+                self._stops.insert(i, startn + len(seg))
+                self._segs.insert(i, seg)
+                self._srcs.insert(i, None)
+
+                for n in ns[run_start : k]:
+                    del self._buffer[n]
+
+                run_start = k
+
+class _DiskSeg:
+    """The segment of a `Block` whose data is on disk, loaded only if it is converted to an array."""
+
+    def __init__(self, cls, filename):
+
+        self.cls = cls
+        self.filename = filename
+
+    def __array__(self, dtype = None, copy = None):
+        return np.asarray(self.cls.load_disk_data(self.filename), dtype = dtype)
+
 class _CopyRegister(Register):
 
     @classmethod
@@ -5387,23 +8750,13 @@ class _RelationalApriInfoStrHook:
 
         if cls == ApriInfo:
 
-            id_ = str_[len(ApriInfo.__name__) : ]
+            id_ = self._reg._apri_id_from_str(str_[len(ApriInfo.__name__) : ])
 
-            if len(id_) == self._reg._max_apri_len:
-
-                try:
-                    int(id_)
-
-                except ValueError:
-                    return str_
-
-                else:
-                    return json.JSONDecoder().decode(
-                        self._reg._get_apri_json(id_.encode("ASCII"), self._r_txn).decode("ASCII")
-                    )
+            if id_ is None:
+                return str_
 
             else:
-                return str_
+                return json.JSONDecoder().decode(self._reg._get_apri_json(id_, self._r_txn).decode("ASCII"))
 
         else:
             return cls._default_str_hook(str_)
@@ -5419,7 +8772,7 @@ class _RelationalInfoJsonEncoder(_InfoJsonEncoder):
     def default(self, obj):
 
         if isinstance(obj, ApriInfo):
-            return ApriInfo.__name__ + self._reg._get_apri_id(obj, None, True, self._r_txn).decode("ASCII")
+            return ApriInfo.__name__ + self._reg._apri_id_to_str(self._reg._get_apri_id(obj, None, True, self._r_txn))
 
         else:
             return super().default(obj)
@@ -0,0 +1,572 @@
+"""
+    Cornifer, an intuitive data manager for empirical and computational mathematics.
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import builtins
+import itertools
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import types
+from collections import OrderedDict
+from contextlib import contextmanager, ExitStack
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+from pathlib import Path
+
+import numpy as np
+
+from . import errors
+from ._utilities import check_type, check_return_int, check_return_int_None_default
+from ._utilities.multiprocessing import make_sigterm_raise_ReceivedSigterm, ReceivedSigterm, attach_shared_memory
+from .blocks import Block
+from .errors import DataNotFoundError, RegisterError
+from .info import ApriInfo, AposInfo
+from .registers import Register, NumpyRegister
+
+_CACHE_SIZE_DEFAULT = 2 ** 30 # bytes
+_CONNECT_TIMEOUT_DEFAULT = 10 # seconds
+_MAX_ATTACHED = 256 # shared memory segments that a `RemoteRegister` keeps attached
+# `Register` methods that a `RemoteRegister` forwards to the server unchanged
+_FORWARDED_METHODS = (
+    "apris", "apos", "intervals", "len", "gaps", "num_blks", "maxn", "contains_index", "contains_interval", "get_many",
+    "summary"
+)
+_SHARED_BLK_METHODS = ("blk", "blk_by_n")
+
+class _EncodedInfo:
+    """`ApriInfo` and `AposInfo` cannot be pickled, so they are sent to and from the server as JSON."""
+
+    def __init__(self, info):
+
+        self.cls_name = type(info).__name__
+        self.json = info.to_json()
+
+    def decode(self):
+        return (ApriInfo if self.cls_name == "ApriInfo" else AposInfo).from_json(self.json)
+
+def _encode(obj):
+
+    if isinstance(obj, (ApriInfo, AposInfo)):
+        return _EncodedInfo(obj)
+
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_encode(item) for item in obj)
+
+    elif isinstance(obj, dict):
+        return {key : _encode(val) for key, val in obj.items()}
+
+    else:
+        return obj
+
+def _decode(obj):
+
+    if isinstance(obj, _EncodedInfo):
+        return obj.decode()
+
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_decode(item) for item in obj)
+
+    elif isinstance(obj, dict):
+        return {key : _decode(val) for key, val in obj.items()}
+
+    else:
+        return obj
+
+def _remote_error(name, msg):
+
+    cls = getattr(errors, name, None) or getattr(builtins, name, None)
+
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        return cls(msg)
+
+    else:
+        return RegisterError(f"{name}: {msg}")
+
+def _remove_stale_socket(address):
+
+    if not os.path.exists(address):
+        return
+
+    with socket.socket(socket.AF_UNIX) as sock:
+
+        try:
+            sock.connect(address)
+
+        except ConnectionRefusedError: # left behind by a server that did not exit cleanly
+            os.unlink(address)
+
+        else:
+            raise RegisterError(f"A server is already listening on `{address}`.")
+
+class RegisterServer:
+    """Serve the read API of several registers to `RemoteRegister`s in other processes on the same machine, over the
+    Unix socket `address`. Usage :
+
+        with RegisterServer(address, (reg1, reg2)) as server:
+            server.serve_forever()
+
+    The server opens every `Register` in `regs` once, read-only, and keeps up to `cache_size` bytes of the most
+    recently read NumPy `Block`s in shared memory. Clients receive read-only views of those segments, rather than
+    copies, so that the memory and the LMDB reader slots used are independent of the number of clients. At most
+    `num_threads` requests are evaluated at a time. The server assumes that a served `Block` is not modified in place
+    (for example, with `NumpyRegister.set`) while it is cached.
+
+    The socket file is only accessible to the user running the server. If `authkey` (type `bytes`) is passed, clients
+    must pass the same key.
+    """
+
+    def __init__(self, address, regs, cache_size = _CACHE_SIZE_DEFAULT, num_threads = None, authkey = None):
+
+        if not isinstance(address, (str, Path)):
+            raise TypeError(f"`address` must be of type `str` or `Path`, not `{type(address).__name__}`.")
+
+        cache_size = check_return_int(cache_size, "cache_size")
+        num_threads = check_return_int_None_default(num_threads, "num_threads", os.cpu_count())
+
+        if authkey is not None:
+            check_type(authkey, "authkey", bytes)
+
+        for reg in regs:
+            check_type(reg, "reg", Register)
+
+        if cache_size <= 0:
+            raise ValueError("`cache_size` must be positive.")
+
+        if num_threads <= 0:
+            raise ValueError("`num_threads` must be positive.")
+
+        self.address = os.fspath(address)
+        self._regs = {reg.ident() : reg for reg in regs}
+        self._cache_size = cache_size
+        self._authkey = authkey
+        self._cache = OrderedDict() # (ident, apri json, startn, length) -> `SharedMemory`, shape, dtype
+        self._cache_nbytes = 0
+        self._cache_lock = threading.Lock()
+        # shared memory name -> number of replies naming it that the client may not have attached to yet. A pinned
+        # segment evicted from `_cache` waits in `_evicted` to be unlinked until it is unpinned.
+        self._pins = {}
+        self._evicted = {}
+        self._semaphore = threading.BoundedSemaphore(num_threads)
+        self._listener = None
+        self._stack = None
+
+    def __enter__(self):
+
+        stack = ExitStack()
+
+        try:
+
+            for reg in self._regs.values():
+                stack.enter_context(reg.open(readonly = True))
+
+            _remove_stale_socket(self.address)
+            self._listener = Listener(self.address, "AF_UNIX", authkey = self._authkey)
+            stack.callback(self._listener.close)
+            os.chmod(self.address, 0o600)
+            stack.callback(self._clear_cache)
+
+        except BaseException:
+
+            stack.close()
+            raise
+
+        self._stack = stack
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+
+        self._stack.close()
+        self._stack = None
+
+    def serve_forever(self):
+        """Accept clients until this thread receives an exception, for example `KeyboardInterrupt`."""
+
+        while True:
+
+            try:
+                conn = self._listener.accept()
+
+            except multiprocessing.AuthenticationError:
+                continue
+
+            threading.Thread(target = self._serve_client, args = (conn,), daemon = True).start()
+
+    def _serve_client(self, conn):
+
+        with conn:
+
+            try:
+                ident = conn.recv()
+
+            except (EOFError, OSError):
+                return
+
+            reg = self._regs.get(ident)
+
+            if reg is None:
+
+                conn.send((("DataNotFoundError", f"This server does not serve a `Register` with ident `{ident}`."), None))
+                return
+
+            conn.send((None, isinstance(reg, NumpyRegister)))
+            # a client attaches to the segments named in a reply before it sends its next request
+            pinned = []
+
+            try:
+
+                while True:
+
+                    try:
+                        method, args, kwargs = conn.recv()
+
+                    except (EOFError, OSError): # the client disconnected
+                        return
+
+                    for name in pinned:
+                        self._unpin(name)
+
+                    pinned = []
+
+                    try:
+
+                        with self._semaphore:
+                            ret = self._call(reg, method, _decode(args), _decode(kwargs))
+
+                        if method in _SHARED_BLK_METHODS and ret[1] is not None:
+                            pinned.append(ret[1][0])
+
+                        reply = (None, _encode(ret))
+
+                    except Exception as e:
+                        reply = ((type(e).__name__, str(e)), None)
+
+                    try:
+                        conn.send(reply)
+
+                    except OSError:
+                        return
+
+                    except Exception as e: # `reply` could not be pickled
+                        conn.send(((type(e).__name__, str(e)), None))
+
+            finally:
+
+                for name in pinned:
+                    self._unpin(name)
+
+    def _call(self, reg, method, args, kwargs):
+
+        if method in _FORWARDED_METHODS or method == "get":
+
+            ret = getattr(reg, method)(*args, **kwargs)
+            return list(ret) if isinstance(ret, types.GeneratorType) else ret
+
+        elif method in _SHARED_BLK_METHODS:
+
+            if isinstance(reg, NumpyRegister):
+                # only copied to shared memory if not already cached
+                kwargs.setdefault("mmap_mode", "r")
+
+            with getattr(reg, method)(*args, **kwargs) as blk:
+
+                seg = blk.segment
+
+                if not isinstance(seg, np.ndarray) or seg.dtype.hasobject:
+                    return blk.startn, None, seg
+
+                return blk.startn, self._share((reg.ident(), blk.apri.to_json(), blk.startn, len(blk)), seg), None
+
+        else:
+            raise ValueError(f"`{method}` is not served.")
+
+    def _share(self, key, seg):
+        """Copy `seg` to shared memory, unless it is already cached, and pin the segment (see `_unpin`)."""
+
+        with self._cache_lock:
+
+            if key in self._cache:
+
+                self._cache.move_to_end(key)
+                shm, shape, dtype = self._cache[key]
+                self._pin(shm.name)
+                return shm.name, shape, dtype
+
+        shm = shared_memory.SharedMemory(create = True, size = max(1, seg.nbytes))
+        np.ndarray(seg.shape, seg.dtype, shm.buf)[...] = seg
+
+        with self._cache_lock:
+
+            if key in self._cache: # another thread shared it in the meantime
+
+                shm.close()
+                shm.unlink()
+                shm, _, _ = self._cache[key]
+
+            else:
+
+                self._cache[key] = (shm, seg.shape, seg.dtype)
+                self._cache_nbytes += shm.size
+
+                while self._cache_nbytes > self._cache_size and len(self._cache) > 1:
+                    # clients that still hold views of an evicted segment keep it mapped until they release them
+                    old_shm, _, _ = self._cache.popitem(last = False)[1]
+                    self._cache_nbytes -= old_shm.size
+
+                    if old_shm.name in self._pins:
+                        self._evicted[old_shm.name] = old_shm
+
+                    else:
+
+                        old_shm.close()
+                        old_shm.unlink()
+
+            self._pin(shm.name)
+            return shm.name, seg.shape, seg.dtype
+
+    def _pin(self, name):
+        """Call with `_cache_lock` held."""
+        self._pins[name] = self._pins.get(name, 0) + 1
+
+    def _unpin(self, name):
+        """Release a pin of `_share`, unlinking the segment if it was evicted and this was its last pin."""
+
+        with self._cache_lock:
+
+            self._pins[name] -= 1
+
+            if self._pins[name] == 0:
+
+                del self._pins[name]
+                shm = self._evicted.pop(name, None)
+
+                if shm is not None:
+
+                    shm.close()
+                    shm.unlink()
+
+    def _clear_cache(self):
+
+        with self._cache_lock:
+
+            for shm in itertools.chain((shm for shm, _, _ in self._cache.values()), self._evicted.values()):
+
+                shm.close()
+                shm.unlink()
+
+            self._cache.clear()
+            self._evicted.clear()
+            self._cache_nbytes = 0
+
+def serve(address, regs, cache_size = _CACHE_SIZE_DEFAULT, num_threads = None, authkey = None):
+    """Run a `RegisterServer` until this process receives SIGTERM or SIGINT. This is what `python -m cornifer serve`
+    runs."""
+
+    with make_sigterm_raise_ReceivedSigterm():
+
+        try:
+
+            with RegisterServer(address, regs, cache_size, num_threads, authkey) as server:
+                server.serve_forever()
+
+        except (ReceivedSigterm, KeyboardInterrupt):
+            pass
+
+class RemoteRegister:
+    """A read-only client of a `Register` served by a `RegisterServer` (or `python -m cornifer serve`) on this
+    machine. Usage :
+
+        with RemoteRegister(address, ident) as reg:
+
+            reg[apri, 10]
+
+            with reg.blk(apri, 0, 1000) as blk:
+                ...
+
+    `reg` may be the served `Register` or its `ident`. `RemoteRegister` has the read methods of `Register`, which are
+    evaluated by the server, except that the `Block`s of a `NumpyRegister` are read-only views of the server's shared
+    memory. A view stays valid after the server evicts its `Block` from the cache. `timeout` is how many seconds to
+    wait for the server to start listening.
+    """
+
+    def __init__(self, address, reg, authkey = None, timeout = _CONNECT_TIMEOUT_DEFAULT):
+
+        if not isinstance(address, (str, Path)):
+            raise TypeError(f"`address` must be of type `str` or `Path`, not `{type(address).__name__}`.")
+
+        if isinstance(reg, Register):
+            ident = reg.ident()
+
+        else:
+
+            check_type(reg, "reg", str)
+            ident = reg
+
+        timeout = check_return_int(timeout, "timeout")
+        start = time.time()
+
+        while True:
+
+            try:
+                self._conn = Client(os.fspath(address), "AF_UNIX", authkey = authkey)
+
+            except (FileNotFoundError, ConnectionRefusedError):
+
+                if time.time() - start >= timeout:
+                    raise
+
+                time.sleep(0.05)
+
+            else:
+                break
+
+        self._ident = ident
+        self._lock = threading.RLock()
+        self._attached = OrderedDict() # shared memory name -> `SharedMemory`
+        self._pinned = [] # evicted from `_attached` while views of them were still alive
+        self._conn.send(ident)
+        error, self._shared = self._conn.recv()
+
+        if error is not None:
+
+            self._conn.close()
+            raise _remote_error(*error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+
+        with self._lock:
+
+            self._conn.close()
+            self._pinned.extend(self._attached.values())
+            self._attached.clear()
+            self._detach_pinned()
+
+    def ident(self):
+        return self._ident
+
+    def _call(self, method, *args, **kwargs):
+
+        with self._lock:
+
+            self._conn.send((method, _encode(args), _encode(kwargs)))
+            error, ret = self._conn.recv()
+
+        if error is not None:
+            raise _remote_error(*error)
+
+        return _decode(ret)
+
+    def _view(self, name, shape, dtype):
+
+        with self._lock:
+
+            if name in self._attached:
+                self._attached.move_to_end(name)
+
+            else:
+
+                self._attached[name] = attach_shared_memory(name)
+
+                if len(self._attached) > _MAX_ATTACHED:
+
+                    self._pinned.append(self._attached.popitem(last = False)[1])
+                    self._detach_pinned()
+
+            view = np.ndarray(shape, dtype, self._attached[name].buf)
+
+        view.flags.writeable = False
+        return view
+
+    def _detach_pinned(self):
+
+        pinned = []
+
+        for shm in self._pinned:
+
+            try:
+                shm.close()
+
+            except BufferError: # a view is still alive
+                pinned.append(shm)
+
+        self._pinned = pinned
+
+    def _shared_blk(self, method, apri, *args, **kwargs):
+
+        with self._lock: # the server keeps the segment pinned until this connection sends its next request
+
+            startn, shared, seg = self._call(method, apri, *args, **kwargs)
+
+            if shared is not None:
+                seg = self._view(*shared)
+
+        return Block(seg, apri, startn)
+
+    @contextmanager
+    def blk(self, apri, startn = None, length = None, decompress = False, diskonly = False, recursively = False, **kwargs):
+
+        with self._shared_blk("blk", apri, startn, length, decompress, diskonly, recursively, **kwargs) as blk:
+            yield blk
+
+    @contextmanager
+    def blk_by_n(self, apri, n, decompress = False, diskonly = False, recursively = False, **kwargs):
+
+        with self._shared_blk("blk_by_n", apri, n, decompress, diskonly, recursively, **kwargs) as blk:
+            yield blk
+
+    def blks(self, apri, decompress = False, diskonly = False, recursively = False, **kwargs):
+
+        for startn, length in self.intervals(apri, sort = True, diskonly = diskonly, recursively = recursively):
+
+            with self.blk(apri, startn, length, decompress, diskonly, recursively, **kwargs) as blk:
+                yield blk
+
+    def get(self, apri, n, decompress = False, diskonly = False, **kwargs):
+
+        if self._shared and not isinstance(n, slice):
+
+            try:
+
+                with self.blk_by_n(apri, n, decompress, diskonly, **kwargs) as blk:
+                    return blk[n]
+
+            except DataNotFoundError: # perhaps a virtual `apri` of a `NumpyRegister`
+                pass
+
+        return self._call("get", apri, n, decompress, diskonly, **kwargs)
+
+    def __getitem__(self, apri_n_diskonly):
+
+        apri, n, diskonly = Register._resolve_apri_n_diskonly(apri_n_diskonly)
+        return self.get(apri, n, diskonly = diskonly)
+
+def _forwarded(method):
+
+    def forwarded(self, *args, **kwargs):
+        return self._call(method, *args, **kwargs)
+
+    forwarded.__name__ = method
+    forwarded.__doc__ = f"As `Register.{method}`, evaluated by the server."
+    return forwarded
+
+for _method in _FORWARDED_METHODS:
+    setattr(RemoteRegister, _method, _forwarded(_method))
@@ -44,7 +44,6 @@ setup(
         'numpy>=1.20.0',
         'lmdb>=1.2.1',
         'aiofiles>=23.2.0',
-        'aioshutil>=1.3',
         'stopit>=1.1.2'
     ],
 
@@ -1,13 +1,21 @@
 import math
+import multiprocessing
+import pickle
+import subprocess
+import sys
 from itertools import product
+from multiprocessing import shared_memory
 from unittest import TestCase
 
 import numpy as np
 
-from cornifer import Block, stack
+from cornifer import Block, SharedBlock, stack
 from cornifer.info import ApriInfo
 
 
+def _exit_shared_blk(blk):
+    blk.__exit__(None, None, None)
+
 class Test_Block(TestCase):
 
     def test___init__(self):
@@ -305,4 +313,72 @@ class Test_Block(TestCase):
     def test___hash__(self):
 
         with self.assertRaises(TypeError):
-            hash(Block(np.arange(50), ApriInfo(name ="primes")))
\ No newline at end of file
+            hash(Block(np.arange(50), ApriInfo(name ="primes")))
+    def test___setitem__(self):
+
+        apri = ApriInfo(name = "primes")
+
+        with Block(np.arange(10, 20), apri, 10) as blk:
+
+            blk[12] = -1
+            blk[15:17] = [-2, -3]
+            blk[18:] = 0
+            self.assertTrue(np.array_equal([10, 11, -1, 13, 14, -2, -3, 17, 0, 0], blk.segment))
+
+            with self.assertRaises(IndexError):
+                blk[20] = 0
+
+        with Block(list(range(5)), apri) as blk:
+
+            blk[1:3] = ["a", "b"]
+            self.assertEqual([0, "a", "b", 3, 4], blk.segment)
+
+class Test_SharedBlock(TestCase):
+
+    def test_shared(self):
+
+        apri = ApriInfo(name = "primes")
+
+        with SharedBlock(np.arange(10), apri, 5) as blk:
+
+            name = blk._shm.name
+            self.assertEqual(5, blk.startn)
+            self.assertTrue(np.array_equal(np.arange(10), blk.segment))
+            # an unpickled copy maps the same memory
+            blk_ = pickle.loads(pickle.dumps(blk))
+
+            with blk_:
+
+                blk_[7:9] = -1
+                self.assertEqual(apri, blk_.apri)
+                self.assertTrue(np.array_equal([0, 1, -1, -1, 4, 5, 6, 7, 8, 9], blk.segment))
+
+            with blk: # only the outermost `with` releases the shared memory
+                pass
+
+            self.assertEqual(-1, blk[7])
+            # a forked child inherits the `SharedBlock`, but does not own it
+            proc = multiprocessing.get_context("fork").Process(target = _exit_shared_blk, args = (blk,))
+            proc.start()
+            proc.join()
+            self.assertEqual(0, proc.exitcode)
+            # an unrelated process, which has its own resource tracker, does not unlink it when it exits
+            out = subprocess.run(
+                [sys.executable, "-c", "import pickle, sys\nwith pickle.load(sys.stdin.buffer) as blk:\n    print(blk[7])"],
+                input = pickle.dumps(blk), capture_output = True, check = True
+            )
+            self.assertEqual("-1", out.stdout.decode().strip())
+            self.assertEqual(-1, blk[7])
+            shared_memory.SharedMemory(name).close()
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+        with SharedBlock.zeros((4, 2), np.float32, apri) as blk:
+
+            self.assertEqual((4, 2), blk.segment.shape)
+            self.assertEqual(np.float32, blk.segment.dtype)
+            self.assertTrue(np.all(blk.segment == 0))
+
+        with self.assertRaises(TypeError):
+            SharedBlock(list(range(10)), apri)
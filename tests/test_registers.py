@@ -1,30 +1,43 @@
+import asyncio
+import multiprocessing
 import os
+import pickle
 import re
 import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
 import types
 from contextlib import ExitStack
 from itertools import product, chain, repeat
+from multiprocessing import shared_memory
 from pathlib import Path
-from unittest import TestCase
+from unittest import TestCase, mock
 
 import cornifer
 import numpy as np
 
-from cornifer import NumpyRegister, Register, Block, load_ident, stack
+from cornifer import NumpyRegister, Register, Block, SharedBlock, load_ident, stack
 from cornifer.info import ApriInfo, AposInfo
-from cornifer._utilities import random_unique_filename, intervals_overlap
+from cornifer._utilities import random_unique_filename, intervals_overlap, read_txt_file
+from cornifer._utilities.multiprocessing import ReceivedSigterm, start_with_timeout
 from cornifer.errors import RegisterAlreadyOpenError, DataNotFoundError, RegisterError, CompressionError, \
-    DecompressionError, RegisterRecoveryError, DataExistsError, RegisterNotOpenError, CannotLoadError
+    DecompressionError, RegisterRecoveryError, DataExistsError, RegisterNotOpenError, CannotLoadError, \
+    RegisterOpenError
 from cornifer.regfilestructure import REG_FILENAME, VERSION_FILEPATH, MSG_FILEPATH, CLS_FILEPATH, \
     DATABASE_FILEPATH, MAP_SIZE_FILEPATH, WRITE_DB_FILEPATH
 from cornifer.registers import _BLK_KEY_PREFIX, _KEY_SEP, \
     _APRI_ID_KEY_PREFIX, _ID_APRI_KEY_PREFIX, _START_N_HEAD_KEY, _START_N_TAIL_LENGTH_KEY, _SUB_KEY_PREFIX, \
     _COMPRESSED_KEY_PREFIX, _IS_NOT_COMPRESSED_VAL, _BLK_KEY_PREFIX_LEN, _SUB_VAL, _APOS_KEY_PREFIX, _NO_DEBUG, \
     _START_N_TAIL_LENGTH_DEFAULT, _LENGTH_LENGTH_KEY, _LENGTH_LENGTH_DEFAULT, _CURR_ID_KEY, \
-    _INITIAL_REGISTER_SIZE_DEFAULT, _MAX_APRI_DFL, _MAX_APRI_LEN_KEY, _MAX_APRI_DFL_LEN
+    _INITIAL_REGISTER_SIZE_DEFAULT, _MAX_APRI_DFL, _MAX_APRI_LEN_KEY, _MAX_APRI_DFL_LEN, _STATS_KEY_PREFIX, \
+    _MONOTONE_KEY_PREFIX, _INVERSE_KEY_PREFIX, _HAS_INVERSE_KEY_PREFIX
 from cornifer._utilities.lmdb import db_has_key, db_prefix_iter, db_count_keys, open_lmdb, \
-    num_open_readers_accurate, r_txn_count_keys, r_txn_has_key, db_prefix_list
+    num_open_readers_accurate, r_txn_count_keys, r_txn_has_key, db_prefix_list, r_txn_prefix_iter
 from cornifer.version import CURRENT_VERSION
+from cornifer.multiprocessing import _wait_for_exit, WorkerPool, SharedArray
 
 """
 PUBLIC READ-WRITE METHODS FOR LMDB:
@@ -147,6 +160,125 @@ class Testy_Register2(Register):
     @classmethod
     def clean_disk_data(cls, filename, **kwargs):pass
 
+def _list_map(seg):
+    return list(seg)
+
+def _list_combine(x, y):
+    return x + y
+
+def _square_map(seg):
+    return seg ** 2
+
+def _shorten_map(seg):
+    return seg[1:]
+
+def _hold_reader_and_die(filepath):
+
+    db = open_lmdb(filepath, 2 ** 20, True)
+    txn = db.begin()
+    os._exit(0)
+
+def _add_disk_blks_via_commit_service(num_procs, proc_index, reg, startns):
+
+    with reg.open() as reg:
+
+        for startn in startns[proc_index :: num_procs]:
+
+            with Block(np.arange(startn, startn + 10), ApriInfo(name = "committed"), startn) as blk:
+                reg.add_disk_blk(blk)
+
+def _fill_shared_ram_blk(num_procs, proc_index, reg):
+
+    with reg.open(readonly = True) as reg:
+
+        with reg.blk(ApriInfo(name = "shared"), 0, 100) as blk:
+
+            startn = proc_index * 100 // num_procs
+            stop = (proc_index + 1) * 100 // num_procs
+            blk[startn : stop] = np.arange(startn, stop) ** 2
+
+def _grow_map_of(reg):
+
+    with reg.open() as reg:
+
+        for startn in range(200):
+
+            with Block(np.arange(1), ApriInfo(name = "growing"), startn) as blk:
+                reg.add_disk_blk(blk)
+
+def _exit_quickly(num_procs, proc_index):
+    pass
+
+def _add_item_blk(item, reg):
+
+    with reg.open() as reg:
+
+        with Block(np.arange(item, item + 10), ApriInfo(name = "items"), item) as blk:
+            reg.add_disk_blk(blk)
+
+    return os.getpid()
+
+def _record_pid(item, reg, out_dir):
+    # `reg` was opened by the worker when it started
+    (out_dir / f"{item}-{os.getpid()}-{reg.num_blks(ApriInfo(name = 'items'))}").touch()
+
+def _record_proc_index(num_procs, proc_index, out_dir, job):
+    (out_dir / f"{job}-{num_procs}-{proc_index}-{os.getpid()}").touch()
+
+def _read_shared(item, arr):
+
+    with np.testing.assert_raises(ValueError): # read-only
+        arr[item] = 0
+
+    return int(arr[item])
+
+def _unlink_shared(shared):
+    shared.unlink()
+
+def _die_once(item, marker_dir):
+    # kills its process the first time that it is called on `item`, and raises for the item 3
+
+    marker = marker_dir / str(item)
+
+    if not marker.exists():
+
+        marker.touch()
+        os._exit(1)
+
+    if item == 3:
+        raise ValueError("item 3")
+
+def _return_unpicklable(item, marker_dir):
+
+    (marker_dir / f"{item}-{os.getpid()}").touch()
+    return lambda: item
+
+def _fail_to_open(reg, readonly = False):
+    raise RegisterError("cannot open")
+
+def _build_squares(startn, length):
+    return np.arange(startn, startn + length) ** 2
+
+def _build_squares_until_500(startn, length):
+
+    if startn >= 500:
+        raise RuntimeError
+
+    return _build_squares(startn, length)
+
+def _build_squares_until_sigterm(startn, length):
+    # the `Block`s before 300 finish before the parent receives a SIGTERM, which it does while the rest are running
+
+    if startn == 300:
+
+        time.sleep(2)
+        os.kill(os.getppid(), signal.SIGTERM)
+
+    if startn >= 300:
+        time.sleep(60)
+
+    return _build_squares(startn, length)
+
 def data(blk):
 
     with blk:
@@ -5448,29 +5580,1573 @@ class Test_Register(TestCase):
                                 list(range(5)) + list(range(15, 10 + i + 1)) + list(range(i + 1, 15))
                             )
 
-    def test_readers(self):
+    def test_windows(self):
 
         reg = NumpyRegister(SAVES_DIR, "sh", "msg")
-        num_apos_queries = 100000
         apri = ApriInfo(hi = "hello")
-        apos = AposInfo(hey = "sup")
+        data = np.arange(40)
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "windows"):
+            next(reg.windows(apri, 5))
 
         with reg.open() as reg:
-            reg.set_apos(apri, apos)
 
-        try:
+            for startn, length in [(0, 10), (10, 15), (5, 10), (25, 15)]:
 
-            with reg.open(readonly=True) as reg:
+                with Block(data[startn : startn + length], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
 
-                    for j in range(num_apos_queries):
-                        y = reg.apos(apri)
+            with self.assertRaisesRegex(ValueError, "positive"):
+                next(reg.windows(apri, 0))
 
-        finally:
-            print(j)
+            with self.assertRaisesRegex(ValueError, "positive"):
+                next(reg.windows(apri, 5, 0))
 
-    def test_num_blks(self):
+            for size, step in product([1, 3, 10, 40], [1, 4, 11]):
 
-        pass # TODO
+                wins = list(reg.windows(apri, size, step))
+                self.assertEqual(len(range(0, 40 - size + 1, step)), len(wins))
+
+                for n, win in zip(range(0, 40 - size + 1, step), wins):
+
+                    self.assertTrue(np.all(data[n : n + size] == win))
+
+                    if any(a <= n and n + size <= b for a, b in [(0, 10), (10, 25), (25, 40)]):
+                        self.assertIsInstance(win, np.memmap)
+
+                    else:
+                        self.assertNotIsInstance(win, np.memmap)
+
+            wins = list(reg.windows(apri, 5, 5, 12, 33))
+            self.assertEqual(4, len(wins))
+
+            for n, win in zip(range(12, 33, 5), wins):
+                self.assertTrue(np.all(data[n : n + 5] == win))
+
+            self.assertEqual([], list(reg.windows(apri, 5, 1, 38)))
+
+            with self.assertRaises(DataNotFoundError):
+                next(reg.windows(apri, 5, 1, 30, 41))
+
+            with self.assertRaises(DataNotFoundError):
+                next(reg.windows(apri, 5, 1, 40))
+
+            with Block(np.arange(100, 103), apri, 20) as blk:
+
+                reg.add_ram_blk(blk)
+                expected = np.concatenate((data[:20], np.arange(100, 103), data[23:]))
+
+                for n, win in enumerate(reg.windows(apri, 7)):
+                    self.assertTrue(np.all(expected[n : n + 7] == win))
+
+                for n, win in enumerate(reg.windows(apri, 7, diskonly = True)):
+                    self.assertTrue(np.all(data[n : n + 7] == win))
+
+                reg.rmv_ram_blk(blk)
+
+            with Block(np.arange(50, 55), apri, 50) as blk:
+
+                reg.add_disk_blk(blk)
+                self.assertEqual(40 - 4, len(list(reg.windows(apri, 5))))
+
+                with self.assertRaises(DataNotFoundError):
+                    next(reg.windows(apri, 5, 1, 0, 55))
+
+            empty_apri = ApriInfo(name = "zz")
+
+            with self.assertRaises(DataNotFoundError):
+                next(reg.windows(empty_apri, 2, stop = 5))
+
+            with self.assertRaises(DataNotFoundError):
+                next(reg.iter_chunks(empty_apri, 2, stop = 5))
+
+            self.assertEqual([], list(reg.windows(empty_apri, 2)))
+
+    def test_iter_chunks(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(hi = "hello")
+        data = np.arange(23)
+
+        with reg.open() as reg:
+
+            self.assertEqual([], list(reg.iter_chunks(apri, 5)))
+
+            for startn, length in [(0, 7), (7, 3), (10, 13)]:
+
+                with Block(data[startn : startn + length], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            for chunk_len in range(1, 25):
+
+                chunks = list(reg.iter_chunks(apri, chunk_len))
+                self.assertEqual(len(range(0, 23, chunk_len)), len(chunks))
+
+                for n, chunk in zip(range(0, 23, chunk_len), chunks):
+                    self.assertTrue(np.all(data[n : n + chunk_len] == chunk))
+
+            chunks = list(reg.iter_chunks(apri, 4, 3, 12))
+            self.assertEqual([[3, 4, 5, 6], [7, 8, 9, 10], [11]], [list(chunk) for chunk in chunks])
+
+    def test_reduce(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(hi = "hello")
+        data = np.arange(50) % 7
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "reduce"):
+            reg.reduce(apri, "sum")
+
+        with reg.open() as reg:
+
+            with self.assertRaises(DataNotFoundError):
+                reg.reduce(apri, "sum")
+
+            for startn, length in [(0, 10), (10, 15), (5, 10), (25, 25)]:
+
+                with Block(data[startn : startn + length], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with self.assertRaisesRegex(ValueError, "map_fn"):
+                reg.reduce(apri, "product")
+
+            with self.assertRaisesRegex(ValueError, "combine_fn"):
+                reg.reduce(apri, "sum", _list_combine)
+
+            with self.assertRaisesRegex(TypeError, "combine_fn"):
+                reg.reduce(apri, _list_map)
+
+            with self.assertRaisesRegex(ValueError, "num_procs"):
+                reg.reduce(apri, "sum", num_procs = 0)
+
+            for num_procs in [1, 3]:
+
+                self.assertEqual(np.sum(data), reg.reduce(apri, "sum", num_procs = num_procs))
+                self.assertEqual(50, reg.reduce(apri, "count", num_procs = num_procs))
+                self.assertEqual((0, 6), reg.reduce(apri, "minmax", num_procs = num_procs))
+                self.assertEqual(
+                    list(np.bincount(data)), list(reg.reduce(apri, "bincount", num_procs = num_procs))
+                )
+                self.assertEqual(list(data), reg.reduce(apri, _list_map, _list_combine, num_procs = num_procs))
+                self.assertEqual(
+                    list(data[12 : 42]),
+                    reg.reduce(apri, _list_map, _list_combine, 12, 30, num_procs = num_procs)
+                )
+                self.assertEqual(
+                    list(data[:7]), reg.reduce(apri, _list_map, _list_combine, length = 7, num_procs = num_procs)
+                )
+
+            with self.assertRaises(DataNotFoundError):
+                reg.reduce(apri, "sum", startn = 40, length = 11)
+
+            with Block(np.arange(100, 103), apri, 20) as blk:
+
+                reg.add_ram_blk(blk)
+                expected = list(data[:20]) + [100, 101, 102] + list(data[23:])
+                self.assertEqual(expected, reg.reduce(apri, _list_map, _list_combine, num_procs = 2))
+                self.assertEqual(list(data), reg.reduce(apri, _list_map, _list_combine, diskonly = True))
+                reg.rmv_ram_blk(blk)
+
+    def test_map_blks(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        src_apri = ApriInfo(hi = "hello")
+        dst_apri = ApriInfo(hi = "squared")
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "map_blks"):
+            reg.map_blks(src_apri, dst_apri, _square_map)
+
+        with reg.open() as reg:
+
+            self.assertEqual(0, reg.map_blks(src_apri, dst_apri, _square_map))
+            self.assertNotIn(dst_apri, reg)
+
+            for startn, length in [(0, 10), (10, 15), (5, 10)]:
+
+                with Block(np.arange(startn, startn + length), src_apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with self.assertRaisesRegex(TypeError, "fn"):
+                reg.map_blks(src_apri, dst_apri, 5)
+
+            with self.assertRaisesRegex(ValueError, "num_procs"):
+                reg.map_blks(src_apri, dst_apri, _square_map, 0)
+
+            num_files = len(list(reg._local_dir.iterdir()))
+
+            with self.assertRaisesRegex(ValueError, "preserve length"):
+                reg.map_blks(src_apri, dst_apri, _shorten_map, batch_size = 1)
+
+            self.assertEqual(num_files, len(list(reg._local_dir.iterdir())))
+            self.assertNotIn(dst_apri, reg)
+            self.assertEqual(3, reg.map_blks(src_apri, dst_apri, _square_map))
+            self.assertEqual(0, reg.map_blks(src_apri, dst_apri, _square_map))
+            self.assertEqual(
+                list(reg.intervals(src_apri, sort = True)), list(reg.intervals(dst_apri, sort = True))
+            )
+
+            for startn, length in reg.intervals(src_apri):
+
+                with reg.blk(dst_apri, startn, length) as blk:
+                    self.assertEqual(list(np.arange(startn, startn + length) ** 2), list(blk.segment))
+
+            with Block(np.arange(25, 30), src_apri, 25) as blk:
+                reg.add_disk_blk(blk)
+
+            reg.rmv_disk_blk(dst_apri, 0, 10)
+            dst_reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+
+            with dst_reg.open() as dst_reg:
+
+                self.assertEqual(2, reg.map_blks(src_apri, dst_apri, _square_map, 2, batch_size = 1))
+                self.assertEqual(4, reg.num_blks(dst_apri))
+                self.assertEqual(4, reg.map_blks(src_apri, dst_apri, _square_map, 2, dst_reg))
+                self.assertEqual(list(np.arange(30) ** 2), list(dst_reg[dst_apri, :]))
+
+    def test_zone_maps(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(hi = "hello")
+        data = np.concatenate((np.arange(0, 10), np.arange(100, 110), np.arange(50, 60), np.arange(-10, 0)))
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "where"):
+            reg.where(apri, 0, 1)
+
+        with reg.open() as reg:
+
+            self.assertEqual([], list(reg.where(apri, 0, 1)))
+            self.assertEqual(0, reg.range_sum(apri))
+
+            for startn in range(0, 40, 10):
+
+                with Block(data[startn : startn + 10], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with Block(np.arange(5.), apri, 100) as blk:
+                reg.add_disk_blk(blk)
+
+            with Block(np.array(["a", "b"]), ApriInfo(hi = "strs")) as blk:
+                reg.add_disk_blk(blk)
+
+            self.assertEqual(5, db_count_keys(_STATS_KEY_PREFIX, reg._db))
+
+            with reg._txn("reader") as ro_txn:
+
+                blk_key, _ = reg._get_disk_blk_keys(apri, None, True, 10, 10, ro_txn)
+                self.assertEqual((100, 109, sum(range(100, 110)), 10), Register._get_stats_disk(blk_key, ro_txn))
+
+            full_data = np.concatenate((data, np.zeros(60), np.arange(5.)))
+            full_indices = np.concatenate((np.arange(40), np.arange(100, 105)))
+
+            for lo, hi in [(0, 9), (-5, 3), (100, 109), (55, 105), (-100, 1000), (1000, 2000), (2, 2)]:
+
+                expected = [n for n in full_indices if lo <= full_data[n] <= hi]
+                self.assertEqual(expected, list(reg.where(apri, lo, hi)))
+                self.assertEqual(len(expected), reg.range_count(apri, lo, hi))
+
+            self.assertEqual([12, 13, 14], list(reg.where(apri, 100, 120, 12, 3)))
+            self.assertEqual(3, reg.range_count(apri, 100, 120, 12, 3))
+            self.assertEqual(np.sum(data) + 10, reg.range_sum(apri))
+            self.assertEqual(np.sum(data[5 : 35]), reg.range_sum(apri, 5, 30))
+            self.assertEqual(np.sum(data[20:]), reg.range_sum(apri, 20, 20))
+            # blocks answered from metadata are never loaded
+            with reg.blk(apri, 10, 10, mmap_mode = "r") as blk:
+                filename = Path(blk.segment.filename)
+
+            contents = filename.read_bytes()
+            filename.write_bytes(b"corrupted")
+
+            try:
+
+                self.assertEqual(list(range(10, 20)), list(reg.where(apri, 100, 200)))
+                self.assertEqual(np.sum(data[5 : 35]), reg.range_sum(apri, 5, 30))
+
+                with self.assertRaises(ValueError):
+                    reg.range_sum(apri, 15, 10)
+
+            finally:
+                filename.write_bytes(contents)
+
+            with reg._txn("reader") as ro_txn:
+                blk_key, _ = reg._get_disk_blk_keys(apri, None, True, 10, 10, ro_txn)
+
+            stats_while_writing = []
+            add_disk_blk_disk2 = NumpyRegister._add_disk_blk_disk2
+
+            def spy(*args):
+
+                with reg._txn("reader") as ro_txn:
+                    stats_while_writing.append(Register._get_stats_disk(blk_key, ro_txn))
+
+                return add_disk_blk_disk2(*args)
+
+            NumpyRegister._add_disk_blk_disk2 = spy
+
+            try:
+                reg.set(apri, 12, 1000)
+
+            finally:
+                NumpyRegister._add_disk_blk_disk2 = add_disk_blk_disk2
+
+            # the stats were invalidated before the file was rewritten
+            self.assertEqual([None], stats_while_writing)
+            reg.set(apri, 15, -1000, mmap_mode = "r+")
+            data[12] = 1000
+            data[15] = -1000
+            self.assertEqual([12], list(reg.where(apri, 200, 2000)))
+            self.assertEqual([15], list(reg.where(apri, -2000, -200)))
+            self.assertEqual(np.sum(data) + 10, reg.range_sum(apri))
+
+            reg.increase_max_apri(100 * _MAX_APRI_DFL)
+            self.assertEqual(5, db_count_keys(_STATS_KEY_PREFIX, reg._db))
+            self.assertEqual(np.sum(data) + 10, reg.range_sum(apri))
+
+            reg.concat_disk_blks(apri, 0, 40, delete = True)
+            self.assertEqual(2, db_count_keys(_STATS_KEY_PREFIX, reg._db))
+            self.assertEqual(np.sum(data) + 10, reg.range_sum(apri))
+
+            reg.rmv_disk_blk(apri, 100, 5)
+            self.assertEqual(1, db_count_keys(_STATS_KEY_PREFIX, reg._db))
+
+            with Block(np.arange(5.), apri, 100) as blk:
+                reg.add_disk_blk(blk)
+
+            reg.rmv_apri(apri, force = True)
+            self.assertEqual(0, db_count_keys(_STATS_KEY_PREFIX, reg._db))
+            # sums of large integers do not wrap around
+            big_apri = ApriInfo(name = "big")
+            big = np.array([2 ** 62, 2 ** 62, 2 ** 62 - 1, 2 ** 62 - 2], dtype = np.int64)
+
+            for startn in (0, 4):
+
+                with Block(big, big_apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            self.assertEqual(2 * sum(big.tolist()), reg.range_sum(big_apri))
+            self.assertEqual(sum(big.tolist()[2:]) + sum(big.tolist()[:2]), reg.range_sum(big_apri, 2, 4))
+
+    def test_searchsorted(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "primes")
+        primes = np.array([p for p in range(2, 400) if all(p % d != 0 for d in range(2, int(p ** 0.5) + 1))])
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "searchsorted"):
+            reg.searchsorted(apri, 10)
+
+        with reg.open() as reg:
+
+            for startn, length in [(0, 10), (10, 7), (17, 13), (30, 20), (25, 10), (50, len(primes) - 50)]:
+
+                with Block(primes[startn : startn + length], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with self.assertRaisesRegex(ValueError, "set_monotone"):
+                reg.searchsorted(apri, 10)
+
+            self.assertFalse(reg.is_monotone(apri))
+            reg.set_monotone(apri)
+            self.assertTrue(reg.is_monotone(apri))
+
+            with self.assertRaisesRegex(ValueError, "side"):
+                reg.searchsorted(apri, 10, "middle")
+
+            values = np.arange(-5, 410)
+
+            for side in ["left", "right"]:
+
+                self.assertEqual(
+                    list(np.searchsorted(primes, values, side = side)),
+                    list(reg.searchsorted(apri, values, side = side))
+                )
+
+            self.assertEqual(25, reg.searchsorted(apri, 100, "right"))
+            self.assertEqual([[4, 25], [0, len(primes)]], reg.searchsorted(apri, [[10, 100], [1, 1000]]).tolist())
+
+            with Block(primes[40 : 45].copy(), apri, 40) as blk:
+
+                reg.add_ram_blk(blk)
+                self.assertEqual(
+                    list(np.searchsorted(primes, values)), list(reg.searchsorted(apri, values))
+                )
+                reg.rmv_ram_blk(blk)
+            # statistics are only bounds after an in-place `set`
+            reg.set(apri, 29, primes[29] - 1, mmap_mode = "r+")
+            reg.set(apri, 29, primes[29], mmap_mode = "r+")
+            self.assertEqual(list(np.searchsorted(primes, values)), list(reg.searchsorted(apri, values)))
+
+            reg.increase_max_apri(100 * _MAX_APRI_DFL)
+            self.assertTrue(reg.is_monotone(apri))
+
+            reg.set(apri, 5, 1000)
+
+            with self.assertRaisesRegex(ValueError, "non-decreasing"):
+                reg.set_monotone(apri)
+
+            reg.set_monotone(apri, verify = False)
+            self.assertTrue(reg.is_monotone(apri))
+            reg.set_monotone(apri, False)
+            self.assertFalse(reg.is_monotone(apri))
+            reg.set_monotone(apri, verify = False)
+            reg.rmv_apri(apri, force = True)
+            self.assertEqual(0, db_count_keys(_MONOTONE_KEY_PREFIX, reg._db))
+            # values above 2 ** 53 are compared exactly
+            big_apri = ApriInfo(name = "big")
+            big = 2 ** 60 + np.arange(30, dtype = np.int64)
+
+            for startn in range(0, 30, 10):
+
+                with Block(big[startn : startn + 10], big_apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            reg.set_monotone(big_apri)
+
+            for side in ["left", "right"]:
+                self.assertEqual(
+                    list(np.searchsorted(big, big, side = side)), list(reg.searchsorted(big_apri, big, side = side))
+                )
+
+    def test_inverse_index(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "squares mod 11")
+        seq = np.arange(300) ** 2 % 11
+
+        def check(stop):
+
+            for v in range(-1, 12):
+                self.assertEqual(list(np.nonzero(seq[:stop] == v)[0]), list(reg.find(apri, v)))
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "find"):
+            reg.find(apri, 1)
+
+        with reg.open() as reg:
+
+            for startn in [0, 100]:
+
+                with Block(seq[startn : startn + 100], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            self.assertFalse(reg.has_inverse_index(apri))
+
+            with self.assertRaisesRegex(ValueError, "inverse index"):
+                reg.find(apri, 1)
+
+            reg.build_inverse_index(apri)
+            self.assertTrue(reg.has_inverse_index(apri))
+            check(200)
+
+            with Block(seq[200:], apri, 200) as blk:
+                reg.add_disk_blk(blk)
+
+            check(300)
+            self.assertEqual(
+                [list(np.nonzero(seq == 3)[0]), [], list(np.nonzero(seq == 0)[0])],
+                [list(indices) for indices in reg.find(apri, [3, 7, np.int64(0)])]
+            )
+
+            with Block(seq[50 : 150], apri, 50) as blk:
+                # overlapping `Block`s do not duplicate indices
+                reg.add_disk_blk(blk)
+                check(300)
+                reg.rmv_disk_blk(apri, 50, 100)
+                check(300)
+
+            with Block(seq[:10] + 100, apri, 0) as blk:
+                # RAM `Block`s are not indexed
+                reg.add_ram_blk(blk)
+                check(300)
+                reg.rmv_ram_blk(blk)
+
+            self.assertEqual(300, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+            seq[5] = 7
+            reg.set(apri, 5, 7)
+            check(300)
+            seq[5] = 3
+            reg.set(apri, 5, 3, mmap_mode = "r+")
+            check(300)
+
+            reg.concat_disk_blks(apri, 0, 200, delete = True)
+            check(300)
+            self.assertEqual(300, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+
+            reg.compress(apri, 200, 100)
+            reg.rmv_disk_blk(apri, 200, 100)
+            check(200)
+
+            reg.increase_max_apri(100 * _MAX_APRI_DFL)
+            self.assertTrue(reg.has_inverse_index(apri))
+            check(200)
+
+            with Block(np.array([0.5]), apri, 200) as blk:
+
+                with self.assertRaisesRegex(ValueError, "integer"):
+                    reg.add_disk_blk(blk)
+
+            check(200)
+            float_apri = ApriInfo(name = "floats")
+
+            with Block(np.array([0.5, 1.5]), float_apri) as blk:
+                reg.add_disk_blk(blk)
+
+            with self.assertRaisesRegex(ValueError, "integer"):
+                reg.build_inverse_index(float_apri)
+
+            self.assertFalse(reg.has_inverse_index(float_apri))
+            reg.drop_inverse_index(apri)
+            self.assertFalse(reg.has_inverse_index(apri))
+            self.assertEqual(0, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+            reg.build_inverse_index(apri)
+            check(200)
+            reg.rmv_apri(apri, force = True)
+            self.assertEqual(0, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+            self.assertEqual(0, db_count_keys(_HAS_INVERSE_KEY_PREFIX, reg._db))
+
+    def test_inverse_index_overlapping(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "identity")
+
+        with reg.open() as reg:
+
+            for startn in [0, 5, 20]:
+
+                with Block(np.arange(startn, startn + 10), apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            for num_procs in [2, 1]:
+
+                # the entries of the third `Block` are written in bulk, the others are counted one at a time
+                reg.build_inverse_index(apri, num_procs = num_procs)
+                self.assertEqual([[7], [12], [25]], [list(indices) for indices in reg.find(apri, [7, 12, 25])])
+                self.assertEqual(25, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+                reg.rmv_disk_blk(apri, 20, 10)
+                self.assertEqual(15, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+
+                if num_procs == 2:
+
+                    reg.drop_inverse_index(apri)
+
+                    with Block(np.arange(20, 30), apri, 20) as blk:
+                        reg.add_disk_blk(blk)
+
+            self.assertEqual([7], list(reg.find(apri, 7)))
+            reg.rmv_disk_blk(apri, 0, 10)
+            self.assertEqual(7, reg.get(apri, 7))
+            self.assertEqual([7], list(reg.find(apri, 7)))
+            self.assertEqual([], list(reg.find(apri, 2)))
+            reg.rmv_disk_blk(apri, 5, 10)
+            self.assertEqual([], list(reg.find(apri, 7)))
+            self.assertEqual(0, db_count_keys(_INVERSE_KEY_PREFIX, reg._db))
+
+            extremes = [-2 ** 63, -1, 0, 2 ** 63 - 1]
+
+            for dtype, values in [(np.int64, extremes), (np.uint64, [0, 2 ** 63, 2 ** 64 - 1])]:
+
+                apri = ApriInfo(name = "extremes", dtype = str(dtype))
+
+                with Block(np.array(values, dtype = dtype), apri) as blk:
+                    reg.add_disk_blk(blk)
+
+                reg.build_inverse_index(apri)
+                self.assertEqual(
+                    [[n] for n in range(len(values))], [list(indices) for indices in reg.find(apri, values)]
+                )
+
+    def test_sample(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "squares")
+        seq = np.arange(1000) ** 2
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "sample"):
+            reg.sample(apri, 1)
+
+        with reg.open() as reg:
+
+            for startn, length in [(0, 100), (100, 250), (500, 300), (600, 100), (800, 200)]:
+
+                with Block(seq[startn : startn + length], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            stored = np.concatenate([np.arange(350), np.arange(500, 1000)])
+
+            for replace in [False, True]:
+
+                ns, values = reg.sample(apri, 200, seed = 1, replace = replace)
+                self.assertEqual(200, len(ns))
+                self.assertTrue(np.all(np.isin(ns, stored)))
+                self.assertTrue(np.all(ns[1:] >= ns[:-1]))
+                self.assertTrue(np.all(values == seq[ns]))
+                self.assertEqual(list(ns), list(reg.sample(apri, 200, seed = 1, replace = replace)[0]))
+
+            ns, _ = reg.sample(apri, len(stored))
+            self.assertEqual(list(stored), list(ns))
+
+            with self.assertRaisesRegex(ValueError, "without replacement"):
+                reg.sample(apri, len(stored) + 1)
+
+            self.assertEqual(len(stored) + 1, len(reg.sample(apri, len(stored) + 1, replace = True)[0]))
+            ns, values = reg.sample(apri, 0)
+            self.assertEqual((0, 0), (len(ns), len(values)))
+
+            ns, values = reg.sample(apri, 50, seed = 2, startn = 300, length = 300)
+            self.assertTrue(np.all(np.isin(ns, np.concatenate([np.arange(300, 350), np.arange(500, 600)]))))
+            self.assertTrue(np.all(values == seq[ns]))
+
+            ns, values = reg.sample(apri, 10, seed = 3, strata = 4)
+            self.assertEqual([10] * 4, list(np.histogram(ns, [0, 250, 500, 750, 1000])[0]))
+            self.assertTrue(np.all(values == seq[ns]))
+
+            ns, _ = reg.sample(apri, 5, seed = 4, strata = [(0, 10), (990, 10)])
+            self.assertEqual(10, len(set(ns)))
+            self.assertTrue(np.all(ns[:5] < 10) and np.all(ns[5:] >= 990))
+
+            with self.assertRaisesRegex(ValueError, "from 0 indices"):
+                reg.sample(apri, 1, replace = True, strata = [(400, 50)])
+
+            with Block(np.arange(10), apri, 345) as blk:
+                # RAM `Block`s take precedence
+                reg.add_ram_blk(blk)
+                ns, values = reg.sample(apri, 15, strata = [(340, 20)])
+                self.assertEqual(list(range(340, 355)), list(ns))
+                self.assertEqual(list(seq[340 : 345]) + list(range(10)), list(values))
+                reg.rmv_ram_blk(blk)
+
+    def test_get_rows(self):
+
+        reg1 = NumpyRegister(SAVES_DIR, "sh1", "msg")
+        reg2 = NumpyRegister(SAVES_DIR, "sh2", "msg")
+        apri1 = ApriInfo(name = "a")
+        apri2 = ApriInfo(name = "b")
+        apri3 = ApriInfo(name = "c")
+        seqs = {apri1 : np.arange(500), apri2 : np.arange(500) ** 2, apri3 : -np.arange(500)}
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "get_rows"):
+            reg1.get_rows([apri1], 0, 10)
+
+        with stack(reg1.open(), reg2.open()):
+
+            for reg, apri, boundaries in [
+                (reg1, apri1, [0, 100, 250, 500]), (reg1, apri2, [0, 7, 300, 301, 500]), (reg2, apri3, [0, 499, 500])
+            ]:
+                for startn, stopn in zip(boundaries[:-1], boundaries[1:]):
+
+                    with Block(seqs[apri][startn : stopn], apri, startn) as blk:
+                        reg.add_disk_blk(blk)
+
+            rows = reg1.get_rows([apri1, apri2], 5, 305)
+            self.assertEqual([apri1, apri2], list(rows.keys()))
+
+            for apri in [apri1, apri2]:
+                self.assertTrue(np.all(rows[apri] == seqs[apri][5 : 305]))
+
+            rows = reg1.get_rows([apri1, apri2], 110, 120)
+            self.assertIsInstance(rows[apri1], np.memmap)
+
+            with self.assertRaises(DataNotFoundError):
+                reg1.get_rows([apri1, apri3], 0, 10)
+
+            reg1.add_subreg(reg2)
+
+            with self.assertRaises(DataNotFoundError):
+                reg1.get_rows([apri1, apri3], 0, 10)
+
+            rows = reg1.get_rows([apri3, apri1], 0, 500, recursively = True)
+
+            for apri in [apri1, apri3]:
+                self.assertTrue(np.all(rows[apri] == seqs[apri]))
+
+            for chunk_len in [1, 33, 100, 600]:
+
+                total = 0
+
+                for rows in reg1.iter_rows([apri1, apri2, apri3], chunk_len, 50, 450, recursively = True):
+
+                    lengths = set(len(seg) for seg in rows.values())
+                    self.assertEqual(1, len(lengths))
+                    length = lengths.pop()
+                    self.assertTrue(length == chunk_len or total + length == 400)
+
+                    for apri, seg in rows.items():
+                        self.assertTrue(np.all(seg == seqs[apri][50 + total : 50 + total + length]))
+
+                    total += length
+
+                self.assertEqual(400, total)
+
+            self.assertEqual({apri1 : []}, {apri : list(seg) for apri, seg in reg1.get_rows([apri1], 10, 10).items()})
+            self.assertEqual({}, reg1.get_rows([], 0, 10))
+
+            with self.assertRaisesRegex(ValueError, "duplicates"):
+                reg1.get_rows([apri1, apri1], 0, 10)
+
+    def test_virtual_apri(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "squares")
+        diff_apri = ApriInfo(name = "differences")
+        mod_apri = ApriInfo(name = "differences mod 7")
+        seq = np.arange(1000) ** 2
+        diffs = seq[1:] - seq[:-1]
+        calls = []
+
+        def diff(a, b):
+
+            calls.append(len(a))
+            return b - a
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "add_virtual_apri"):
+            reg.add_virtual_apri(diff_apri, diff, [apri, (apri, 1)])
+
+        with reg.open() as reg:
+
+            for startn in range(0, 1000, 300):
+
+                with Block(seq[startn : startn + 300], apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            reg.add_virtual_apri(diff_apri, diff, [apri, (apri, 1)], blk_len = 100, cache_size = 2)
+            reg.add_virtual_apri(mod_apri, lambda a: a % 7, [diff_apri])
+
+            with self.assertRaisesRegex(ValueError, "itself"):
+                reg.add_virtual_apri(apri, lambda a: a, [mod_apri])
+
+            self.assertEqual(diffs[5], reg[diff_apri, 5])
+            self.assertEqual([100], calls)
+            self.assertEqual(diffs[99], reg[diff_apri, 99])
+            self.assertEqual(diffs[998], reg[diff_apri, 998])
+            self.assertEqual(diffs[50], reg[diff_apri, 50])
+            self.assertEqual([100, 99], calls)
+            self.assertEqual(diffs[150], reg[diff_apri, 150])
+            self.assertEqual(diffs[998], reg[diff_apri, 998])
+            # the least recently used chunk was evicted
+            self.assertEqual([100, 99, 100, 99], calls)
+
+            with self.assertRaises(DataNotFoundError):
+                reg[diff_apri, 999]
+
+            with self.assertRaises(DataNotFoundError):
+                reg.get(diff_apri, 5, diskonly = True)
+
+            self.assertEqual(list(diffs[250 : 430 : 3]), list(reg[diff_apri, 250 : 430 : 3]))
+            self.assertEqual(list(diffs), list(reg[diff_apri, :]))
+            self.assertEqual(list(diffs % 7), list(reg[mod_apri, :]))
+
+            with reg.blk(diff_apri, 200) as blk:
+                self.assertEqual((200, list(diffs[200 : 300])), (blk.startn, list(blk.segment)))
+
+            with reg.blk(diff_apri, 210, 150) as blk:
+                self.assertEqual((210, list(diffs[210 : 360])), (blk.startn, list(blk.segment)))
+
+            with self.assertRaisesRegex(ValueError, "Step"):
+                reg[diff_apri, 0 : 10 : 0]
+
+            with self.assertRaisesRegex(ValueError, "Step"):
+                reg[diff_apri, 10 : 0 : -1]
+
+            reg.materialize(diff_apri, 150, 200)
+            self.assertEqual([(150, 50), (200, 100), (300, 50)], sorted(reg.intervals(diff_apri)))
+            calls.clear()
+            reg.materialize(diff_apri)
+            # the chunk `[200, 300)` was already covered, so it was not calculated
+            self.assertEqual([100, 100] + [100] * 6 + [99], calls)
+            self.assertEqual(
+                [(0, 100), (100, 100), (150, 50), (200, 100), (300, 50)] +
+                [(n, 100) for n in range(300, 900, 100)] + [(900, 99)],
+                sorted(reg.intervals(diff_apri))
+            )
+            num_calls = len(calls)
+            self.assertEqual(list(diffs), list(reg[diff_apri, :]))
+            self.assertEqual(num_calls, len(calls))
+            # materialized data takes precedence over calculated data
+            reg.set(diff_apri, 5, -1)
+            self.assertEqual(-1, reg[diff_apri, 5])
+            # the cache is not updated, until `mod_apri` is declared again
+            self.assertEqual(diffs[5] % 7, reg[mod_apri, 5])
+            reg.add_virtual_apri(mod_apri, lambda a: a % 7, [diff_apri])
+            self.assertEqual(-1 % 7, reg[mod_apri, 5])
+
+            reg.rmv_virtual_apri(diff_apri)
+
+            with self.assertRaises(DataNotFoundError):
+                reg.rmv_virtual_apri(diff_apri)
+
+            self.assertEqual(diffs[6], reg[diff_apri, 6])
+
+            with self.assertRaises(DataNotFoundError):
+                reg.materialize(diff_apri)
+
+    def test_memoize(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "cubes")
+        calls = []
+
+        def cube(n):
+
+            calls.append(n)
+            return n ** 3
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "memoize"):
+            reg.memoize(apri)
+
+        with reg.open() as reg:
+
+            with Block(np.arange(10, 20) ** 3, apri, 10) as blk:
+                reg.add_disk_blk(blk)
+
+            with self.assertRaisesRegex(ValueError, "flush_len"):
+                reg.memoize(apri, 0)
+
+            f = reg.memoize(apri, flush_len = 5)(cube)
+            self.assertEqual("cube", f.__name__)
+            self.assertEqual(15 ** 3, f(15))
+            self.assertEqual(3 ** 3, f(3))
+            self.assertEqual(3 ** 3, f(np.int64(3)))
+            self.assertEqual([3], calls)
+
+            with self.assertRaises(ValueError):
+                f(-1)
+
+            self.assertEqual([(10, 10)], list(reg.intervals(apri)))
+            self.assertEqual([n ** 3 for n in range(25)], list(f(np.arange(25))))
+            self.assertEqual(list(range(20)), sorted(n for n in calls if n < 10) + list(range(10, 20)))
+            self.assertEqual(24 - 10 + 1, len(calls))
+            # the buffer was flushed in contiguous runs
+            self.assertEqual([(0, 10), (10, 10), (20, 5)], sorted(reg.intervals(apri)))
+            self.assertEqual([[27, 8000], [13824, 0]], f(np.array([[3, 20], [24, 0]])).tolist())
+            self.assertEqual(15, len(calls))
+            f(30)
+            f(40)
+            self.assertEqual([(0, 10), (10, 10), (20, 5)], sorted(reg.intervals(apri)))
+            f.flush()
+            # scattered indices are not coalesced, so each is added as its own `Block`
+            self.assertEqual([(0, 10), (10, 10), (20, 5), (30, 1), (40, 1)], sorted(reg.intervals(apri)))
+            self.assertEqual(17, len(calls))
+
+            g = reg.memoize(apri, vectorized = True)(cube)
+            calls.clear()
+            self.assertEqual([n ** 3 for n in range(28, 42)], list(g(np.arange(28, 42))))
+            self.assertEqual(1, len(calls))
+            self.assertEqual(list(range(28, 30)) + list(range(31, 40)) + [41], list(calls[0]))
+            self.assertEqual(50 ** 3, g(50))
+            self.assertEqual(2, len(calls))
+            g.flush()
+            self.assertEqual([n ** 3 for n in range(25)], list(reg[apri, 0 : 28]))
+            self.assertEqual([n ** 3 for n in range(28, 42)], list(reg[apri, 28 : 42]))
+            self.assertEqual(50 ** 3, reg[apri, 50])
+            h = reg.memoize(apri)(cube)
+            self.assertEqual([60 ** 3, 61 ** 3], list(h(np.array([60, 61]))))
+
+            with reg.memoize(apri)(cube) as k:
+                self.assertEqual(70 ** 3, k(70))
+
+            # flushed when the `with` block exits
+            self.assertEqual(70 ** 3, reg[apri, 70])
+            self.assertNotIn((60, 2), list(reg.intervals(apri)))
+
+        with reg.open() as reg:
+
+            # flushed when the `Register` was closed
+            self.assertIn((60, 2), list(reg.intervals(apri)))
+            self.assertEqual(61 ** 3, reg[apri, 61])
+
+        with reg.open(readonly = True) as reg:
+
+            with self.assertRaisesRegex(RegisterError, "memoize"):
+                reg.memoize(apri)
+
+    def test_gaps(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "gappy")
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "gaps"):
+            reg.gaps(apri, 0, 10)
+
+        with reg.open() as reg:
+
+            self.assertEqual([(0, 10)], reg.gaps(apri, 0, 10))
+
+            for startn, length in [(5, 10), (10, 10), (30, 5), (40, 10)]:
+
+                with Block(np.arange(length), apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with Block(np.arange(3), apri, 25) as blk:
+
+                reg.add_ram_blk(blk)
+                self.assertEqual([(0, 5), (20, 5), (28, 2), (35, 5), (50, 10)], reg.gaps(apri, 0, 60))
+                self.assertEqual([(20, 10), (35, 5)], reg.gaps(apri, 12, 45, diskonly = True))
+                reg.rmv_ram_blk(blk)
+
+            self.assertEqual([], reg.gaps(apri, 5, 20))
+            self.assertEqual([], reg.gaps(apri, 7, 7))
+            self.assertEqual([(22, 3)], reg.gaps(apri, 22, 25))
+
+    def test_build(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "squares")
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "build"):
+            reg.build(apri, _build_squares, 0, 10, 5)
+
+        with reg.open() as reg:
+
+            with Block(np.arange(120, 180) ** 2, apri, 120) as blk:
+                reg.add_disk_blk(blk)
+
+            with self.assertRaises(RuntimeError):
+                reg.build(apri, _build_squares_until_500, 0, 1000, 100)
+
+            self.assertEqual([(500, 500)], reg.gaps(apri, 0, 1000))
+            self.assertEqual(
+                [(0, 100), (100, 20), (120, 60), (180, 20)] + [(n, 100) for n in range(200, 500, 100)],
+                sorted(reg.intervals(apri))
+            )
+            self.assertEqual(3, reg.build(apri, _build_squares, 0, 750, 100, num_procs = 2, batch_size = 2))
+            self.assertEqual(0, reg.build(apri, _build_squares, 0, 750, 100))
+            self.assertEqual([(750, 250)], reg.gaps(apri, 0, 1000))
+            self.assertEqual(3, reg.build(apri, _build_squares, 0, 1000, 100))
+            self.assertEqual(list(np.arange(1000) ** 2), list(reg[apri, :]))
+            # the file of the failed `Block` was deleted
+            self.assertEqual(reg.num_blks(apri) + 1, len(list(reg._local_dir.iterdir())))
+
+    def test_build_sigterm(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "squares")
+
+        with reg.open() as reg:
+
+            num_files = len(list(reg._local_dir.iterdir()))
+            start = time.time()
+
+            with self.assertRaises(ReceivedSigterm):
+                reg.build(apri, _build_squares_until_sigterm, 0, 1000, 100, num_procs = 2)
+
+            self.assertLess(time.time() - start, 30)
+            # the finished `Block`s were added and the files of the unfinished ones deleted
+            self.assertEqual([(0, 100), (100, 100), (200, 100)], sorted(reg.intervals(apri)))
+            self.assertEqual(list(np.arange(300) ** 2), list(reg[apri, :300]))
+            self.assertEqual(num_files + 3, len(list(reg._local_dir.iterdir())))
+
+    def test__update_perm_db(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "synced")
+        tmp_dir = SAVES_DIR / "tmp"
+        tmp_dir.mkdir()
+        reg._enable_update_perm_db()
+        perm_data_filepath = reg._perm_db_filepath / "data.mdb"
+
+        with reg.tmp_db(tmp_dir, 60) as reg:
+
+            with reg.open() as reg_:
+
+                with Block(np.arange(10), apri) as blk:
+                    reg_.add_disk_blk(blk)
+
+                with reg_._txn("reader") as r_txn:
+                    # readers in the write database do not block the sync
+                    asyncio.run(reg._update_perm_db(60))
+
+            with open_lmdb(reg._perm_db_filepath, reg._db_map_size, True) as db:
+                self.assertEqual(1, db_count_keys(_BLK_KEY_PREFIX, db))
+
+            self.assertEqual(1, reg._perm_db_generation())
+            digest = read_txt_file(reg._digest_filepath)
+            self.assertEqual(digest, reg._digest())
+            # nothing committed since the last sync
+            inode = perm_data_filepath.stat().st_ino
+            asyncio.run(reg._update_perm_db(60))
+            self.assertEqual(inode, perm_data_filepath.stat().st_ino)
+            self.assertEqual(1, reg._perm_db_generation())
+
+            with reg.open() as reg_:
+
+                with Block(np.arange(10), apri, 10) as blk:
+                    reg_.add_disk_blk(blk)
+
+        self.assertNotEqual(inode, perm_data_filepath.stat().st_ino)
+        self.assertEqual(0, len(list(reg._perm_db_filepath.iterdir())) - 2) # no leftover snapshot directories
+        # compacted snapshots all have LMDB txn id 1, the generation tells them apart
+        self.assertEqual(2, reg._perm_db_generation())
+        self.assertNotEqual(digest, read_txt_file(reg._digest_filepath))
+        self.assertEqual(read_txt_file(reg._digest_filepath), reg._digest())
+
+        with reg.open(True) as reg:
+            self.assertEqual(list(range(10)) * 2, list(reg.get(apri, slice(0, 20))))
+
+    def test_adopt_map_size_while_reading(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg", initial_reg_size = 2 ** 16)
+        apri = ApriInfo(name = "read")
+
+        with reg.open() as reg:
+
+            with Block(np.arange(10), apri) as blk:
+                reg.add_disk_blk(blk)
+
+            holding = threading.Event()
+            release = threading.Event()
+
+            def hold():
+
+                with reg.snapshot():
+
+                    holding.set()
+                    release.wait(60)
+
+            thread = threading.Thread(target = hold)
+            thread.start()
+            holding.wait(60)
+            proc = multiprocessing.get_context("spawn").Process(target = _grow_map_of, args = (reg,))
+            proc.start()
+            proc.join()
+            self.assertEqual(0, proc.exitcode)
+            # the map cannot be adopted until the other thread finishes its read
+            threading.Timer(0.5, release.set).start()
+            self.assertEqual(list(range(10)), reg.get_many(apri, range(10)))
+            thread.join()
+            self.assertLess(2 ** 16, reg.reg_size())
+            self.assertEqual(200, reg.num_blks(ApriInfo(name = "growing")))
+
+    def test_grow_map_while_reading(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg", initial_reg_size = 2 ** 16)
+        apri = ApriInfo(name = "growing")
+
+        with reg.open() as reg:
+
+            with reg.snapshot():
+
+                with self.assertRaisesRegex(RegisterError, "cannot grow"):
+
+                    for startn in range(200):
+
+                        with Block(np.arange(1), apri, startn) as blk:
+                            reg.add_disk_blk(blk)
+
+            reg.rmv_apri(apri, force = True)
+
+            holding = threading.Event()
+            release = threading.Event()
+
+            def hold():
+
+                with reg.snapshot():
+
+                    holding.set()
+                    release.wait(60)
+
+            thread = threading.Thread(target = hold)
+            thread.start()
+            holding.wait(60)
+            # the map cannot grow until the other thread finishes its read
+            threading.Timer(0.5, release.set).start()
+
+            for startn in range(200):
+
+                with Block(np.arange(1), apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            thread.join()
+            self.assertLess(0, reg.num_map_growths)
+            self.assertEqual(200, reg.num_blks(apri))
+
+    def test_get_many(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "threaded")
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "get_many"):
+            reg.get_many(apri, [0])
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "blks_parallel"):
+            reg.blks_parallel(apri, len)
+
+        with reg.open() as reg:
+
+            for startn in range(0, 1000, 100):
+
+                with Block(np.arange(startn, startn + 100), apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with Block(np.arange(1000, 1010), apri, 1000) as blk:
+
+                reg.add_ram_blk(blk)
+                ns = list(range(1009, -1, -7))
+                self.assertEqual(ns, reg.get_many(apri, ns, num_threads = 8))
+                disk_ns = [n for n in ns if n < 1000]
+                self.assertEqual(disk_ns, reg.get_many(apri, disk_ns, diskonly = True, num_threads = 8))
+                self.assertEqual(
+                    [sum(range(startn, startn + 100)) for startn in range(0, 1000, 100)] + [sum(range(1000, 1010))],
+                    reg.blks_parallel(apri, lambda blk: int(np.sum(blk.segment)), num_threads = 4)
+                )
+                self.assertEqual(10, len(reg.blks_parallel(apri, len, diskonly = True)))
+                reg.rmv_ram_blk(blk)
+
+            with self.assertRaises(DataNotFoundError):
+                reg.get_many(apri, [5, 1005])
+
+            with self.assertRaisesRegex(ValueError, "num_threads"):
+                reg.get_many(apri, [0], num_threads = 0)
+
+    def test_snapshot(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "snap")
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "snapshot"):
+
+            with reg.snapshot():
+                pass
+
+        with reg.open() as reg:
+
+            with self.assertRaisesRegex(ValueError, "renew_snapshot"):
+                reg.renew_snapshot()
+
+            with Block(np.arange(10), apri) as blk:
+                reg.add_disk_blk(blk)
+
+            with reg.snapshot():
+
+                num_readers = num_open_readers_accurate(reg._db)
+                self.assertEqual(5, reg[apri, 5])
+                self.assertEqual([(0, 10)], list(reg.intervals(apri)))
+                self.assertEqual(num_readers, num_open_readers_accurate(reg._db))
+
+                with Block(np.arange(10, 20), apri, 10) as blk:
+                    reg.add_disk_blk(blk)
+
+                # the snapshot does not see commits made after it began
+                self.assertEqual([(0, 10)], list(reg.intervals(apri)))
+
+                with self.assertRaises(DataNotFoundError):
+                    reg[apri, 15]
+
+                with reg.snapshot():
+                    self.assertEqual(1, reg.num_blks(apri))
+
+                reg.renew_snapshot()
+                self.assertEqual([(0, 10), (10, 10)], list(reg.intervals(apri)))
+                self.assertEqual(15, reg[apri, 15])
+                self.assertEqual(num_readers, num_open_readers_accurate(reg._db))
+
+            self.assertEqual(2, reg.num_blks(apri))
+
+    def test__reap_stale_readers(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+
+        with self.assertRaisesRegex(RegisterNotOpenError, "reader_slot_usage"):
+            reg.reader_slot_usage()
+
+        with reg.open() as reg:
+
+            self.assertEqual((0, reg._db.info()['max_readers']), reg.reader_slot_usage())
+            # a process that dies during a read transaction leaves its reader slot behind
+            proc = multiprocessing.get_context("spawn").Process(
+                target = _hold_reader_and_die, args = (reg._perm_db_filepath,)
+            )
+            proc.start()
+            proc.join()
+            self.assertEqual(1, reg.reader_slot_usage()[0])
+            self.assertEqual(1, reg._reap_stale_readers())
+            self.assertEqual(0, reg.reader_slot_usage()[0])
+            self.assertEqual(0, reg._reap_stale_readers())
+
+    def test_commit_service(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "committed")
+
+        with reg.open():
+            pass
+
+        cornifer.parallelize(
+            3, _add_disk_blks_via_commit_service, (reg, list(range(0, 300, 10))), timeout = 120,
+            commit_service = True
+        )
+        self.assertIsNone(reg._commit_address)
+
+        with reg.open(readonly = True) as reg:
+
+            self.assertEqual(30, reg.num_blks(apri))
+            self.assertEqual(list(range(300)), list(reg[apri, :]))
+
+        # the duplicate `Block` is rejected and its data file deleted
+        num_files = len(list(reg._local_dir.iterdir()))
+
+        cornifer.parallelize(1, _add_disk_blks_via_commit_service, (reg, [0]), timeout = 120, commit_service = True)
+
+        self.assertEqual(num_files, len(list(reg._local_dir.iterdir())))
+
+        with reg.open(readonly = True) as reg:
+            self.assertEqual(30, reg.num_blks(apri))
+
+    def test_parallelize_returns_promptly(self):
+
+        procs = [multiprocessing.get_context("spawn").Process(target = _exit_quickly, args = (4, i)) for i in range(4)]
+        start = time.time()
+        # woken by the sentinels of the processes as they exit
+        self.assertTrue(start_with_timeout(procs, 600))
+        self.assertLess(time.time() - start, 20)
+
+        proc = multiprocessing.get_context("spawn").Process(target = _exit_quickly, args = (1, 0))
+        proc.start()
+        proc.join()
+        start = time.time()
+        # every process exited between the liveness check and the wait
+        _wait_for_exit([proc], 600)
+        self.assertLess(time.time() - start, 5)
+
+        for _ in range(3):
+
+            start = time.time()
+            cornifer.parallelize(4, _exit_quickly, timeout = 600)
+            self.assertLess(time.time() - start, 20)
+
+    def test_parallelize_items(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "items")
+        pids = {}
+
+        def on_result(index, pid):
+            pids[index] = pid
+
+        with self.assertRaisesRegex(ValueError, "on_result"):
+            cornifer.parallelize(2, _add_item_blk, (reg,), on_result = on_result)
+
+        timings = cornifer.parallelize(
+            3, _add_item_blk, (reg,), timeout = 120, items = list(range(0, 200, 10)), on_result = on_result
+        )
+        self.assertEqual(list(range(20)), sorted(timings.keys()))
+        self.assertEqual(list(range(20)), sorted(pids.keys()))
+        # the items were handed out to at most 3 processes
+        self.assertLessEqual(len(set(pids.values())), 3)
+
+        with reg.open(readonly = True) as reg:
+
+            self.assertEqual(20, reg.num_blks(apri))
+            self.assertEqual(list(range(200)), list(reg[apri, :]))
+
+    def test_parallelize_retries(self):
+
+        marker_dir = SAVES_DIR / "markers"
+        marker_dir.mkdir()
+        items = [0, 1, 2, 4]
+        # every item kills its first process, and is then retried by a replacement process
+        timings = cornifer.parallelize(2, _die_once, (marker_dir,), timeout = 120, items = items, max_retries = 1)
+        self.assertEqual([0, 1, 2, 3], sorted(timings.keys()))
+        self.assertEqual(sorted(str(item) for item in items), sorted(path.name for path in marker_dir.iterdir()))
+
+        shutil.rmtree(marker_dir)
+        marker_dir.mkdir()
+
+        with self.assertRaisesRegex(RuntimeError, r"indices : \[0, 1\]\. (.|\n)*died"):
+            cornifer.parallelize(2, _die_once, (marker_dir,), timeout = 120, items = [5, 6], max_retries = 0)
+
+        with self.assertRaisesRegex(RuntimeError, r"indices : \[1\]\. (.|\n)*item 3"):
+            cornifer.parallelize(2, _die_once, (marker_dir,), timeout = 120, items = [5, 3, 6], max_retries = 1)
+
+        shutil.rmtree(marker_dir)
+        marker_dir.mkdir()
+
+        # a result that cannot be sent back is an error of its task, not a crash that is retried
+        with self.assertRaisesRegex(RuntimeError, r"indices : \[0, 1\]\. (.|\n)*pickle"):
+            cornifer.parallelize(
+                2, _return_unpicklable, (marker_dir,), timeout = 120, items = [0, 1], on_result = lambda *_: None
+            )
+
+        self.assertEqual(["0", "1"], sorted(path.name.split("-")[0] for path in marker_dir.iterdir()))
+
+    def test_worker_pool(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        out_dir = SAVES_DIR / "out"
+        out_dir.mkdir()
+
+        with reg.open() as reg:
+
+            with Block(np.arange(10), ApriInfo(name = "items"), 0) as blk:
+                reg.add_disk_blk(blk)
+
+            with self.assertRaisesRegex(RegisterOpenError, "WorkerPool"):
+
+                with WorkerPool(1, (reg,)) as _:
+                    pass
+
+        with WorkerPool(2, (reg,)) as pool:
+
+            for items in [range(6), range(6, 12)]:
+                self.assertEqual(list(range(6)), sorted(pool.parallelize(_record_pid, (reg, out_dir), items = items)))
+
+            records = [path.name.split("-") for path in out_dir.iterdir()]
+            self.assertEqual(list(range(12)), sorted(int(item) for item, _, _ in records))
+            # both jobs ran on the same two processes, each of which had `reg` open
+            self.assertEqual(2, len({pid for _, pid, _ in records}))
+            self.assertEqual({"1"}, {num_blks for _, _, num_blks in records})
+            pids = {pid for _, pid, _ in records}
+            shutil.rmtree(out_dir)
+            out_dir.mkdir()
+
+            # static mode : each `proc_index` is a task handed to whichever worker is idle, not to a fixed worker
+            for job in range(3):
+                self.assertIsNone(pool.parallelize(_record_proc_index, (out_dir, job)))
+
+            records = [path.name.split("-") for path in out_dir.iterdir()]
+            self.assertEqual(
+                [(job, "2", proc_index) for job in "012" for proc_index in "01"],
+                sorted((job, num_procs, proc_index) for job, num_procs, proc_index, _ in records)
+            )
+            self.assertTrue({pid for _, _, _, pid in records} <= pids)
+
+        with self.assertRaisesRegex(ValueError, "with"):
+            pool.parallelize(_record_proc_index, (out_dir, 0))
+
+        # workers that cannot open `reg` are not replaced forever
+        with mock.patch.object(NumpyRegister, "open", _fail_to_open):
+
+            with WorkerPool(2, (reg,), start_method = "fork") as pool:
+
+                start = time.time()
+
+                with self.assertRaisesRegex(RuntimeError, "before they were ready(.|\n)*cannot open"):
+                    pool.parallelize(_record_pid, (reg, out_dir), timeout = 120, items = range(2), max_retries = 1)
+
+                self.assertLess(time.time() - start, 60)
+
+    def test_shared_array(self):
+
+        arr = np.arange(100) ** 2
+        attach = "import pickle, sys\nwith pickle.load(sys.stdin.buffer).attach() as arr:\n    print(int(arr[-1]))"
+
+        for start_method in ["spawn", "fork", "forkserver"]:
+
+            with SharedArray(arr) as shared:
+
+                results = {}
+                cornifer.parallelize(
+                    2, _read_shared, (shared,), timeout = 120, items = range(0, 100, 10), start_method = start_method,
+                    on_result = results.__setitem__
+                )
+                self.assertEqual({i : (10 * i) ** 2 for i in range(10)}, results)
+                # a forked child inherits the `SharedArray`, but does not own it
+                proc = multiprocessing.get_context("fork").Process(target = _unlink_shared, args = (shared,))
+                proc.start()
+                proc.join()
+                self.assertEqual(0, proc.exitcode)
+                # an unrelated process, which has its own resource tracker, does not unlink it when it exits
+                out = subprocess.run(
+                    [sys.executable, "-c", attach], input = pickle.dumps(shared), capture_output = True, check = True
+                )
+                self.assertEqual(str(99 ** 2), out.stdout.decode().strip())
+
+                with shared.attach() as view:
+                    self.assertEqual(list(arr), list(view))
+
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(shared.name)
+
+    def test_shared_ram_blk(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri = ApriInfo(name = "shared")
+
+        with SharedBlock.zeros(100, np.int64, apri) as blk:
+
+            with reg.open() as reg:
+                reg.add_ram_blk(blk)
+
+            cornifer.parallelize(4, _fill_shared_ram_blk, (reg,), timeout = 120)
+            self.assertTrue(np.array_equal(np.arange(100) ** 2, blk.segment))
+
+            with reg.open() as reg:
+
+                reg.flush_ram_blk(blk)
+                self.assertEqual(0, reg._num_blks_ram(apri))
+                self.assertEqual([(0, 100)], list(reg.intervals(apri, diskonly = True)))
+                self.assertEqual(99 ** 2, reg[apri, 99])
+
+                with self.assertRaises(DataNotFoundError):
+                    reg.flush_ram_blk(blk)
+
+    def test_migrate_key_format(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri1 = ApriInfo(name = "squares")
+        apri2 = ApriInfo(inner = apri1, s = "hi")
+        self.assertEqual(1, reg.key_format())
+
+        with reg.open() as reg:
+
+            for startn in range(0, 50, 10):
+
+                with Block(np.arange(startn, startn + 10) ** 2, apri1, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            with Block(np.arange(5), apri2, 3) as blk:
+                reg.add_disk_blk(blk)
+
+            reg.set_apos(apri2, AposInfo(ref = apri1))
+            reg.build_inverse_index(apri2)
+            reg.compress(apri1, 10, 10)
+
+        with self.assertRaises(ValueError):
+            reg.migrate_key_format(0)
+
+        with reg.open() as reg:
+
+            with self.assertRaises(RegisterOpenError):
+                reg.migrate_key_format()
+
+        reg.migrate_key_format(batch_size = 3)
+        self.assertEqual(2, reg.key_format())
+        reg.migrate_key_format() # no-op
+
+        with reg.open() as reg:
+
+            self.assertEqual(2, reg.key_format())
+            self.assertEqual({apri1, apri2}, set(reg.apris()))
+            self.assertEqual(AposInfo(ref = apri1), reg.apos(apri2))
+            self.assertEqual([(startn, 10) for startn in range(0, 50, 10)], list(reg.intervals(apri1, sort = True)))
+            self.assertEqual([(3, 5)], list(reg.intervals(apri2)))
+            self.assertEqual(49 ** 2, reg[apri1, 49])
+            self.assertEqual(4, reg[apri2, 7])
+            self.assertTrue(reg.is_compressed(apri1, 10, 10))
+            self.assertTrue(np.array_equal([5], reg.find(apri2, 2)))
+
+            with reg._db.begin() as ro_txn:
+
+                with r_txn_prefix_iter(_BLK_KEY_PREFIX, ro_txn) as it:
+                    keys = [key for key, _ in it]
+
+            self.assertEqual(6, len(keys))
+
+            for key in keys:
+                self.assertEqual(_BLK_KEY_PREFIX_LEN + 4 + 8 + 8, len(key))
+
+            # no head/tail restrictions
+            startn = 10 ** 15
+
+            with Block(np.arange(3), apri1, startn) as blk:
+                reg.add_disk_blk(blk)
+
+            self.assertEqual((startn, 3), list(reg.intervals(apri1, sort = True))[-1])
+            self.assertEqual(2, reg[apri1, startn + 2])
+            reg.set_startn_info(5, 3) # no-op
+            self.assertEqual(2, reg[apri1, startn + 2])
+
+            apri3 = ApriInfo(outer = apri2)
+
+            with Block(np.arange(3), apri3, 0) as blk:
+                reg.add_disk_blk(blk)
+
+            self.assertIn(apri3, set(reg.apris()))
+            self.assertEqual(2, reg[apri3, 2])
+
+            with self.assertRaisesRegex(ValueError, "binary key format"):
+                reg.increase_max_apri(10 ** 7)
+
+    def test_set_max_reg_size(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg", initial_reg_size = 2 ** 16)
+        apri = ApriInfo(name = "growing")
+
+        with self.assertRaisesRegex(ValueError, "positive"):
+            reg.set_max_reg_size(0)
+
+        reg.set_max_reg_size(2 ** 19)
+        self.assertEqual(2 ** 19, reg.max_reg_size())
+
+        with reg.open() as reg:
+
+            for startn in range(0, 200):
+
+                with Block(np.arange(1), apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+            self.assertLess(0, reg.num_map_growths)
+            self.assertLess(2 ** 16, reg.reg_size())
+            self.assertEqual(reg.reg_size(), int(read_txt_file(reg._db_map_size_filepath)))
+            self.assertEqual(200, reg.num_blks(apri))
+
+            with self.assertRaisesRegex(RegisterError, "Exceeded max"):
+
+                for startn in range(200, 20000):
+
+                    with Block(np.arange(1), apri, startn) as blk:
+                        reg.add_disk_blk(blk)
+
+            self.assertEqual(2 ** 19, reg.reg_size())
+            num_blks = reg.num_blks(apri)
+            self.assertEqual([0] * num_blks, [reg[apri, n] for n in range(num_blks)])
+
+        self.assertEqual(2 ** 19, int(read_txt_file(reg._db_map_size_filepath)))
+
+        with reg.open(True) as reg:
+            self.assertEqual(num_blks, reg.num_blks(apri))
+
+    def test_readers(self):
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        num_apos_queries = 100000
+        apri = ApriInfo(hi = "hello")
+        apos = AposInfo(hey = "sup")
+
+        with reg.open() as reg:
+            reg.set_apos(apri, apos)
+
+        try:
+
+            with reg.open(readonly=True) as reg:
+
+                    for j in range(num_apos_queries):
+                        y = reg.apos(apri)
+
+        finally:
+            print(j)
+
+    def test_num_blks(self):
+
+        pass # TODO
+
+    def test_rekey_compressed_blks(self):
+        # `set_startn_info` and `increase_max_apri` rewrite the keys of every disk `Block` under each prefix
+
+        reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+        apri1 = ApriInfo(name = "one")
+        apri2 = ApriInfo(name = "two")
+        start = 10
+
+        with reg.open() as reg:
+
+            for apri in (apri1, apri2):
+
+                for startn in (start, start + 10):
+
+                    with Block(np.arange(startn, startn + 10), apri, startn) as blk:
+                        reg.add_disk_blk(blk)
+
+            reg.compress(apri1)
+
+            for rekey in (lambda: reg.set_startn_info(0, 2), lambda: reg.increase_max_apri(100 * _MAX_APRI_DFL)):
+
+                rekey()
+
+                for prefix in (_BLK_KEY_PREFIX, _COMPRESSED_KEY_PREFIX, _STATS_KEY_PREFIX):
+                    self.assertEqual(4, db_count_keys(prefix, reg._db))
+
+                self.assertEqual(list(range(start, start + 20)), list(reg[apri2, start : start + 20]))
+
+            reg.decompress(apri1)
+            self.assertEqual(list(range(start, start + 20)), list(reg[apri1, start : start + 20]))
 
     def test_increase_max_apri(self):
 
@@ -0,0 +1,128 @@
+import multiprocessing
+import shutil
+import threading
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from cornifer import NumpyRegister, Register, Block, RemoteRegister, serve
+from cornifer.info import ApriInfo
+from cornifer._utilities import random_unique_filename
+from cornifer.errors import DataNotFoundError
+
+SAVES_DIR = random_unique_filename(Path.home() / "cornifer_test_cases")
+
+class Test_RemoteRegister(TestCase):
+
+    def setUp(self):
+
+        if SAVES_DIR.is_dir():
+            shutil.rmtree(SAVES_DIR)
+
+        SAVES_DIR.mkdir(parents = True)
+        self.apri = ApriInfo(name = "squares")
+        self.reg = NumpyRegister(SAVES_DIR, "sh", "msg")
+
+        with self.reg.open() as reg:
+
+            for startn in range(0, 3000, 1000):
+
+                with Block(np.arange(startn, startn + 1000) ** 2, self.apri, startn) as blk:
+                    reg.add_disk_blk(blk)
+
+        self.address = SAVES_DIR / "cornifer.sock"
+        # room for one of the three `Block`s
+        self.server = multiprocessing.get_context("spawn").Process(
+            target = serve, args = (self.address, [self.reg], 8000)
+        )
+        self.server.start()
+
+    def tearDown(self):
+
+        self.server.terminate()
+        self.server.join()
+
+        if SAVES_DIR.is_dir():
+            shutil.rmtree(SAVES_DIR)
+
+        Register._instances.clear()
+
+    def test_reads(self):
+
+        with RemoteRegister(self.address, self.reg) as reg:
+
+            self.assertEqual(self.reg.ident(), reg.ident())
+            self.assertEqual([self.apri], reg.apris())
+            self.assertEqual([(0, 1000), (1000, 1000), (2000, 1000)], reg.intervals(self.apri, sort = True))
+            self.assertEqual(3, reg.num_blks(self.apri))
+            self.assertEqual(2999, reg.maxn(self.apri))
+            self.assertEqual(1500 ** 2, reg[self.apri, 1500])
+            self.assertTrue(np.array_equal(np.arange(10, 13) ** 2, reg[self.apri, 10:13]))
+            self.assertEqual([1, 2999 ** 2], reg.get_many(self.apri, [1, 2999]))
+            self.assertEqual([1000, 1000, 1000], [len(blk) for blk in reg.blks(self.apri)])
+
+            with self.assertRaises(DataNotFoundError):
+                reg[self.apri, 3000]
+
+            with self.assertRaises(DataNotFoundError):
+                reg[ApriInfo(name = "nope"), 0]
+
+        with self.assertRaisesRegex(DataNotFoundError, "does not serve"):
+            RemoteRegister(self.address, "nope")
+
+    def test_shared_blks(self):
+
+        with RemoteRegister(self.address, self.reg) as reg1, RemoteRegister(self.address, self.reg) as reg2:
+
+            with reg1.blk(self.apri, 1000, 1000) as blk1:
+
+                seg = blk1.segment
+                self.assertEqual(1000, blk1.startn)
+                self.assertFalse(seg.flags.writeable)
+                self.assertTrue(np.array_equal(np.arange(1000, 2000) ** 2, seg))
+
+            with reg2.blk_by_n(self.apri, 1500) as blk2:
+                self.assertTrue(np.array_equal(seg, blk2.segment))
+
+            # both clients map the same shared memory
+            self.assertEqual(list(reg1._attached.keys()), list(reg2._attached.keys()))
+
+            for blk in reg1.blks(self.apri): # evicts the `Block` of `seg` from the server's cache
+                pass
+
+            self.assertTrue(np.array_equal(np.arange(1000, 2000) ** 2, seg))
+
+    def test_concurrent_clients(self):
+        # the cache only fits one `Block`, so every request evicts the segment that the other client was just sent
+
+        errors = []
+
+        def read(startns):
+
+            try:
+
+                with RemoteRegister(self.address, self.reg) as reg:
+
+                    for startn in startns:
+
+                        with reg.blk(self.apri, startn, 1000) as blk:
+
+                            if not np.array_equal(np.arange(startn, startn + 1000) ** 2, blk.segment):
+                                errors.append(startn)
+
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target = read, args = ([0, 1000, 2000] * 30,)),
+            threading.Thread(target = read, args = ([2000, 0, 1000] * 30,))
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
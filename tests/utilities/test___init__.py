@@ -4,7 +4,7 @@ from pathlib import Path
 from unittest import TestCase
 
 from cornifer._utilities import intervals_overlap, random_unique_filename, check_has_method, \
-    replace_lists_with_tuples, replace_tuples_with_lists, _justify_slice_start_stop, order_json_obj
+    replace_lists_with_tuples, replace_tuples_with_lists, _justify_slice_start_stop, order_json_obj, fingerprint_file
 
 """
 - LEVEL 0:
@@ -473,4 +473,32 @@ class Test___init__(TestCase):
         self.assertEqual(
             order_json_obj([{"xyz":1, "abc":2}]),
             [{"abc":2, "xyz":1}]
-        )
\ No newline at end of file
+        )
+    def test_fingerprint_file(self):
+
+        if SAVES_DIR.is_dir():
+            shutil.rmtree(SAVES_DIR)
+
+        SAVES_DIR.mkdir()
+        file = SAVES_DIR / "data.bin"
+
+        for size in [0, 10, 2 ** 20]:
+
+            data = bytearray(size)
+            file.write_bytes(data)
+            fingerprint = fingerprint_file(file)
+            self.assertEqual(fingerprint, fingerprint_file(file))
+
+            for i in [0, size - 1]:
+
+                if 0 <= i < size:
+
+                    data[i] = 1
+                    file.write_bytes(data)
+                    self.assertNotEqual(fingerprint, fingerprint_file(file))
+                    data[i] = 0
+
+            file.write_bytes(data + b"\0")
+            self.assertNotEqual(fingerprint, fingerprint_file(file))
+
+        shutil.rmtree(SAVES_DIR)
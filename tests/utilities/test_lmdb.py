@@ -5,7 +5,7 @@ from pathlib import Path
 import lmdb
 
 from cornifer._utilities import random_unique_filename, BYTES_PER_MB, BYTES_PER_KB, BYTES_PER_GB
-from cornifer._utilities.lmdb import create_lmdb, open_lmdb, r_txn_prefix_iter, approx_memory
+from cornifer._utilities.lmdb import create_lmdb, open_lmdb, r_txn_prefix_iter, approx_memory, GrowingWriter
 
 key = 'key'.encode('ASCII')
 one = '1'.encode('ASCII')
@@ -76,4 +76,44 @@ class TestLmdb(unittest.TestCase):
                 db = create_lmdb(dir_, mapsize, max_readers)
                 db.close()
                 db = open_lmdb(dir_, mapsize, False)
-                self.stress(db, mapsize)
\ No newline at end of file
+                self.stress(db, mapsize)
+    def test_growing_writer(self):
+
+        db = create_lmdb(self.test_dir, 5 * BYTES_PER_KB * 8, 1)
+        growths = []
+
+        def grow():
+
+            growths.append(db.info()['map_size'])
+            db.set_mapsize(2 * growths[-1])
+            return True
+
+        items = [(str(i).zfill(4).encode('ASCII'), one * BYTES_PER_KB) for i in range(200)]
+
+        with GrowingWriter(db, grow).begin() as rw_txn:
+
+            self.assertEqual((100, 100), rw_txn.putmulti(items[ : 100]))
+            rw_txn.put(key, one)
+            self.assertEqual((100, 100), rw_txn.putmulti(items[100 : ]))
+
+            with rw_txn.cursor() as cursor:
+
+                self.assertTrue(cursor.set_key(key))
+
+                with self.assertRaisesRegex(TypeError, "GrowingWriter"):
+                    cursor.put(key, empty)
+
+                with self.assertRaisesRegex(TypeError, "GrowingWriter"):
+                    cursor.delete()
+
+        # the writes before each growth were replayed
+        self.assertLess(0, len(growths))
+
+        with db.begin() as ro_txn:
+
+            self.assertEqual(one, ro_txn.get(key))
+
+            with r_txn_prefix_iter(b"0", ro_txn) as it:
+                self.assertEqual(items, list(it))
+
+        db.close()